@@ -0,0 +1,162 @@
+# decode_models.py
+#
+# Microbenchmark of the generated from_dict decoders against the reflective
+# __init__/__post_init__ decoding the response models used before, and of lazy
+# listings (get_files(lazy=True)) when only top-level fields are read: decoding
+# alone, the whole listing including the JSON parse, and the memory it holds.
+#
+#   python benchmarks/decode_models.py [--models 500] [--files 5000] [--repeat 5]
+
+import argparse
+import copy
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, MISSING
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openwebui_python.models.model import Model, Action, Pipe, OpenAI, Info, Architecture, Pricing, TopProvider
+from openwebui_python.models.files import OpenWebFile, Meta, FileData
+from openwebui_python.lazy import LazyList
+
+def legacy_construct(cls, kwargs):
+    '''
+    What constructing a model cost before: known_fields rebuilt and every field walked
+    on each call, then __dict__ copied to look for extras
+    '''
+    obj = object.__new__(cls)
+    known_fields = {f.name for f in cls.__dataclass_fields__.values() if f.name != 'extra_fields'}
+    known_args = {k: kwargs.pop(k) for k in list(kwargs) if k in known_fields}
+    object.__setattr__(obj, 'extra_fields', kwargs)
+    for name, value in known_args.items():
+        object.__setattr__(obj, name, value)
+    for name, field_def in cls.__dataclass_fields__.items():
+        if name not in known_args and name != 'extra_fields':
+            if field_def.default_factory is not MISSING:
+                object.__setattr__(obj, name, field_def.default_factory())
+            elif field_def.default is not MISSING:
+                object.__setattr__(obj, name, field_def.default)
+    defined_fields = {f.name for f in fields(cls)}
+    extras = {k: v for k, v in obj.__dict__.copy().items() if k not in defined_fields}
+    for extra in extras:
+        del obj.__dict__[extra]
+    obj.extra_fields.update(extras)
+    return obj
+
+def legacy_model(item):
+    openai = item.get('openai')
+    if openai:
+        openai['architecture'] = legacy_construct(Architecture, openai['architecture'])
+        openai['pricing'] = legacy_construct(Pricing, openai['pricing'])
+        openai['top_provider'] = legacy_construct(TopProvider, openai['top_provider'])
+    item['actions'] = [legacy_construct(Action, action) for action in item.get('actions', [])]
+    item['pipe'] = legacy_construct(Pipe, item['pipe']) if item.get('pipe') else None
+    item['openai'] = legacy_construct(OpenAI, openai) if openai else None
+    item['info'] = legacy_construct(Info, item['info']) if item.get('info') else None
+    return legacy_construct(Model, item)
+
+def legacy_file(item):
+    item['meta'] = legacy_construct(Meta, item['meta'])
+    item['data'] = legacy_construct(FileData, item['data'])
+    return legacy_construct(OpenWebFile, item)
+
+def model_payload(i):
+    return {
+        "id": f"provider/model-{i}", "name": f"Model {i}", "object": "model", "owned_by": "openai",
+        "created": 1700000000 + i, "urlIdx": 0, "connection_type": "external", "tags": [],
+        "actions": [{"id": "summarize", "name": "Summarize", "description": "Summarize the chat"}],
+        "openai": {
+            "id": f"provider/model-{i}", "name": f"Model {i}", "created": 1700000000, "context_length": 128000,
+            "description": "A general purpose model " * 8, "object": "model", "owned_by": "openai",
+            "architecture": {"modality": "text->text", "tokenizer": "GPT", "instruct_type": None},
+            "pricing": {"prompt": "0.000005", "completion": "0.000015", "image": "0", "request": "0"},
+            "top_provider": {"context_length": 128000, "max_completion_tokens": 4096, "is_moderated": True},
+            "per_request_limits": None, "hugging_face_id": ""
+        },
+        "info": {"id": f"provider/model-{i}", "name": f"Model {i}", "is_active": True, "params": {}, "meta": {}}
+    }
+
+def file_payload(i):
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}", "user_id": "3f1c2b8e-5d4a-4e1f-9c2b-7a6d5e4f3c2b",
+        "filename": f"report-{i}.pdf", "hash": "a" * 64, "path": f"/app/backend/data/uploads/report-{i}.pdf",
+        "created_at": 1700000000, "updated_at": 1700000000, "access_control": None,
+        "meta": {"name": f"report-{i}.pdf", "content_type": "application/pdf", "size": 123456,
+                 "collection_name": f"file-{i}", "data": {}},
+        "data": {"content": "Lorem ipsum dolor sit amet " * 20, "status": "completed"}
+    }
+
+def bench(label, decode, payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        items = copy.deepcopy(payload)  # the legacy path mutates its input
+        start = time.perf_counter()
+        for item in items:
+            decode(item)
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<10} {best * 1000:8.2f} ms  {best / len(payload) * 1e6:7.2f} us/object")
+    return best
+
+def bench_listing(label, parse, payload, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for file in parse(payload):
+            file.filename
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<10} {best * 1000:8.2f} ms")
+    return best
+
+def bench_memory(label, parse, body):
+    gc.collect()
+    tracemalloc.start()
+    files = parse(body)
+    for file in files:
+        file.filename
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<10} {held / 2**20:8.2f} MiB held  {peak / 2**20:8.2f} MiB peak")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--models', type=int, default=500)
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for title, payload, legacy, compiled in [
+        (f"get_models ({args.models} models)", [model_payload(i) for i in range(args.models)], legacy_model, Model.from_dict),
+        (f"get_files ({args.files} files)", [file_payload(i) for i in range(args.files)], legacy_file, OpenWebFile.from_dict),
+    ]:
+        print(title)
+        before = bench('legacy', legacy, payload, args.repeat)
+        after = bench('from_dict', compiled, payload, args.repeat)
+        print(f"  speedup    {before / after:8.2f}x")
+
+    print(f"get_files ({args.files} files), reading filenames only")
+    payload = [file_payload(i) for i in range(args.files)]
+    eager = bench_listing('eager', lambda items: [OpenWebFile.from_dict(item) for item in items], payload, args.repeat)
+    lazy = bench_listing('lazy', lambda items: LazyList(items, OpenWebFile.Lazy.from_dict), payload, args.repeat)
+    print(f"  speedup    {eager / lazy:8.2f}x")
+
+    print(f"get_files ({args.files} files), JSON parse included, reading filenames only")
+    body = json.dumps(payload)
+
+    def parse_eager(body):
+        return [OpenWebFile.from_dict(item) for item in json.loads(body)]
+
+    def parse_lazy(body):
+        return LazyList(json.loads(body), OpenWebFile.Lazy.from_dict)
+
+    eager = bench_listing('eager', parse_eager, body, args.repeat)
+    lazy = bench_listing('lazy', parse_lazy, body, args.repeat)
+    print(f"  speedup    {eager / lazy:8.2f}x")
+    bench_memory('eager', parse_eager, body)
+    bench_memory('lazy', parse_lazy, body)
+
+if __name__ == '__main__':
+    main()
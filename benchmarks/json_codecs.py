@@ -0,0 +1,83 @@
+# json_codecs.py
+#
+# Microbenchmark of the JSON codecs (see openwebui_python/codec.py) on the bodies the
+# client handles most: encoding a long chat request and decoding a large get_files
+# listing, alone and followed by OpenWebFile.from_dict. msgspec is included when installed.
+#
+#   python benchmarks/json_codecs.py [--files 5000] [--messages 200] [--repeat 5]
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openwebui_python.codec import CODECS
+from openwebui_python.models.files import OpenWebFile
+
+def file_payload(i):
+    return {
+        "id": f"00000000-0000-0000-0000-{i:012d}", "user_id": "3f1c2b8e-5d4a-4e1f-9c2b-7a6d5e4f3c2b",
+        "filename": f"report-{i}.pdf", "hash": "a" * 64, "path": f"/app/backend/data/uploads/report-{i}.pdf",
+        "created_at": 1700000000, "updated_at": 1700000000, "access_control": None,
+        "meta": {"name": f"report-{i}.pdf", "content_type": "application/pdf", "size": 123456,
+                 "collection_name": f"file-{i}", "data": {}},
+        "data": {"content": "Lorem ipsum dolor sit amet, consectetur — adipiscing élit " * 20, "status": "completed"}
+    }
+
+def chat_payload(messages):
+    return {
+        "model": "provider/model-1",
+        "messages": [{"role": "user" if i % 2 == 0 else "assistant", "content": "Summarize the quarterly report. " * 30}
+                     for i in range(messages)],
+        "files": [{"type": "file", "id": f"file-{i}"} for i in range(20)],
+        "stream": False
+    }
+
+def bench(label, run, repeat, size):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    print(f"  {label:<10} {best * 1000:8.2f} ms  {size / best / 1e6:8.1f} MB/s")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=5000)
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    codecs = {}
+    for name, cls in CODECS.items():
+        try:
+            codecs[name] = cls()
+        except ImportError:
+            print(f"({name} is not installed, skipped)")
+
+    chat = chat_payload(args.messages)
+    listing = [file_payload(i) for i in range(args.files)]
+    body = codecs['json'].dumps(listing)
+    chat_size = len(codecs['json'].dumps(chat))
+
+    for title, size, run in [
+        (f"encode chat request ({args.messages} messages, {chat_size / 1e3:.0f} KB)", chat_size,
+         lambda codec: lambda: codec.dumps(chat)),
+        (f"decode get_files ({args.files} files, {len(body) / 1e6:.1f} MB)", len(body),
+         lambda codec: lambda: codec.loads(body)),
+        (f"decode get_files + from_dict ({args.files} files)", len(body),
+         lambda codec: lambda: [OpenWebFile.from_dict(item) for item in codec.loads(body)]),
+    ]:
+        print(title)
+        baseline = None
+        for name, codec in codecs.items():
+            best = bench(name, run(codec), args.repeat, size)
+            baseline = baseline or best
+            if best is not baseline:
+                print(f"  {'speedup':<10} {baseline / best:8.2f}x")
+
+if __name__ == '__main__':
+    main()
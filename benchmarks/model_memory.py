@@ -0,0 +1,69 @@
+# model_memory.py
+#
+# Memory held per decoded object by the regular response models and by their
+# compact (slotted, interned) variants, for get_files()/get_users()-sized listings.
+#
+#   python benchmarks/model_memory.py [--count 20000]
+
+import argparse
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from openwebui_python.models.files import OpenWebFile
+from openwebui_python.models.knowledge import User
+
+OWNERS = [f"3f1c2b8e-5d4a-4e1f-9c2b-7a6d5e4f{i:04d}" for i in range(20)]
+CONTENT_TYPES = ["application/pdf", "text/plain", "text/markdown", "application/json"]
+
+def files_json(count):
+    return json.dumps([{
+        "id": f"00000000-0000-0000-0000-{i:012d}", "user_id": OWNERS[i % len(OWNERS)],
+        "filename": f"report-{i}.pdf", "hash": f"{i:064x}", "path": f"/app/backend/data/uploads/report-{i}.pdf",
+        "created_at": 1700000000 + i, "updated_at": 1700000000 + i,
+        "meta": {"name": f"report-{i}.pdf", "content_type": CONTENT_TYPES[i % len(CONTENT_TYPES)], "size": 1000 + i,
+                 "collection_name": f"file-{i}"},
+        "data": {}
+    } for i in range(count)])
+
+def users_json(count):
+    return json.dumps([{
+        "id": f"00000000-0000-0000-0000-{i:012d}", "name": f"User {i}", "email": f"user{i}@example.com",
+        "role": ["user", "admin", "pending"][i % 3], "profile_image_url": "/user.png",
+        "last_active_at": 1700000000 + i, "updated_at": 1700000000 + i, "created_at": 1700000000 + i,
+        "api_key": None, "settings": None, "info": None, "oauth_sub": None
+    } for i in range(count)])
+
+def retained_bytes(text, decode):
+    '''
+    Bytes still allocated once the response is decoded and its JSON text dropped
+    '''
+    gc.collect()
+    tracemalloc.start()
+    objects = [decode(item) for item in json.loads(text)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, objects
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--count', type=int, default=20000)
+    args = parser.parse_args()
+
+    for title, text, cls in [
+        ("OpenWebFile", files_json(args.count), OpenWebFile),
+        ("User", users_json(args.count), User),
+    ]:
+        print(f"{title} x {args.count}")
+        before, _ = retained_bytes(text, cls.from_dict)
+        after, _ = retained_bytes(text, cls.Compact.from_dict)
+        print(f"  regular  {before / args.count:8.1f} bytes/object")
+        print(f"  compact  {after / args.count:8.1f} bytes/object  ({1 - after / before:.0%} less)")
+
+if __name__ == '__main__':
+    main()
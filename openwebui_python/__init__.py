@@ -1,3 +1,13 @@
-# openwebui_python/__init__.py
 from .openwebui_python import OpenWebUI
-
+from .async_openwebui import AsyncOpenWebUI
+from .retry import RetryPolicy
+from .ratelimit import RateLimiter, RateLimit
+from .balancer import LoadBalancer
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .hedging import HedgingPolicy
+from .cache import MemoryCache, SQLiteCache
+from .codec import JSONCodec, get_codec
+from .catalog import ModelCatalog
+from .uploads import UploadIndex
+from .sync import KnowledgeSync, SyncReport
+from .knowledge_index import KnowledgeIndex
@@ -0,0 +1,755 @@
+# async_openwebui.py
+
+import gzip, asyncio, logging
+from typing import Callable, Optional, Union
+from .models.chat_completion import *
+from .models.model import *
+from .models.files import *
+from .models.knowledge import *
+from .transport import AsyncHTTPTransport, httpx
+from .codec import JSONCodec, get_codec
+from .streaming import AsyncChatCompletionStream, AsyncJSONArrayStream
+from .multipart import MultipartEncoder, UploadSource
+from .uploads import server_hashes
+from .openwebui_python import (OpenWebUI, _decoder, _parse_list, _parse_models, _parse_chat_completion, _parse_file,
+                               _batch_add_outcomes, _error_detail, _text_hash, _file_hashes, _GZIP_MIN_SIZE)
+
+logger = logging.getLogger('OpenWebUI')
+
+# Errors raised by the httpx transport; empty when httpx is not installed
+_HTTP_ERRORS = (httpx.HTTPError,) if httpx is not None else ()
+
+class AsyncOpenWebUI:
+    '''
+    asyncio version of OpenWebUI. Its methods mirror their synchronous counterparts and
+    return the same models. Only the synchronous client has the features that keep state
+    across calls: retries, rate limiting, load balancing, circuit breaking, hedging, the
+    response cache, the model catalog, the knowledge index, lazily loaded file contents,
+    the upload index, upload_files and sync_directory_to_knowledge.
+    '''
+    def __init__(self, base_url: str, api_key: str, max_connections: int = 100,
+                 max_keepalive_connections: int = 20, keepalive_expiry: float = 5.0, timeout=None, transport=None,
+                 compact_models: bool = False, json_codec: Union[str, JSONCodec, None] = None):
+        '''
+        max_connections, max_keepalive_connections, keepalive_expiry and timeout configure the pooled
+        AsyncHTTPTransport. Pass transport to supply your own (anything with async request() and close()).
+        compact_models=True decodes responses into the slotted Compact variants of the models.
+        json_codec serializes request bodies and parses responses, as in OpenWebUI.
+        '''
+        if not base_url:
+            raise ValueError("base_url cannot be empty")
+        if not api_key:
+            raise ValueError("api_key cannot be empty")
+
+        self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Accept": "application/json"
+        }
+        self.transport = transport or AsyncHTTPTransport(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+            timeout=timeout,
+            codec=json_codec
+        )
+        codec = getattr(self.transport, 'codec', None)
+        self.json_codec = codec if isinstance(codec, JSONCodec) else get_codec(json_codec)
+        self.compact_models = compact_models
+        self._knowledge_batch_add = True  # until the server turns out not to have the endpoint
+        self._gzip_requests = True  # until the server rejects a compressed body
+        self._content_hashes = {}  # file id -> hash of the content last sent
+        logger.info(f"Initialized AsyncOpenWebUI client with base URL: {base_url}")
+
+    async def close(self):
+        '''
+        Release the pooled connections held by this client
+        '''
+        await self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _request(self, method: str, path: str, headers: dict = None, **kwargs):
+        '''
+        Send a request to base_url + path through the shared transport
+        '''
+        headers = {**self.headers, **headers} if headers else self.headers
+        return await self.transport.request(method, f"{self.base_url}{path}", headers=headers, **kwargs)
+
+    @staticmethod
+    def _upload_body(encoder: MultipartEncoder) -> dict:
+        '''
+        Request arguments streaming a multipart body; httpx falls back to chunked
+        transfer encoding when no Content-Length is given
+        '''
+        headers = {'Content-Type': encoder.content_type}
+        if encoder.length is not None:
+            headers['Content-Length'] = str(encoder.length)
+        return {'content': encoder.__aiter__(), 'headers': headers}
+
+    async def _stream_chat_completion(self, payload: dict, description: str) -> AsyncChatCompletionStream:
+        '''
+        Send a chat completion request with stream enabled and return the chunk iterator
+        '''
+        payload['stream'] = True
+        payload.setdefault('stream_options', {'include_usage': True})
+        try:
+            response = await self.transport.stream(
+                'POST',
+                f"{self.base_url}/chat/completions",
+                json=payload,
+                headers={**self.headers, "Accept": "text/event-stream"}
+            )
+            if response.is_error:
+                await response.aread()
+                await response.aclose()
+            response.raise_for_status()
+
+            logger.info(f"Streaming {description}")
+            return AsyncChatCompletionStream(response, self.json_codec.loads)
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to get {description}: {str(e)}")
+            raise Exception(f"Failed to get {description}: {str(e)}")
+
+    async def _stream_list(self, path: str, cls, description: str, chunk_size: int) -> AsyncJSONArrayStream:
+        '''
+        Request a listing with the body streamed and return an iterator decoding it item by item
+        '''
+        logger.info(f"Streaming all {description}")
+        try:
+            response = await self.transport.stream('GET', f"{self.base_url}{path}", headers=self.headers)
+            if response.is_error:
+                await response.aread()
+                await response.aclose()
+            response.raise_for_status()
+            return AsyncJSONArrayStream(response, _decoder(cls, self.compact_models), chunk_size)
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch {description}: {str(e)}")
+            raise Exception(f"Failed to fetch {description}: {str(e)}")
+
+    async def _bulk(self, ids: list, action: Callable, max_concurrency: int,
+                    progress_callback: Optional[Callable[[int, int], None]], description: str) -> dict:
+        '''
+        Await action(id) for every distinct id, at most max_concurrency at a time, and return
+        {id: result}. A failing id maps to a ValidationErrorItem instead of aborting the others.
+        '''
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        ids = list(dict.fromkeys(ids))
+        total = len(ids)
+        logger.info(f"Starting {description} of {total} files with concurrency {max_concurrency}")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed = 0
+
+        async def run(id: str):
+            nonlocal completed
+            async with semaphore:
+                try:
+                    result = await action(id)
+                except Exception as e:
+                    result = ValidationErrorItem(success=False, message=str(e))
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+            return result
+
+        results = dict(zip(ids, await asyncio.gather(*[run(id) for id in ids])))
+
+        failed = sum(isinstance(result, ValidationErrorItem) and not result.success for result in results.values())
+        logger.info(f"Finished {description}: {total - failed} succeeded, {failed} failed")
+        return results
+
+    #region MODEL METHODS
+    async def get_models(self, lazy: bool = False) -> list[Model]:
+        '''
+        Gets all of the available models
+        With lazy=True returns a LazyList that decodes each model when it is first accessed.
+        '''
+        logger.info("Fetching available models")
+        try:
+            response = await self._request('GET', "/models")
+            response.raise_for_status()
+
+            models = _parse_models(response.json(), self.compact_models, lazy)
+
+            logger.info(f"Successfully retrieved {len(models)} models")
+            return models
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch models: {str(e)}")
+            raise Exception(f"Failed to fetch models: {str(e)}")
+    #endregion
+
+    #region CHAT METHODS
+    async def get_chat_completion(self, model_id: str, prompt: str, stream: bool = False) -> Union[ChatCompletion, AsyncChatCompletionStream]:
+        '''
+        Gets a basic chat completion from openwebui provided a model_id and prompt.
+        With stream=True returns an AsyncChatCompletionStream of ChatCompletionChunk deltas instead.
+        '''
+        if not model_id:
+            raise ValueError("model_id cannot be empty")
+        if not prompt:
+            raise ValueError("prompt cannot be empty")
+
+        logger.info(f"Requesting chat completion for model: {model_id}")
+        payload = {
+            "model": model_id,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if stream:
+            return await self._stream_chat_completion(payload, "chat completion")
+        try:
+            response = await self._request('POST', "/chat/completions", json=payload)
+            response.raise_for_status()
+
+            completion = _parse_chat_completion(response.json(), self.compact_models)
+
+            logger.info("Successfully received chat completion")
+            return completion
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to get chat completion: {str(e)}")
+            raise Exception(f"Failed to get chat completion: {str(e)}")
+
+    async def get_chat_completion_with_messages(self, model_id: str, messages, stream: bool = False) -> Union[ChatCompletion, AsyncChatCompletionStream]:
+        '''
+        Gets a chat completion for a full message history.
+        With stream=True returns an AsyncChatCompletionStream of ChatCompletionChunk deltas instead.
+        '''
+        if not model_id:
+            raise ValueError("model_id cannot be empty")
+        if not messages or not isinstance(messages, list):
+            raise ValueError("messages must be a non-empty list")
+
+        logger.info(f"Requesting chat completion with messages for model: {model_id}")
+        payload = {
+            "model": model_id,
+            "messages": messages
+        }
+        if stream:
+            return await self._stream_chat_completion(payload, "chat completion with messages")
+        try:
+            response = await self._request('POST', "/chat/completions", json=payload)
+            response.raise_for_status()
+
+            completion = _parse_chat_completion(response.json(), self.compact_models)
+
+            logger.info("Successfully received chat completion with messages")
+            return completion
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to get chat completion with messages: {str(e)}")
+            raise Exception(f"Failed to get chat completion with messages: {str(e)}")
+
+    async def chat_with_file(self, model: str, query: str, file_id: str, stream: bool = False) -> Union[ChatCompletion, AsyncChatCompletionStream]:
+        '''
+        Chat with or about a specific file. Must upload a file or have a file id first.
+        With stream=True returns an AsyncChatCompletionStream of ChatCompletionChunk deltas instead.
+        '''
+        if not model:
+            raise ValueError("model cannot be empty")
+        if not query:
+            raise ValueError("query cannot be empty")
+        if not file_id:
+            raise ValueError("file_id cannot be empty")
+
+        logger.info(f"Requesting chat completion with file {file_id}")
+        payload = {
+            'model': model,
+            'messages': [{'role': 'user', 'content': query}],
+            'files': [{'type': 'file', 'id': file_id}]
+        }
+        if stream:
+            return await self._stream_chat_completion(payload, "chat completion with file")
+        try:
+            response = await self._request('POST', "/chat/completions", json=payload)
+            response.raise_for_status()
+
+            completion = _parse_chat_completion(response.json(), self.compact_models)
+
+            logger.info("Successfully received chat completion with file")
+            return completion
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to get chat completion with file: {str(e)}")
+            raise Exception(f"Failed to get chat completion with file: {str(e)}")
+
+    async def get_chat_completions_batch(self, model_id: str, messages_list: list, max_concurrency: int = 8,
+                                         progress_callback: Optional[Callable[[int, int], None]] = None) -> list[Union[ChatCompletion, ValidationErrorItem]]:
+        '''
+        Run get_chat_completion_with_messages for every message list concurrently, at most max_concurrency
+        at a time. Results come back in input order; a failed item is returned as a ValidationErrorItem
+        instead of aborting the batch. progress_callback(completed, total) is called as each item finishes.
+        '''
+        if not model_id:
+            raise ValueError("model_id cannot be empty")
+        if not isinstance(messages_list, list):
+            raise ValueError("messages_list must be a list")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        total = len(messages_list)
+        logger.info(f"Requesting {total} chat completions for model {model_id} with concurrency {max_concurrency}")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        completed = 0
+
+        async def complete(messages):
+            nonlocal completed
+            async with semaphore:
+                try:
+                    result = await self.get_chat_completion_with_messages(model_id, messages)
+                except Exception as e:
+                    result = ValidationErrorItem(success=False, message=str(e))
+            completed += 1
+            if progress_callback:
+                progress_callback(completed, total)
+            return result
+
+        results = await asyncio.gather(*[complete(messages) for messages in messages_list])
+
+        failed = sum(isinstance(result, ValidationErrorItem) for result in results)
+        logger.info(f"Finished chat completion batch: {total - failed} succeeded, {failed} failed")
+        return results
+    #endregion
+
+    #region FILE METHODS
+    async def get_files(self, lazy: bool = False) -> list[OpenWebFile]:
+        '''
+        Get all of the files!
+        With lazy=True returns a LazyList that decodes each file, and its data and meta,
+        only when they are first accessed.
+        '''
+        logger.info("Fetching all files")
+        try:
+            response = await self._request('GET', "/v1/files")
+            response.raise_for_status()
+
+            files = _parse_list(response.json(), OpenWebFile, self.compact_models, lazy)
+
+            logger.info(f"Successfully retrieved {len(files)} files")
+            return files
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch files: {str(e)}")
+            raise Exception(f"Failed to fetch files: {str(e)}")
+
+    async def iter_files(self, chunk_size: int = 65536) -> AsyncJSONArrayStream:
+        '''
+        Iterate over all files, decoding them one at a time while the response is read so
+        memory stays bounded. Close the iterator (or use it in an async with block) to stop early.
+        '''
+        return await self._stream_list("/v1/files", OpenWebFile, "files", chunk_size)
+
+    async def get_file_by_id(self, id: str) -> OpenWebFile:
+        '''
+        Get a single file by id
+        '''
+        if not id:
+            raise ValueError("id cannot be empty")
+
+        logger.info(f"Fetching file with id: {id}")
+        try:
+            response = await self._request('GET', f"/v1/files/{id}")
+            response.raise_for_status()
+
+            file = _parse_file(response.json(), self.compact_models)
+
+            logger.info(f"Successfully retrieved file: {file.filename or id}")
+            return file
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch file {id}: {str(e)}")
+            raise Exception(f"Failed to fetch file {id}: {str(e)}")
+
+    async def delete_file_by_id(self, id: str) -> ValidationErrorItem:
+        '''
+        Delete a single file by id
+        '''
+        if not id:
+            raise ValueError("id cannot be empty")
+
+        logger.info(f"Deleting file with id: {id}")
+        try:
+            response = await self._request('DELETE', f"/v1/files/{id}")
+            data = response.json()
+
+            if response.status_code == 200:
+                data['success'] = True
+                logger.info(f"Successfully deleted file: {id}")
+            else:
+                data['success'] = False
+                data['message'] = data.get('detail', 'Unknown error occurred')
+                logger.warning(f"Failed to delete file {id}: {data['message']}")
+
+            return ValidationErrorItem.from_dict(data)
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to delete file {id}: {str(e)}")
+            raise Exception(f"Failed to delete file {id}: {str(e)}")
+
+    async def get_files_by_ids(self, ids: list, max_concurrency: int = 8,
+                               progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        get_file_by_id for many ids concurrently, at most max_concurrency at a time.
+        Returns {id: OpenWebFile or ValidationErrorItem}; cancel the awaiting task to stop.
+        '''
+        return await self._bulk(ids, self.get_file_by_id, max_concurrency, progress_callback, "bulk fetch")
+
+    async def delete_files(self, ids: list, max_concurrency: int = 8,
+                           progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        delete_file_by_id for many ids concurrently, at most max_concurrency at a time.
+        Returns {id: ValidationErrorItem}; cancel the awaiting task to stop.
+        '''
+        return await self._bulk(ids, self.delete_file_by_id, max_concurrency, progress_callback, "bulk delete")
+
+    async def update_file_content_by_id(self, id: str, new_content: str, skip_unchanged: bool = False,
+                                        compress: bool = False) -> ValidationErrorItem:
+        '''
+        Update file content by id
+        skip_unchanged and compress work as in OpenWebUI.update_file_content_by_id.
+        '''
+        return await self._update_file_content(id, new_content, skip_unchanged, compress, None)
+
+    async def update_file_contents(self, contents: dict, max_concurrency: int = 8, skip_unchanged: bool = True,
+                                   compress: bool = False,
+                                   progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        update_file_content_by_id for many files ({id: new_content}) concurrently, returning
+        {id: ValidationErrorItem}; cancel the awaiting task to stop. See OpenWebUI.update_file_contents.
+        '''
+        if not isinstance(contents, dict):
+            raise ValueError("contents must be a dict")
+        listed = None
+        if skip_unchanged and sum(self._content_hashes.get(id) is None for id in contents) > 1:
+            # One listing is cheaper than fetching every file to read its hash
+            try:
+                response = await self._request('GET', "/v1/files", params={'content': 'false'})
+                response.raise_for_status()
+                listed = {item.get('id'): server_hashes(item.get('hash')) for item in response.json()}
+            except _HTTP_ERRORS as e:
+                logger.error(f"Failed to fetch files: {str(e)}")
+                raise Exception(f"Failed to fetch files: {str(e)}")
+
+        async def update(id: str) -> ValidationErrorItem:
+            hashes = None if listed is None else listed.get(id, [])
+            return await self._update_file_content(id, contents[id], skip_unchanged, compress, hashes)
+
+        return await self._bulk(list(contents), update, max_concurrency, progress_callback, "bulk content update")
+
+    async def _update_file_content(self, id: str, new_content: str, skip_unchanged: bool, compress: bool,
+                                   listed_hashes: Optional[list]) -> ValidationErrorItem:
+        '''
+        Update a file's content; listed_hashes are its hashes from a listing, None when not looked up
+        '''
+        if not id:
+            raise ValueError("id cannot be empty")
+        if new_content is None:  # Allow empty string but not None
+            raise ValueError("new_content cannot be None")
+
+        try:
+            digest = _text_hash(new_content)
+            if skip_unchanged and digest in await self._known_content_hashes(id, listed_hashes):
+                logger.info(f"Content of file {id} is unchanged, skipping the update")
+                return ValidationErrorItem(success=True, message="Content unchanged")
+
+            logger.info(f"Updating content for file with id: {id}")
+            response = await self._post_file_content(id, new_content, compress)
+
+            data = response.json()
+
+            if response.status_code == 200:
+                data['success'] = True
+                self._content_hashes[id] = digest
+                logger.info(f"Successfully updated file content: {id}")
+            else:
+                data['success'] = False
+                data['message'] = data.get('detail', 'Unknown error occurred')
+                logger.warning(f"Failed to update file {id}: {data['message']}")
+
+            return ValidationErrorItem.from_dict(data)
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to update file {id}: {str(e)}")
+            raise Exception(f"Failed to update file {id}: {str(e)}")
+
+    async def _known_content_hashes(self, id: str, listed: Optional[list]) -> set:
+        '''
+        SHA-256 hashes of what the server holds for a file: the content this client last sent,
+        else the listed hashes, else what GET /v1/files/{id} reports
+        '''
+        known = self._content_hashes.get(id)
+        if known is not None:
+            return {known}
+        if listed is not None:
+            return set(listed)
+
+        response = await self._request('GET', f"/v1/files/{id}")
+        response.raise_for_status()
+        return _file_hashes(response.json())
+
+    async def _post_file_content(self, id: str, new_content: str, compress: bool):
+        path = f"/v1/files/{id}/data/content/update"
+        payload = {
+            'content': new_content
+        }
+        if compress and self._gzip_requests:
+            body = self.json_codec.dumps(payload)
+            if len(body) >= _GZIP_MIN_SIZE:
+                response = await self._request('POST', path, content=gzip.compress(body, compresslevel=6),
+                                               headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+                if response.status_code not in (400, 415, 422):
+                    return response
+                await response.aclose()
+                plain = await self._request('POST', path, json=payload)
+                if plain.status_code == 200:
+                    logger.info("Server does not accept gzip-compressed requests, sending them uncompressed")
+                    self._gzip_requests = False
+                return plain
+        return await self._request('POST', path, json=payload)
+
+    async def upload_file(self, file_path: UploadSource, filename: Optional[str] = None,
+                          progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                          chunk_size: int = 65536):
+        '''
+        Upload a file
+        file_path may also be bytes, a memoryview or a binary file-like object (name it with filename).
+        The body is streamed chunk_size bytes at a time; progress_callback(sent, total) follows it.
+        '''
+        encoder = OpenWebUI._multipart(file_path, filename, progress_callback, chunk_size, "file_path", "File")
+        description = encoder.path or encoder.filename
+
+        logger.info(f"Uploading file: {description}")
+        try:
+            response = await self._request('POST', "/v1/files/", **self._upload_body(encoder))
+
+            data = response.json()
+
+            if response.status_code == 200:
+                data['success'] = True
+                logger.info(f"Successfully uploaded file: {encoder.filename}")
+                return _parse_file(data, self.compact_models)
+            else:
+                data['success'] = False
+                data['message'] = data.get('detail', 'Unknown error occurred')
+                logger.warning(f"Failed to upload file {description}: {data['message']}")
+                return ValidationErrorItem.from_dict(data)
+        except Exception as e:
+            logger.error(f"Failed to upload file {description}: {str(e)}")
+            raise Exception(f"Failed to upload file {description}: {str(e)}")
+    #endregion
+
+    #region KNOWLEDGE METHODS
+    async def get_knowledge(self, lazy: bool = False) -> list[Knowledge]:
+        '''
+        Get all knowledge items
+        With lazy=True returns a LazyList that decodes each item, and its files, only when first accessed.
+        '''
+        logger.info("Fetching all knowledge items")
+        try:
+            response = await self._request('GET', "/v1/knowledge")
+            response.raise_for_status()
+
+            knowledges = _parse_list(response.json(), Knowledge, self.compact_models, lazy)
+
+            logger.info(f"Successfully retrieved {len(knowledges)} knowledge items")
+            return knowledges
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch knowledge items: {str(e)}")
+            raise Exception(f"Failed to fetch knowledge items: {str(e)}")
+
+    async def iter_knowledge(self, chunk_size: int = 65536) -> AsyncJSONArrayStream:
+        '''
+        Iterate over all knowledge items, decoded one at a time while the response is read
+        '''
+        return await self._stream_list("/v1/knowledge", Knowledge, "knowledge items", chunk_size)
+
+    async def get_knowledge_by_id(self, id: str):
+        '''
+        Get a single knowledge item by id
+        '''
+        if not id:
+            raise ValueError("id cannot be empty")
+
+        logger.info(f"Fetching knowledge item with id: {id}")
+        try:
+            response = await self._request('GET', f"/v1/knowledge/{id}")
+            data = response.json()
+
+            if response.status_code == 200:
+                logger.info(f"Successfully retrieved knowledge item: {id}")
+                return _decoder(Knowledge, self.compact_models)(data)
+            else:
+                data['success'] = False
+                logger.warning(f"Failed to fetch knowledge item {id}: {data.get('detail', 'Unknown error')}")
+                return ValidationErrorItem.from_dict(data)
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch knowledge item {id}: {str(e)}")
+            raise Exception(f"Failed to fetch knowledge item {id}: {str(e)}")
+
+    async def add_remove_file_to_knowledge(self, knowledge_id: str, file_id: str, addRemove: bool):
+        '''
+        Add or remove a file to a knowledge item
+        '''
+        if not knowledge_id:
+            raise ValueError("knowledge_id cannot be empty")
+        if not file_id:
+            raise ValueError("file_id cannot be empty")
+
+        action = "Adding" if addRemove else "Removing"
+        logger.info(f"{action} file {file_id} to/from knowledge item {knowledge_id}")
+
+        try:
+            payload = {'file_id': file_id}
+            path = f"/v1/knowledge/{knowledge_id}/file/{'add' if addRemove else 'remove'}"
+
+            response = await self._request('POST', path, json=payload)
+            data = response.json()
+
+            if response.status_code == 200:
+                logger.info(f"Successfully {action.lower()}ed file {file_id} {'to' if addRemove else 'from'} knowledge item {knowledge_id}")
+                return _decoder(Knowledge, self.compact_models)(data)
+            else:
+                data['success'] = False
+                data['message'] = data.get('detail', 'Unknown error occurred')
+                logger.warning(f"Failed to {action.lower()} file: {data['message']}")
+                return ValidationErrorItem.from_dict(data)
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to {action.lower()} file: {str(e)}")
+            raise Exception(f"Failed to {action.lower()} file: {str(e)}")
+
+    async def add_files_to_knowledge(self, knowledge_id: str, file_ids: list, max_concurrency: int = 8,
+                                     batch_size: int = 100) -> KnowledgeFilesResult:
+        '''
+        Add many files to a knowledge item and return one summary, batch_size files per request
+        (see OpenWebUI.add_files_to_knowledge)
+        '''
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        return await self._change_knowledge_files(knowledge_id, file_ids, True, max_concurrency, batch_size)
+
+    async def remove_files_from_knowledge(self, knowledge_id: str, file_ids: list,
+                                          max_concurrency: int = 8) -> KnowledgeFilesResult:
+        '''
+        Remove many files from a knowledge item with concurrent per-file calls and return one summary
+        '''
+        return await self._change_knowledge_files(knowledge_id, file_ids, False, max_concurrency, None)
+
+    async def _change_knowledge_files(self, knowledge_id: str, file_ids: list, add: bool, max_concurrency: int,
+                                      batch_size: Optional[int]) -> KnowledgeFilesResult:
+        if not knowledge_id:
+            raise ValueError("knowledge_id cannot be empty")
+        if not isinstance(file_ids, list):
+            raise ValueError("file_ids must be a list")
+
+        file_ids = list(dict.fromkeys(file_ids))
+        result = KnowledgeFilesResult(knowledge_id=knowledge_id)
+        pending = file_ids
+        if add and self._knowledge_batch_add:
+            pending = []
+            for start in range(0, len(file_ids), batch_size):
+                outcomes = await self._batch_add_to_knowledge(knowledge_id, file_ids[start:start + batch_size])
+                if outcomes is None:
+                    pending = file_ids[start:]
+                    break
+                for file_id, error in outcomes.items():
+                    if error is None:
+                        result.succeeded.append(file_id)
+                    else:
+                        result.failed[file_id] = error
+
+        if pending:
+            description = "adding files to knowledge" if add else "removing files from knowledge"
+            outcomes = await self._bulk(pending, lambda file_id: self._change_knowledge_file(knowledge_id, file_id, add),
+                                        max_concurrency, None, description)
+            for file_id, outcome in outcomes.items():
+                if outcome.success:
+                    result.succeeded.append(file_id)
+                else:
+                    result.failed[file_id] = outcome.message
+
+        logger.info(f"{'Added' if add else 'Removed'} {len(result.succeeded)} files "
+                    f"{'to' if add else 'from'} knowledge item {knowledge_id}, {len(result.failed)} failed")
+        return result
+
+    async def _batch_add_to_knowledge(self, knowledge_id: str, file_ids: list) -> Optional[dict]:
+        '''
+        Add a batch of files in one request: {file_id: error or None}, or None to add them one by one
+        '''
+        response = await self._request('POST', f"/v1/knowledge/{knowledge_id}/files/batch/add",
+                                       json=[{'file_id': file_id} for file_id in file_ids])
+        try:
+            data = response.json()
+        except (ValueError, *_HTTP_ERRORS):
+            data = {}
+        outcomes, endpoint_missing = _batch_add_outcomes(response.status_code, data, file_ids)
+        if endpoint_missing:
+            logger.info("Server has no batch endpoint for knowledge files, adding them one by one")
+            self._knowledge_batch_add = False
+        return outcomes
+
+    async def _change_knowledge_file(self, knowledge_id: str, file_id: str, add: bool) -> ValidationErrorItem:
+        '''
+        add_remove_file_to_knowledge without decoding the returned Knowledge
+        '''
+        if not file_id:
+            raise ValueError("file_id cannot be empty")
+        response = await self._request('POST', f"/v1/knowledge/{knowledge_id}/file/{'add' if add else 'remove'}",
+                                       json={'file_id': file_id})
+        if response.status_code == 200:
+            return ValidationErrorItem(success=True)
+        return ValidationErrorItem(success=False, message=_error_detail(response))
+    #endregion
+
+    #region USER METHODS
+    async def get_users(self, lazy: bool = False) -> list[User]:
+        '''
+        Get all users
+        With lazy=True returns a LazyList that decodes each user when it is first accessed.
+        '''
+        logger.info("Fetching all users")
+        try:
+            response = await self._request('GET', "/v1/users/")
+            response.raise_for_status()
+
+            users = _parse_list(response.json(), User, self.compact_models, lazy)
+
+            logger.info(f"Successfully retrieved {len(users)} users")
+            return users
+        except _HTTP_ERRORS as e:
+            logger.error(f"Failed to fetch users: {str(e)}")
+            raise Exception(f"Failed to fetch users: {str(e)}")
+
+    async def iter_users(self, chunk_size: int = 65536) -> AsyncJSONArrayStream:
+        '''
+        Iterate over all users, decoded one at a time while the response is read
+        '''
+        return await self._stream_list("/v1/users/", User, "users", chunk_size)
+
+    #endregion
+
+    #region AUDIO METHODS
+    async def transcribe_audio(self, audio_file_path: UploadSource, filename: Optional[str] = None,
+                               progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                               chunk_size: int = 65536):
+        '''
+        Transcribe audio file
+        audio_file_path may also be bytes, a memoryview or a binary file-like object, streamed as in upload_file.
+        '''
+        encoder = OpenWebUI._multipart(audio_file_path, filename, progress_callback, chunk_size,
+                                       "audio_file_path", "Audio file")
+
+        logger.info(f"Transcribing audio file: {encoder.path or encoder.filename}")
+        try:
+            response = await self._request('POST', "/audio/api/v1/transcriptions", **self._upload_body(encoder))
+
+            if response.status_code == 200:
+                logger.info("Successfully transcribed audio file")
+                return response.json()
+            else:
+                error_msg = f"Failed to transcribe audio: {response.text}"
+                logger.error(error_msg)
+                return {"error": error_msg}
+        except Exception as e:
+            logger.error(f"Failed to transcribe audio file: {str(e)}")
+            raise Exception(f"Failed to transcribe audio file: {str(e)}")
+    #endregion
@@ -0,0 +1,140 @@
+# balancer.py
+
+import itertools
+import threading
+import time
+from typing import List, Optional, Union
+
+class Replica:
+    '''
+    One OpenWebUI base URL and its passively observed health
+    '''
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
+        self.outstanding = 0
+        self.latency_ewma = None
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def stats(self) -> dict:
+        return {
+            'outstanding': self.outstanding,
+            'latency_ewma': self.latency_ewma,
+            'requests': self.requests,
+            'failures': self.failures,
+            'ejected': self.ejected_until > time.monotonic()
+        }
+
+class Strategy:
+    '''
+    Picks the replica for the next request out of the available ones
+    '''
+    def select(self, replicas: List[Replica]) -> Replica:
+        raise NotImplementedError
+
+class RoundRobin(Strategy):
+    def __init__(self):
+        self._counter = itertools.count()
+
+    def select(self, replicas: List[Replica]) -> Replica:
+        return replicas[next(self._counter) % len(replicas)]
+
+class LeastOutstanding(Strategy):
+    def select(self, replicas: List[Replica]) -> Replica:
+        return min(replicas, key=lambda replica: replica.outstanding)
+
+class LatencyEWMA(Strategy):
+    '''
+    Lowest expected wait: latency EWMA scaled by the requests already queued on
+    the replica. Replicas without a measurement yet are tried first.
+    '''
+    def select(self, replicas: List[Replica]) -> Replica:
+        return min(replicas, key=lambda replica: (replica.latency_ewma or 0.0) * (replica.outstanding + 1))
+
+STRATEGIES = {
+    'round_robin': RoundRobin,
+    'least_outstanding': LeastOutstanding,
+    'ewma': LatencyEWMA
+}
+
+class LoadBalancer:
+    '''
+    Spreads requests over several OpenWebUI replicas.
+
+    A replica that fails failure_threshold requests in a row (connection errors
+    or 5xx responses) is ejected for ejection_time seconds, then gets traffic
+    again. If every replica is ejected the least recently ejected one is used.
+    '''
+    def __init__(self, base_urls: List[str], strategy: Union[str, Strategy] = 'round_robin',
+                 failure_threshold: int = 3, ejection_time: float = 30.0, ewma_decay: float = 0.3):
+        if not base_urls:
+            raise ValueError("base_urls cannot be empty")
+        if isinstance(strategy, str):
+            if strategy not in STRATEGIES:
+                raise ValueError(f"Unknown load balancing strategy: {strategy}")
+            strategy = STRATEGIES[strategy]()
+
+        self.replicas = [Replica(url) for url in base_urls]
+        self.strategy = strategy
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self.ewma_decay = ewma_decay
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude=()) -> Replica:
+        '''
+        Choose a replica, skipping ejected ones and those in exclude when possible
+        '''
+        with self._lock:
+            now = time.monotonic()
+            candidates = [r for r in self.replicas if r.is_available(now) and r not in exclude]
+            if not candidates:
+                candidates = [r for r in self.replicas if r not in exclude] or self.replicas
+                candidates = [min(candidates, key=lambda replica: replica.ejected_until)]
+            replica = candidates[0] if len(candidates) == 1 else self.strategy.select(candidates)
+            replica.outstanding += 1
+            replica.requests += 1
+            return replica
+
+    def release(self, replica: Replica, healthy: bool, latency: Optional[float] = None):
+        '''
+        Record the outcome of a request sent to replica
+        '''
+        with self._lock:
+            replica.outstanding -= 1
+            if healthy:
+                replica.consecutive_failures = 0
+                if latency is not None:
+                    replica.latency_ewma = latency if replica.latency_ewma is None else \
+                        (1 - self.ewma_decay) * replica.latency_ewma + self.ewma_decay * latency
+                return
+            replica.failures += 1
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self.failure_threshold:
+                replica.ejected_until = time.monotonic() + self.ejection_time
+                replica.consecutive_failures = 0
+
+    def can_fail_over(self, tried) -> bool:
+        '''
+        Whether an available replica outside tried is left
+        '''
+        with self._lock:
+            now = time.monotonic()
+            return any(r.is_available(now) and r not in tried for r in self.replicas)
+
+    def record_failover(self):
+        with self._lock:
+            self.failovers += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'failovers': self.failovers,
+                'replicas': {replica.base_url: replica.stats() for replica in self.replicas}
+            }
@@ -0,0 +1,130 @@
+# catalog.py
+
+from typing import Callable, Dict, List, Optional, Tuple
+try:
+    from .refresh import StaleWhileRevalidate
+except ImportError:  # running openwebui_python.py as a script
+    from refresh import StaleWhileRevalidate
+
+def _field(obj, name):
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+def _price(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+class CatalogEntry:
+    '''
+    A model plus the fields the catalog filters on, computed once per refresh
+    '''
+    __slots__ = ('model', 'id', 'owned_by', 'context_length', 'prompt_price', 'completion_price', 'family')
+
+    def __init__(self, model):
+        openai = _field(model, 'openai')
+        self.model = model
+        self.id = model.id
+        self.owned_by = model.owned_by or _field(openai, 'owned_by')
+        self.context_length = (
+            model.context_length
+            or _field(openai, 'context_length')
+            or _field(_field(model, 'top_provider') or _field(openai, 'top_provider'), 'context_length')
+        )
+        pricing = model.pricing or _field(openai, 'pricing')
+        self.prompt_price = _price(_field(pricing, 'prompt'))
+        self.completion_price = _price(_field(pricing, 'completion'))
+        self.family = _field(_field(_field(model, 'ollama'), 'details'), 'family')
+
+class ModelCatalog(StaleWhileRevalidate):
+    '''
+    Cached /models listing with an index by id.
+
+    load(validators) fetches the listing; validators holds the ETag / Last-Modified of the
+    previous response and load returns (models, validators), with models None when the
+    server answered 304 Not Modified. The first lookup loads synchronously; afterwards,
+    once the listing is older than ttl seconds, lookups keep answering from the cached
+    listing while a background thread revalidates it.
+    '''
+    _description = 'model catalog'
+    _thread_name = 'openwebui-catalog'
+
+    def __init__(self, load: Callable[[dict], Tuple[Optional[list], dict]], ttl: float = 300.0, retry_interval: float = 10.0):
+        super().__init__(ttl, retry_interval)
+        self.refreshes = 0
+        self.not_modified = 0
+        self._load = load
+        self._entries: Dict[str, CatalogEntry] = {}
+        self._validators = {}
+
+    def _fetch(self):
+        with self._lock:
+            validators = self._validators if self._entries else {}
+        models, validators = self._load(validators)
+        # Build the new index aside, it is swapped in by _install
+        return None if models is None else {model.id: CatalogEntry(model) for model in models}, validators
+
+    def _install(self, state):
+        entries, self._validators = state
+        if entries is None:
+            self.not_modified += 1
+        else:
+            self._entries = entries
+            self.refreshes += 1
+
+    def _snapshot(self) -> Dict[str, CatalogEntry]:
+        return self._entries
+
+    def get(self, model_id: str):
+        '''
+        The model with this id, or None
+        '''
+        entry = self._current().get(model_id)
+        return entry.model if entry else None
+
+    def __contains__(self, model_id: str) -> bool:
+        return model_id in self._current()
+
+    def __len__(self) -> int:
+        return len(self._current())
+
+    def models(self) -> list:
+        return [entry.model for entry in self._current().values()]
+
+    def filter(self, owned_by: Optional[str] = None, family: Optional[str] = None,
+               min_context_length: Optional[int] = None, max_prompt_price: Optional[float] = None,
+               max_completion_price: Optional[float] = None,
+               predicate: Optional[Callable[[CatalogEntry], bool]] = None) -> List:
+        '''
+        Models matching every given criterion. Models without a known context length or
+        price do not match a criterion on it.
+        '''
+        matches = []
+        for entry in self._current().values():
+            if owned_by is not None and entry.owned_by != owned_by:
+                continue
+            if family is not None and entry.family != family:
+                continue
+            if min_context_length is not None and (entry.context_length or 0) < min_context_length:
+                continue
+            if max_prompt_price is not None and (entry.prompt_price is None or entry.prompt_price > max_prompt_price):
+                continue
+            if max_completion_price is not None and (entry.completion_price is None or entry.completion_price > max_completion_price):
+                continue
+            if predicate is not None and not predicate(entry):
+                continue
+            matches.append(entry.model)
+        return matches
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'models': len(self._entries),
+                'refreshes': self.refreshes,
+                'not_modified': self.not_modified,
+                'errors': self.errors
+            }
@@ -0,0 +1,163 @@
+# circuit_breaker.py
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# OpenWebUI ids are UUIDs; collapse them so /v1/files/<id> shares one circuit
+_ID_SEGMENT = re.compile(r'/[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}(?=/|$)')
+
+class CircuitOpenError(Exception):
+    '''
+    Raised instead of sending a request while its circuit is open
+    '''
+    def __init__(self, endpoint: str, model_id: Optional[str], retry_after: float):
+        self.endpoint = endpoint
+        self.model_id = model_id
+        self.retry_after = retry_after
+        target = f"{endpoint} ({model_id})" if model_id else endpoint
+        super().__init__(f"Circuit open for {target}, retry in {retry_after:.1f}s")
+
+class _Circuit:
+    def __init__(self, window_size: int):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window_size)
+        self.opened_at = 0.0
+        self.trials = 0
+        self.trial_successes = 0
+        self.times_opened = 0
+        self.rejected = 0
+
+    def failure_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+class CircuitBreaker:
+    '''
+    Fails calls fast while an endpoint/model pair is unhealthy.
+
+    Each (endpoint, model_id) pair has its own circuit. A closed circuit opens when at
+    least minimum_calls of its last window_size calls were made and the share of
+    failures (connection errors, timeouts, 5xx) reaches failure_rate_threshold. An open
+    circuit rejects calls with CircuitOpenError for open_duration seconds, then lets
+    half_open_max_calls trial calls through: if they all succeed it closes, any failure
+    opens it again. on_state_change(endpoint, model_id, old_state, new_state) is called
+    on every transition.
+    '''
+    def __init__(self, failure_rate_threshold: float = 0.5, minimum_calls: int = 10, window_size: int = 20,
+                 open_duration: float = 30.0, half_open_max_calls: int = 1,
+                 on_state_change: Optional[Callable[[str, Optional[str], str, str], None]] = None):
+        if not 0 < failure_rate_threshold <= 1:
+            raise ValueError("failure_rate_threshold must be between 0 and 1")
+        if minimum_calls > window_size:
+            raise ValueError("minimum_calls cannot exceed window_size")
+
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_size = window_size
+        self.open_duration = open_duration
+        self.half_open_max_calls = half_open_max_calls
+        self.on_state_change = on_state_change
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path: str, model_id: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        return _ID_SEGMENT.sub('/{id}', path), model_id
+
+    def _transition(self, circuit: _Circuit, state: str):
+        old_state, circuit.state = circuit.state, state
+        if state == OPEN:
+            circuit.opened_at = time.monotonic()
+            circuit.times_opened += 1
+        elif state == HALF_OPEN:
+            circuit.trials = 0
+            circuit.trial_successes = 0
+        else:
+            circuit.outcomes.clear()
+        return old_state
+
+    def _notify(self, key, old_state: str, new_state: str):
+        if self.on_state_change and old_state != new_state:
+            self.on_state_change(key[0], key[1], old_state, new_state)
+
+    def before_call(self, path: str, model_id: Optional[str] = None):
+        '''
+        Admit a call or raise CircuitOpenError; returns the key to pass to record()
+        '''
+        key = self.key(path, model_id)
+        transition = None
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                circuit = self._circuits[key] = _Circuit(self.window_size)
+            if circuit.state == OPEN:
+                remaining = circuit.opened_at + self.open_duration - time.monotonic()
+                if remaining > 0:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(key[0], model_id, remaining)
+                transition = (self._transition(circuit, HALF_OPEN), HALF_OPEN)
+            if circuit.state == HALF_OPEN:
+                if circuit.trials >= self.half_open_max_calls:
+                    circuit.rejected += 1
+                    raise CircuitOpenError(key[0], model_id, 0.0)
+                circuit.trials += 1
+        if transition:
+            self._notify(key, *transition)
+        return key
+
+    def cancel(self, key):
+        '''
+        Give back the admission of a call that was never sent, recording no outcome
+        '''
+        with self._lock:
+            circuit = self._circuits[key]
+            if circuit.state == HALF_OPEN and circuit.trials > 0:
+                circuit.trials -= 1
+
+    def record(self, key, success: bool):
+        '''
+        Record the outcome of a call admitted by before_call()
+        '''
+        transition = None
+        with self._lock:
+            circuit = self._circuits[key]
+            if circuit.state == HALF_OPEN:
+                if not success:
+                    transition = (self._transition(circuit, OPEN), OPEN)
+                else:
+                    circuit.trial_successes += 1
+                    if circuit.trial_successes >= self.half_open_max_calls:
+                        transition = (self._transition(circuit, CLOSED), CLOSED)
+            elif circuit.state == CLOSED:
+                circuit.outcomes.append(success)
+                if len(circuit.outcomes) >= self.minimum_calls and circuit.failure_rate() >= self.failure_rate_threshold:
+                    transition = (self._transition(circuit, OPEN), OPEN)
+        if transition:
+            self._notify(key, *transition)
+
+    def state(self, path: str, model_id: Optional[str] = None) -> str:
+        with self._lock:
+            circuit = self._circuits.get(self.key(path, model_id))
+            return circuit.state if circuit else CLOSED
+
+    def stats(self) -> dict:
+        '''
+        State and counters of every circuit seen so far, keyed by "endpoint" or "endpoint|model_id"
+        '''
+        with self._lock:
+            return {
+                f"{endpoint}|{model_id}" if model_id else endpoint: {
+                    'state': circuit.state,
+                    'failure_rate': circuit.failure_rate(),
+                    'calls': len(circuit.outcomes),
+                    'times_opened': circuit.times_opened,
+                    'rejected': circuit.rejected
+                }
+                for (endpoint, model_id), circuit in self._circuits.items()
+            }
@@ -0,0 +1,99 @@
+# codec.py
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is an optional, faster backend
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec is an optional, faster backend
+    msgspec = None
+
+class JSONCodec:
+    '''
+    Serializes request bodies and parses response bodies. dumps returns UTF-8 encoded
+    JSON, loads accepts bytes or str. This base codec uses the standard library.
+    '''
+    name = 'json'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+class OrjsonCodec(JSONCodec):
+    '''
+    orjson backend. Bodies orjson cannot encode, such as integers wider than 64 bits,
+    are encoded by the standard library instead, so any body JSONCodec accepts works.
+    '''
+    name = 'orjson'
+
+    def __init__(self):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson: pip install openwebui_python[fast]")
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            # Non-str keys (e.g. logit_bias={50256: -100}) are converted to strings, as json.dumps does
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+class MsgspecCodec(JSONCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        if msgspec is None:
+            raise ImportError("MsgspecCodec requires msgspec: pip install msgspec")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            return self._encoder.encode(obj)
+        except (TypeError, OverflowError):
+            return super().dumps(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+CODECS = {'json': JSONCodec, 'orjson': OrjsonCodec, 'msgspec': MsgspecCodec}
+
+def get_codec(codec: Union[str, JSONCodec, None] = None) -> JSONCodec:
+    '''
+    A codec by name ('json', 'orjson' or 'msgspec'), or the fastest one installed for
+    None / 'auto': orjson, then msgspec, then the standard library
+    '''
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None or codec == 'auto':
+        if orjson is not None:
+            return OrjsonCodec()
+        if msgspec is not None:
+            return MsgspecCodec()
+        return JSONCodec()
+    if codec not in CODECS:
+        raise ValueError(f"Unknown JSON codec {codec!r}, expected one of {', '.join(CODECS)}")
+    return CODECS[codec]()
+
+def encode_json_body(codec: JSONCodec, kwargs: dict, body_argument: str = 'data') -> dict:
+    '''
+    Replace a json= request argument by the body serialized with codec, passed as body_argument
+    '''
+    if kwargs.get('json') is None:
+        return kwargs
+    kwargs = dict(kwargs)
+    kwargs[body_argument] = codec.dumps(kwargs.pop('json'))
+    kwargs['headers'] = {**(kwargs.get('headers') or {}), 'Content-Type': 'application/json'}
+    return kwargs
@@ -0,0 +1,112 @@
+# content.py
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Optional, Union
+try:
+    from .models.files import FileData
+    from .cache import CacheBackend, MemoryCache
+except ImportError:  # running openwebui_python.py as a script
+    from models.files import FileData
+    from cache import CacheBackend, MemoryCache
+
+class FileContentLoader:
+    '''
+    Fetches extracted file contents on demand with fetch(file_id), keeping them in a cache
+    (a MemoryCache bounded to 1024 entries / 64 MiB by default). Concurrent requests for
+    the same file share one fetch; get_many() fetches up to max_concurrency files at once.
+    A failed fetch is not cached, so the next request for that file tries again.
+    '''
+    def __init__(self, fetch: Callable[[str], Optional[str]], max_concurrency: int = 8,
+                 cache: Optional[CacheBackend] = None):
+        self.fetch = fetch
+        self.max_concurrency = max_concurrency
+        self.cache = cache if cache is not None else MemoryCache(max_entries=1024, max_bytes=64 * 1024 * 1024)
+        self._in_flight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, file_id: str) -> Optional[str]:
+        content = self.get_many([file_id])[file_id]
+        if isinstance(content, Exception):
+            raise content
+        return content
+
+    def get_many(self, file_ids: Iterable[str],
+                 max_concurrency: Optional[int] = None) -> Dict[str, Union[str, None, Exception]]:
+        '''
+        Contents of file_ids, fetching the ones not cached concurrently. A file whose fetch
+        failed maps to the exception raised; the others are returned (and cached) regardless.
+        '''
+        results = {}
+        owned = {}
+        waiting = {}
+        with self._lock:
+            for file_id in dict.fromkeys(file_ids):
+                content = self.cache.get(file_id)
+                if content is not None:
+                    results[file_id] = content
+                elif file_id in self._in_flight:
+                    waiting[file_id] = self._in_flight[file_id]
+                else:
+                    owned[file_id] = self._in_flight[file_id] = Future()
+
+        if len(owned) == 1:
+            self._load(*next(iter(owned.items())))
+        elif owned:
+            workers = min(max_concurrency or self.max_concurrency, len(owned))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='openwebui-content') as executor:
+                for file_id, future in owned.items():
+                    executor.submit(self._load, file_id, future)
+
+        for file_id, future in {**owned, **waiting}.items():
+            error = future.exception()
+            if error is not None and not isinstance(error, Exception):
+                raise error  # KeyboardInterrupt and the like abort the whole call
+            results[file_id] = future.result() if error is None else error
+        return results
+
+    def _load(self, file_id: str, future: Future):
+        try:
+            content = self.fetch(file_id)
+            if content is not None:
+                self.cache.set(file_id, content)
+            future.set_result(content)
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight.pop(file_id, None)
+
+    def invalidate(self, file_id: str):
+        '''
+        Forget the cached content of a file that was updated or deleted
+        '''
+        self.cache.delete(file_id)
+
+class RemoteFileData(FileData):
+    '''
+    FileData of a file listed without its content: content is fetched through the
+    FileContentLoader the first time it is read, then kept on the object.
+    '''
+    def __init__(self, file_id: str, loader: FileContentLoader, extra_fields: Optional[dict] = None):
+        self.file_id = file_id
+        self.loader = loader
+        self.extra_fields = extra_fields if extra_fields is not None else {}
+
+    @property
+    def content(self) -> Optional[str]:
+        if '_content' not in self.__dict__:
+            self.__dict__['_content'] = self.loader.get(self.file_id)
+        return self.__dict__['_content']
+
+    @content.setter
+    def content(self, value: Optional[str]):
+        self.__dict__['_content'] = value
+
+    @property
+    def loaded(self) -> bool:
+        return '_content' in self.__dict__
+
+    def __repr__(self) -> str:
+        # Never fetch just to print
+        return f"RemoteFileData(file_id={self.file_id!r}, loaded={self.loaded})"
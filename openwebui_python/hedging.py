@@ -0,0 +1,144 @@
+# hedging.py
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Optional
+
+def _is_success(response) -> bool:
+    status_code = getattr(response, 'status_code', None)
+    return not isinstance(status_code, int) or status_code < 400
+
+def _discard(future):
+    '''
+    Close the response of a request that lost the race, once it has one, so its connection is dropped
+    '''
+    if future.cancelled() or future.exception() is not None:
+        return
+    response = future.result()
+    if hasattr(response, 'close'):
+        response.close()
+
+class HedgingPolicy:
+    '''
+    Hedged requests: if a request has not answered after the hedge delay, a duplicate
+    is sent and the first successful response wins.
+
+    The losing request is not cancelled. Its response is closed only once its headers
+    arrive, and a non-streamed chat completion sends them when generation has finished.
+    Until then it keeps a worker thread, a pooled connection and the server busy, so a
+    hedge costs a full duplicate request: keep budget small.
+
+    The delay is fixed when delay is given, otherwise it is the given percentile of the
+    recent latencies observed for the same key (model), falling back to initial_delay
+    until min_samples latencies are known. Hedges are capped at budget (a fraction)
+    of all requests.
+    '''
+    def __init__(self, delay: Optional[float] = None, percentile: float = 95, min_samples: int = 20,
+                 initial_delay: float = 2.0, min_delay: float = 0.05, budget: float = 0.1,
+                 window: int = 500, max_workers: int = 64):
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if not 0 <= budget <= 1:
+            raise ValueError("budget must be between 0 and 1")
+
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.budget = budget
+        self.window = window
+        self.max_workers = max_workers
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def hedge_delay(self, key=None) -> float:
+        '''
+        Seconds to wait for the first response before hedging
+        '''
+        if self.delay is not None:
+            return self.delay
+        with self._lock:
+            latencies = sorted(self._latencies.get(key, ()))
+        if len(latencies) < self.min_samples:
+            return self.initial_delay
+        index = min(len(latencies) - 1, int(len(latencies) * self.percentile / 100))
+        return max(self.min_delay, latencies[index])
+
+    def _record_latency(self, key, latency: float):
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(latency)
+
+    def _acquire_hedge(self) -> bool:
+        with self._lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='openwebui-hedge')
+            return self._executor
+
+    def execute(self, key, send: Callable[[], object]):
+        '''
+        Run send(), hedging it with a second send() if it is slow. Returns the winning response,
+        or the outcome of the last attempt to finish when none succeeds.
+        '''
+        with self._lock:
+            self.requests += 1
+        executor = self._get_executor()
+        start = time.monotonic()
+        primary = executor.submit(send)
+        done, _ = wait([primary], timeout=self.hedge_delay(key))
+        if done or not self._acquire_hedge():
+            response = primary.result()
+            self._record_latency(key, time.monotonic() - start)
+            return response
+
+        hedge = executor.submit(send)
+        pending = {primary, hedge}
+        failed = []
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and _is_success(future.result()):
+                    self._record_latency(key, time.monotonic() - start)
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    for loser in pending:
+                        if not loser.cancel():
+                            loser.add_done_callback(_discard)
+                    for loser in failed + [other for other in done if other is not future]:
+                        _discard(loser)
+                    return future.result()
+                failed.append(future)
+        for loser in failed[:-1]:
+            _discard(loser)
+        return failed[-1].result()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedges': self.hedges,
+                'hedge_wins': self.hedge_wins
+            }
+
+    def close(self):
+        '''
+        Shut down the worker threads; they are recreated on the next request
+        '''
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False)
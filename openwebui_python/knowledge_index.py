@@ -0,0 +1,149 @@
+# knowledge_index.py
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+try:
+    from .refresh import StaleWhileRevalidate
+except ImportError:  # running openwebui_python.py as a script
+    from refresh import StaleWhileRevalidate
+
+logger = logging.getLogger('OpenWebUI')
+
+_EMPTY = frozenset()
+
+class KnowledgeIndex(StaleWhileRevalidate):
+    '''
+    Maps file ids to the knowledge items containing them, and knowledge ids to their files.
+
+    load() returns the raw knowledge listing (dicts with id, updated_at and, when the server
+    includes them, files); fetch_files(knowledge_id) returns the file ids of one item whose
+    listing entry has no files. A refresh only rebuilds the items whose updated_at changed.
+    The first lookup loads synchronously; afterwards, once the index is older than ttl
+    seconds, lookups keep answering from it while a background thread refreshes it.
+    Lookups never block on a background refresh: each refresh builds new maps and swaps them in.
+    '''
+    _description = 'knowledge index'
+    _thread_name = 'openwebui-knowledge-index'
+
+    def __init__(self, load: Callable[[], List[dict]], fetch_files: Callable[[str], Iterable[str]],
+                 ttl: float = 60.0, retry_interval: float = 10.0, max_concurrency: int = 8):
+        super().__init__(ttl, retry_interval)
+        self.max_concurrency = max_concurrency
+        self.refreshes = 0
+        self.rebuilt = 0
+        self._load = load
+        self._fetch_files = fetch_files
+        self._files_of: Dict[str, FrozenSet[str]] = {}
+        self._knowledge_of: Dict[str, FrozenSet[str]] = {}
+        self._updated_at: Dict[str, Optional[int]] = {}
+        self._dirty = set()
+
+    def _fetch(self):
+        items = self._load()
+        with self._lock:
+            files_of, knowledge_of, updated_at = self._files_of, self._knowledge_of, self._updated_at
+            dirty = set(self._dirty)
+
+        listed = {}
+        changed = {}
+        for item in items:
+            knowledge_id = item.get('id')
+            if not knowledge_id:
+                continue
+            listed[knowledge_id] = item.get('updated_at')
+            if (knowledge_id in files_of and knowledge_id not in dirty and listed[knowledge_id] is not None
+                    and updated_at.get(knowledge_id) == listed[knowledge_id]):
+                continue
+            files = item.get('files')
+            changed[knowledge_id] = None if files is None else frozenset(
+                file.get('id') if isinstance(file, dict) else file for file in files
+            )
+
+        missing = [knowledge_id for knowledge_id, files in changed.items() if files is None]
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(missing))) as executor:
+                for knowledge_id, files in zip(missing, executor.map(self._fetch_files, missing)):
+                    changed[knowledge_id] = frozenset(files)
+
+        # Patch copies of the maps, they are swapped in by _install
+        new_files_of = {knowledge_id: files_of[knowledge_id] for knowledge_id in listed if knowledge_id not in changed}
+        new_files_of.update(changed)
+        new_knowledge_of = dict(knowledge_of)
+        for knowledge_id in changed.keys() | (files_of.keys() - listed.keys()):
+            before = files_of.get(knowledge_id, _EMPTY)
+            after = new_files_of.get(knowledge_id, _EMPTY)
+            for file_id in before - after:
+                remaining = new_knowledge_of[file_id] - {knowledge_id}
+                if remaining:
+                    new_knowledge_of[file_id] = remaining
+                else:
+                    del new_knowledge_of[file_id]
+            for file_id in after - before:
+                new_knowledge_of[file_id] = new_knowledge_of.get(file_id, _EMPTY) | {knowledge_id}
+        logger.info(f"Knowledge index refreshed: {len(changed)} of {len(listed)} knowledge items changed")
+        return new_files_of, new_knowledge_of, listed, dirty, len(changed)
+
+    def _install(self, state):
+        self._files_of, self._knowledge_of, self._updated_at, dirty, rebuilt = state
+        self._dirty -= dirty
+        self.refreshes += 1
+        self.rebuilt += rebuilt
+
+    def _snapshot(self):
+        return self._files_of, self._knowledge_of
+
+    def invalidate(self, knowledge_id: Optional[str] = None, wait: bool = False):
+        '''
+        Mark the index stale. With knowledge_id, that item's files are fetched again on the next
+        refresh even if its updated_at did not change (it only has a resolution of seconds).
+        The next lookup refreshes in the background, or first, before answering, with wait=True.
+        '''
+        with self._lock:
+            if knowledge_id is not None and self._expires_at is not None:
+                self._dirty.add(knowledge_id)
+        super().invalidate(wait)
+
+    def invalidate_file(self, file_id: str, wait: bool = False):
+        '''
+        invalidate() every knowledge item known to contain the file
+        '''
+        with self._lock:
+            knowledge_ids = self._knowledge_of.get(file_id, _EMPTY)
+            if self._expires_at is not None:
+                self._dirty.update(knowledge_ids)
+        super().invalidate(wait)
+
+    def knowledge_of(self, file_id: str) -> FrozenSet[str]:
+        '''
+        Ids of the knowledge items containing the file
+        '''
+        return self._current()[1].get(file_id, _EMPTY)
+
+    def files_of(self, knowledge_id: str) -> FrozenSet[str]:
+        '''
+        Ids of the files in a knowledge item
+        '''
+        return self._current()[0].get(knowledge_id, _EMPTY)
+
+    def contains(self, knowledge_id: str, file_id: str) -> bool:
+        return knowledge_id in self.knowledge_of(file_id)
+
+    def __contains__(self, file_id: str) -> bool:
+        '''
+        Whether the file is in any knowledge item
+        '''
+        return file_id in self._current()[1]
+
+    def __len__(self) -> int:
+        return len(self._current()[0])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'knowledge': len(self._files_of),
+                'files': len(self._knowledge_of),
+                'refreshes': self.refreshes,
+                'rebuilt': self.rebuilt,
+                'errors': self.errors
+            }
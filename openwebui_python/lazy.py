@@ -0,0 +1,56 @@
+# lazy.py
+
+from collections.abc import Sequence
+from typing import Any, Callable, Iterator, List
+
+_PENDING = object()
+
+class LazyList(Sequence):
+    '''
+    Read-only list view over the raw JSON items of a listing response. The typed object
+    of an item is decoded the first time it is accessed and then kept, so listing costs
+    scale with the items actually used.
+    '''
+    def __init__(self, items: List[dict], decode: Callable[[dict], Any]):
+        self._items = items
+        self._decode = decode
+        self._decoded = [_PENDING] * len(items)
+
+    def _get(self, index: int):
+        value = self._decoded[index]
+        if value is _PENDING:
+            value = self._decoded[index] = self._decode(self._items[index])
+        return value
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get(i) for i in range(*index.indices(len(self._items)))]
+        return self._get(index)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator:
+        for index in range(len(self._items)):
+            yield self._get(index)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Sequence) or isinstance(other, str):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    def __repr__(self) -> str:
+        decoded = sum(value is not _PENDING for value in self._decoded)
+        return f"LazyList({len(self._items)} items, {decoded} decoded)"
+
+    def raw(self, index: int) -> dict:
+        '''
+        The undecoded JSON object of an item
+        '''
+        return self._items[index]
+
+    def pluck(self, name: str, default=None) -> list:
+        '''
+        One top-level field of every item, read from the raw JSON without decoding anything
+        '''
+        return [item.get(name, default) for item in self._items]
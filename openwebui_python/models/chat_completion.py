@@ -1,8 +1,10 @@
 # models.py
 
-from dataclasses import dataclass, field, asdict, MISSING
+from dataclasses import dataclass, field, asdict
 from typing import List, Optional, Dict, Any
+from .decoder import decodable
 
+@decodable(intern=('role',))
 @dataclass
 class Message:
     content: str
@@ -10,37 +12,7 @@ class Message:
     refusal: Optional[Any] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __init__(self, *args, **kwargs):
-        # Extract known fields from kwargs
-        known_fields = {f.name for f in self.__dataclass_fields__.values() if f.name != 'extra_fields'}
-        known_args = {k: kwargs.pop(k) for k in list(kwargs) if k in known_fields}
-        
-        # Initialize class in typical dataclass fashion
-        super().__setattr__('extra_fields', kwargs)  # Any extra fields go here
-        
-        # Handle known fields
-        for field, value in known_args.items():
-            super().__setattr__(field, value)
-        
-        # Manage any defaults not passed explicitly
-        for field, field_def in self.__dataclass_fields__.items():
-            if field not in known_args and field != 'extra_fields':
-                if field_def.default_factory is not MISSING:
-                    super().__setattr__(field, field_def.default_factory())
-                elif field_def.default is not MISSING:
-                    super().__setattr__(field, field_def.default)
-
-    def __post_init__(self):
-        # Detect and store unexpected keyword arguments
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            # Clear existing attributes to prevent duplication
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('finish_reason',))
 @dataclass
 class Choice:
     index: int
@@ -49,37 +21,7 @@ class Choice:
     finish_reason: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __init__(self, *args, **kwargs):
-        # Extract known fields from kwargs
-        known_fields = {f.name for f in self.__dataclass_fields__.values() if f.name != 'extra_fields'}
-        known_args = {k: kwargs.pop(k) for k in list(kwargs) if k in known_fields}
-        
-        # Initialize class in typical dataclass fashion
-        super().__setattr__('extra_fields', kwargs)  # Any extra fields go here
-        
-        # Handle known fields
-        for field, value in known_args.items():
-            super().__setattr__(field, value)
-        
-        # Manage any defaults not passed explicitly
-        for field, field_def in self.__dataclass_fields__.items():
-            if field not in known_args and field != 'extra_fields':
-                if field_def.default_factory is not MISSING:
-                    super().__setattr__(field, field_def.default_factory())
-                elif field_def.default is not MISSING:
-                    super().__setattr__(field, field_def.default)
-
-    def __post_init__(self):
-        # Detect and store unexpected keyword arguments
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            # Clear existing attributes to prevent duplication
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('model', 'object'))
 @dataclass
 class ChatCompletion:
     choices: List[Choice]
@@ -91,36 +33,34 @@ class ChatCompletion:
     system_fingerprint: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __init__(self, *args, **kwargs):
-        # Extract known fields from kwargs
-        known_fields = {f.name for f in self.__dataclass_fields__.values() if f.name != 'extra_fields'}
-        known_args = {k: kwargs.pop(k) for k in list(kwargs) if k in known_fields}
-        
-        # Initialize class in typical dataclass fashion
-        super().__setattr__('extra_fields', kwargs)  # Any extra fields go here
-        
-        # Handle known fields
-        for field, value in known_args.items():
-            super().__setattr__(field, value)
-        
-        # Manage any defaults not passed explicitly
-        for field, field_def in self.__dataclass_fields__.items():
-            if field not in known_args and field != 'extra_fields':
-                if field_def.default_factory is not MISSING:
-                    super().__setattr__(field, field_def.default_factory())
-                elif field_def.default is not MISSING:
-                    super().__setattr__(field, field_def.default)
+@decodable(intern=('role',))
+@dataclass
+class Delta:
+    content: Optional[str] = None
+    role: Optional[str] = None
+    refusal: Optional[Any] = None
+    extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        # Detect and store unexpected keyword arguments
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            # Clear existing attributes to prevent duplication
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
+@decodable(intern=('finish_reason',))
+@dataclass
+class ChunkChoice:
+    index: int
+    delta: Delta
+    logprobs: Optional[Dict] = None
+    finish_reason: Optional[str] = None
+    extra_fields: Dict[str, Any] = field(default_factory=dict)
+
+@decodable(intern=('model', 'object'))
+@dataclass
+class ChatCompletionChunk:
+    choices: List[ChunkChoice]
+    id: Optional[str] = None
+    model: Optional[str] = None
+    object: Optional[str] = None
+    created: Optional[int] = None
+    usage: Optional[Dict[str, Any]] = None
+    system_fingerprint: Optional[str] = None
+    extra_fields: Dict[str, Any] = field(default_factory=dict)
 
 @dataclass
 class ChatWithFile:
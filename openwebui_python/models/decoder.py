@@ -0,0 +1,228 @@
+# decoder.py
+
+import sys
+import typing
+from dataclasses import fields, MISSING
+
+_NoneType = type(None)
+
+def _nested(tp):
+    '''
+    ('one', cls) or ('list', cls) when a field holds a decodable class, a list of them
+    or an Optional of either; None otherwise
+    '''
+    origin = typing.get_origin(tp)
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(tp) if arg is not _NoneType]
+        return _nested(args[0]) if len(args) == 1 else None
+    if origin is list:
+        args = typing.get_args(tp)
+        if args and hasattr(args[0], 'from_dict'):
+            return 'list', args[0]
+        return None
+    if isinstance(tp, type) and hasattr(tp, 'from_dict'):
+        return 'one', tp
+    return None
+
+def _compile(cls, intern: tuple, compact: bool = False, lazy: bool = False) -> dict:
+    '''
+    Source and namespace of __init__ and from_dict for cls. The compact variant keeps
+    extra_fields in _extra_fields (None until needed), decodes nested values into compact
+    objects and interns the intern fields; the lazy one leaves nested values raw for
+    _LazyField to decode on first access.
+    '''
+    namespace = {'_MISSING': MISSING, '_new': object.__new__, '_intern': sys.intern, '_Raw': _Raw}
+    init_params = []
+    init_lines = []
+    decode_lines = []
+    known = []
+
+    for f in fields(cls):
+        if f.name == 'extra_fields':
+            continue
+        name = f.name
+        known.append(name)
+        if f.default_factory is not MISSING:
+            namespace[f'_factory_{name}'] = f.default_factory
+            init_params.append(f"{name}=_MISSING")
+            init_lines.append(f"  self.{name} = _factory_{name}() if {name} is _MISSING else {name}")
+            missing = f"_factory_{name}()"
+        else:
+            namespace[f'_default_{name}'] = None if f.default is MISSING else f.default
+            init_params.append(f"{name}=_default_{name}")
+            init_lines.append(f"  self.{name} = {name}")
+            missing = f"_default_{name}"
+
+        nested = _nested(f.type)
+        if nested is None:
+            if compact and name in intern:
+                decode_lines.append(f"  value = data.get('{name}', {missing})")
+                decode_lines.append(f"  self.{name} = _intern(value) if value.__class__ is str else value")
+            elif missing.startswith('_factory_'):
+                decode_lines.append(f"  self.{name} = data['{name}'] if '{name}' in data else {missing}")
+            else:
+                decode_lines.append(f"  self.{name} = data.get('{name}', {missing})")
+            continue
+
+        kind, nested_cls = nested
+        namespace[f'_decode_{name}'] = (nested_cls.Compact if compact else nested_cls).from_dict
+        decode_lines.append(f"  value = data.get('{name}', _MISSING)")
+        if lazy:
+            raw_class = 'dict' if kind == 'one' else 'list'
+            decode_lines.append(
+                f"  self.__dict__['{name}'] = _Raw(value) if value.__class__ is {raw_class} else "
+                f"({missing} if value is _MISSING else value)"
+            )
+        elif kind == 'one':
+            decode_lines.append(
+                f"  self.{name} = _decode_{name}(value) if value.__class__ is dict else "
+                f"({missing} if value is _MISSING else value)"
+            )
+        else:
+            decode_lines.append(
+                f"  self.{name} = [_decode_{name}(item) if item.__class__ is dict else item for item in value] "
+                f"if value.__class__ is list else ({missing} if value is _MISSING else value)"
+            )
+
+    namespace['_known'] = frozenset(known)
+    if compact:
+        init_extras = "  self._extra_fields = (extras or None) if extra_fields is None else {**extra_fields, **extras}\n"
+        decode_extras = "  self._extra_fields = None if _known.issuperset(data) else {key: data[key] for key in data if key not in _known}\n"
+    else:
+        init_extras = "  self.extra_fields = extras if extra_fields is None else {**extra_fields, **extras}\n"
+        decode_extras = "  self.extra_fields = {} if _known.issuperset(data) else {key: data[key] for key in data if key not in _known}\n"
+    source = (
+        f"def __init__(self, {', '.join(init_params + ['extra_fields=None', '**extras'])}):\n"
+        + '\n'.join(init_lines) + '\n'
+        + init_extras
+        + "def from_dict(cls, data):\n"
+        + "  self = _new(cls)\n"
+        + '\n'.join(decode_lines) + '\n'
+        + decode_extras
+        + "  return self\n"
+    )
+    exec(source, namespace)
+    return namespace
+
+class _Raw:
+    '''
+    A nested JSON value a lazy object has not decoded yet
+    '''
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+class _LazyField:
+    '''
+    Data descriptor of a nested field of a Lazy class: decodes the raw JSON value the
+    first time the field is read and keeps the result
+    '''
+    def __init__(self, name: str, kind: str, nested_cls):
+        self.name = name
+        self.kind = kind
+        self.nested_cls = nested_cls
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        value = obj.__dict__[self.name]
+        if value.__class__ is _Raw:
+            decode = self.nested_cls.Lazy.from_dict
+            if self.kind == 'one':
+                value = decode(value.value)
+            else:
+                value = [decode(item) if item.__class__ is dict else item for item in value.value]
+            obj.__dict__[self.name] = value
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+def _lazy_class(cls, intern: tuple):
+    '''
+    Subclass of cls whose nested fields are decoded on first access; cls itself when
+    it has no nested fields
+    '''
+    nested = {f.name: _nested(f.type) for f in fields(cls) if f.name != 'extra_fields'}
+    nested = {name: kind_cls for name, kind_cls in nested.items() if kind_cls}
+    if not nested:
+        return cls
+    namespace = {
+        '__module__': cls.__module__,
+        '__qualname__': f"{cls.__qualname__}.Lazy",
+        '__doc__': f"{cls.__name__} decoding its nested fields on first access"
+    }
+    for name, (kind, nested_cls) in nested.items():
+        namespace[name] = _LazyField(name, kind, nested_cls)
+    names = [f.name for f in fields(cls)]
+
+    def __eq__(self, other):
+        # Equal to the eager objects too; cls.__eq__ defers here for a Lazy operand
+        if not isinstance(other, cls):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in names)
+
+    namespace['__eq__'] = __eq__
+    namespace['__hash__'] = cls.__hash__
+    lazy = type(cls.__name__, (cls,), namespace)
+    _install(lazy, _compile(cls, intern, lazy=True))
+    return lazy
+
+def _get_extra_fields(self):
+    if self._extra_fields is None:
+        self._extra_fields = {}
+    return self._extra_fields
+
+def _set_extra_fields(self, value):
+    self._extra_fields = value
+
+def _install(target, namespace):
+    init = namespace['__init__']
+    init.__qualname__ = f"{target.__qualname__}.__init__"
+    from_dict = namespace['from_dict']
+    from_dict.__qualname__ = f"{target.__qualname__}.from_dict"
+    target.__init__ = init
+    target.from_dict = classmethod(from_dict)
+
+def _compact_class(cls, intern: tuple):
+    '''
+    Slotted twin of cls: same fields, repr, equality and dataclasses.asdict() support,
+    no per-instance __dict__ and no extra_fields dict unless there are extras
+    '''
+    names = [f.name for f in fields(cls) if f.name != 'extra_fields']
+    compact = type(cls.__name__, (), {
+        '__slots__': tuple(names) + ('_extra_fields',),
+        '__module__': cls.__module__,
+        '__qualname__': f"{cls.__qualname__}.Compact",
+        '__doc__': f"Compact (slotted) {cls.__name__}",
+        '__dataclass_fields__': cls.__dataclass_fields__,
+        '__dataclass_params__': cls.__dataclass_params__,
+        '__repr__': cls.__repr__,
+        '__eq__': cls.__eq__,
+        '__hash__': cls.__hash__,
+        'extra_fields': property(_get_extra_fields, _set_extra_fields)
+    })
+    _install(compact, _compile(cls, intern, compact=True))
+    return compact
+
+def decodable(cls=None, *, intern: tuple = ()):
+    '''
+    Class decorator for the response dataclasses. Generates, once per class:
+
+    - __init__ taking every field as an optional argument (in field order) and collecting
+      unknown keyword arguments into extra_fields
+    - from_dict(data), a classmethod decoding a JSON object, recursing into fields typed as
+      another decodable class or a list of them; unknown keys land in extra_fields
+    - Compact, a slotted variant of the class for large listings whose from_dict also
+      interns the low-cardinality string fields named in intern
+    - Lazy, a subclass whose from_dict leaves nested fields as raw JSON until they are read
+
+    Apply it on top of @dataclass.
+    '''
+    def wrap(cls):
+        _install(cls, _compile(cls, intern))
+        cls.Compact = _compact_class(cls, intern)
+        cls.Lazy = _lazy_class(cls, intern)
+        return cls
+    return wrap if cls is None else wrap(cls)
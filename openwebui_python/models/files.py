@@ -1,8 +1,10 @@
 # files.py
 
-from dataclasses import dataclass, field, MISSING
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Union, Any
+from .decoder import decodable
 
+@decodable(intern=('content_type', 'type'))
 @dataclass
 class Meta:
     name: Optional[str] = None
@@ -12,29 +14,13 @@ class Meta:
     type: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class FileData:
     content: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('user_id',))
 @dataclass
 class OpenWebFile:
     id: Optional[str] = None
@@ -49,15 +35,7 @@ class OpenWebFile:
     success: Optional[bool] = False
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class ValidationErrorItem:
     success: bool = False
@@ -66,12 +44,3 @@ class ValidationErrorItem:
     detail: Optional[str] = None
     loc: Optional[Union[str, int]] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
-
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
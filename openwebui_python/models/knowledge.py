@@ -1,9 +1,11 @@
 # knowlegde.py
 
-from dataclasses import dataclass, field, MISSING
+from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
+from .decoder import decodable
 from .files import OpenWebFile
 
+@decodable(intern=('role',))
 @dataclass
 class User:
     id: Optional[str] = None
@@ -20,15 +22,7 @@ class User:
     oauth_sub: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('user_id',))
 @dataclass
 class Knowledge:
     id: Optional[str] = None
@@ -44,11 +38,15 @@ class Knowledge:
     user: Optional[User] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
+@dataclass
+class KnowledgeFilesResult:
+    '''
+    Summary of adding or removing many files of a knowledge item
+    '''
+    knowledge_id: Optional[str] = None
+    succeeded: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
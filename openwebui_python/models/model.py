@@ -1,23 +1,17 @@
 # model.py
 
-from dataclasses import dataclass, field, MISSING
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
+from .decoder import decodable
 
+@decodable(intern=('type',))
 @dataclass
 class Pipe:
     type: Optional[str] = None
     name: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('instruct_type', 'modality', 'tokenizer'))
 @dataclass
 class Architecture:
     instruct_type: Optional[str] = None
@@ -25,15 +19,7 @@ class Architecture:
     tokenizer: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class Pricing:
     completion: Optional[str] = None
@@ -42,15 +28,7 @@ class Pricing:
     request: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class TopProvider:
     context_length: Optional[int] = None
@@ -58,15 +36,7 @@ class TopProvider:
     max_completion_tokens: Optional[int] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('object', 'owned_by'))
 @dataclass
 class OpenAI:
     created: Optional[int] = None
@@ -84,15 +54,7 @@ class OpenAI:
     urlIdx: Optional[Any] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class Action:
     description: Optional[str] = None
@@ -101,30 +63,14 @@ class Action:
     icon_url: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class AccessControl:
     group_ids: List[str] = field(default_factory=list)
     user_ids: List[str] = field(default_factory=list)
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class Meta:
     description: Optional[str] = None
@@ -132,15 +78,7 @@ class Meta:
     model_ids: Optional[List[str]] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('base_model_id', 'user_id'))
 @dataclass
 class Info:
     access_control: Optional[AccessControl] = None
@@ -156,35 +94,7 @@ class Info:
     description: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __init__(self, *args, **kwargs):
-        # Extract known fields from kwargs
-        known_fields = {f.name for f in self.__dataclass_fields__.values() if f.name != 'extra_fields'}
-        known_args = {k: kwargs.pop(k) for k in list(kwargs) if k in known_fields}
-        
-        # Initialize class in typical dataclass fashion
-        super().__setattr__('extra_fields', kwargs)  # Any extra fields go here
-        
-        # Handle known fields
-        for field, value in known_args.items():
-            super().__setattr__(field, value)
-        
-        # Manage any defaults not passed explicitly
-        for field, field_def in self.__dataclass_fields__.items():
-            if field not in known_args and field != 'extra_fields':
-                if field_def.default_factory is not MISSING:
-                    super().__setattr__(field, field_def.default_factory())
-                elif field_def.default is not MISSING:
-                    super().__setattr__(field, field_def.default)
-
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('family', 'format', 'parameter_size', 'parent_model', 'quantization_level'))
 @dataclass
 class Details:
     families: List[str] = field(default_factory=list)
@@ -195,15 +105,7 @@ class Details:
     quantization_level: Optional[str] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable
 @dataclass
 class Ollama:
     details: Optional[Details] = None
@@ -215,15 +117,7 @@ class Ollama:
     urls: List[int] = field(default_factory=list)
     extra_fields: Dict[str, Any] = field(default_factory=dict)
 
-    def __post_init__(self):
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
-
+@decodable(intern=('object', 'owned_by'))
 @dataclass
 class Model:
     id: Optional[str] = None
@@ -246,34 +140,3 @@ class Model:
     top_provider: Optional[TopProvider] = None
     per_request_limits: Optional[Dict[str, str]] = None
     extra_fields: Dict[str, Any] = field(default_factory=dict)
-
-    def __init__(self, *args, **kwargs):
-        # Extract known fields from kwargs
-        known_fields = {f.name for f in self.__dataclass_fields__.values() if f.name != 'extra_fields'}
-        known_args = {k: kwargs.pop(k) for k in list(kwargs) if k in known_fields}
-        
-        # Initialize class in typical dataclass fashion
-        super().__setattr__('extra_fields', kwargs)  # Any extra fields go here
-        
-        # Handle known fields
-        for field, value in known_args.items():
-            super().__setattr__(field, value)
-        
-        # Manage any defaults not passed explicitly
-        for field, field_def in self.__dataclass_fields__.items():
-            if field not in known_args and field != 'extra_fields':
-                if field_def.default_factory is not MISSING:
-                    super().__setattr__(field, field_def.default_factory())
-                elif field_def.default is not MISSING:
-                    super().__setattr__(field, field_def.default)
-
-    def __post_init__(self):
-        # Detect and store unexpected keyword arguments
-        defined_fields = {f.name for f in self.__dataclass_fields__.values()}
-        all_arguments = self.__dict__.copy()
-        extras = {k: v for k, v in all_arguments.items() if k not in defined_fields}
-        if extras:
-            # Clear existing attributes to prevent duplication
-            for extra in extras:
-                del self.__dict__[extra]
-            self.extra_fields.update(extras)
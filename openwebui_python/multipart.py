@@ -0,0 +1,160 @@
+# multipart.py
+
+import asyncio
+import mimetypes
+import os
+import uuid
+from functools import cached_property
+from typing import BinaryIO, Callable, Optional, Union
+
+UploadSource = Union[str, os.PathLike, bytes, bytearray, memoryview, BinaryIO]
+
+def _quote(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\r', '%0D').replace('\n', '%0A')
+
+class MultipartEncoder:
+    '''
+    Streams a multipart/form-data body with a single file part, chunk_size bytes at a time,
+    so uploads of any size use bounded memory. source is a path, bytes-like data (sent as
+    zero-copy memoryview slices) or a binary file-like object. progress_callback(sent, total)
+    is called after every chunk; total is None when the size of a stream is unknown, in
+    which case the body is sent with chunked transfer encoding.
+
+    Pass it as data= with headers={'Content-Type': encoder.content_type}. Iterating again
+    restarts the body, for retries, unless source is a non-seekable stream. Async iteration
+    reads paths and streams with asyncio.to_thread, so the event loop is never blocked.
+    '''
+    def __init__(self, source: UploadSource, filename: Optional[str] = None, content_type: Optional[str] = None,
+                 field_name: str = 'file', chunk_size: int = 65536,
+                 progress_callback: Optional[Callable[[int, Optional[int]], None]] = None):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.path = None
+        self.data = None
+        self.stream = None
+        if isinstance(source, (str, os.PathLike)):
+            self.path = os.fspath(source)
+            filename = filename or os.path.basename(self.path)
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            self.data = memoryview(source).cast('B')
+        elif hasattr(source, 'read'):
+            self.stream = source
+            name = getattr(source, 'name', None)
+            if not filename and isinstance(name, str):
+                filename = os.path.basename(name)
+            self._start = source.tell() if self._seekable(source) else None
+        else:
+            raise TypeError(f"Cannot upload a {type(source).__name__}")
+
+        self.filename = filename or 'upload'
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self.field_name = field_name
+        self.part_content_type = content_type
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode('utf-8')
+        self._iterated = False
+
+    @cached_property
+    def _head(self) -> bytes:
+        part_type = self.part_content_type or mimetypes.guess_type(self.filename)[0] or 'application/octet-stream'
+        return (
+            f"--{self.boundary}\r\n"
+            f'Content-Disposition: form-data; name="{_quote(self.field_name)}"; filename="{_quote(self.filename)}"\r\n'
+            f"Content-Type: {part_type}\r\n\r\n"
+        ).encode('utf-8')
+
+    @staticmethod
+    def _seekable(stream) -> bool:
+        try:
+            return stream.seekable()
+        except (AttributeError, OSError, ValueError):
+            return False
+
+    def _source_size(self) -> Optional[int]:
+        if self.data is not None:
+            return self.data.nbytes
+        if self.path is not None:
+            return os.path.getsize(self.path)
+        if self._start is None:
+            return None
+        try:
+            return os.fstat(self.stream.fileno()).st_size - self._start
+        except (AttributeError, OSError, ValueError):
+            end = self.stream.seek(0, os.SEEK_END)
+            self.stream.seek(self._start)
+            return end - self._start
+
+    @property
+    def length(self) -> Optional[int]:
+        '''
+        Total body size in bytes, None for streams of unknown size
+        '''
+        size = self._source_size()
+        if size is None:
+            return None
+        return len(self._head) + size + len(self._tail)
+
+    def __len__(self) -> int:
+        # requests sends a Content-Length for sized bodies; 0 makes it fall back to chunked
+        return self.length or 0
+
+    def __bool__(self) -> bool:
+        # An unknown-size body is still a body, even though len() is 0
+        return True
+
+    def _file_chunks(self):
+        if self.data is not None:
+            for offset in range(0, self.data.nbytes, self.chunk_size):
+                yield self.data[offset:offset + self.chunk_size]
+            return
+        if self.path is not None:
+            with open(self.path, 'rb') as f:
+                while True:
+                    chunk = f.read(self.chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+        if self._iterated:
+            if self._start is None:
+                raise ValueError("Cannot resend an upload from a non-seekable stream")
+            self.stream.seek(self._start)
+        self._iterated = True
+        while True:
+            chunk = self.stream.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def __iter__(self):
+        total = self.length
+        sent = 0
+        for chunk in self._parts():
+            yield chunk
+            sent += len(chunk)
+            if self.progress_callback:
+                self.progress_callback(sent, total)
+
+    def _parts(self):
+        yield self._head
+        yield from self._file_chunks()
+        yield self._tail
+
+    async def __aiter__(self):
+        total = self.length
+        sent = 0
+        parts = self._parts()
+        try:
+            while True:
+                # Slicing in-memory data cannot block; file and stream reads go to a worker thread
+                chunk = next(parts, None) if self.data is not None else await asyncio.to_thread(next, parts, None)
+                if chunk is None:
+                    return
+                yield bytes(chunk) if isinstance(chunk, memoryview) else chunk
+                sent += len(chunk)
+                if self.progress_callback:
+                    self.progress_callback(sent, total)
+        finally:
+            parts.close()
@@ -5,12 +5,46 @@ if __name__ == "__main__":
     from models.model import *
     from models.files import *
     from models.knowledge import *
+    from transport import HTTPTransport
+    from codec import JSONCodec, get_codec
+    from streaming import ChatCompletionStream, JSONArrayStream
+    from retry import RetryPolicy, RetryStats
+    from ratelimit import RateLimiter
+    from balancer import LoadBalancer, Strategy
+    from circuit_breaker import CircuitBreaker, CircuitOpenError
+    from hedging import HedgingPolicy
+    from cache import CacheBackend, cache_key
+    from catalog import ModelCatalog
+    from lazy import LazyList
+    from content import FileContentLoader, RemoteFileData
+    from multipart import MultipartEncoder, UploadSource
+    from uploads import UploadIndex, hash_files, server_hashes
+    from sync import KnowledgeSync, SyncReport
+    from knowledge_index import KnowledgeIndex
 else:
     from .models.chat_completion import *
     from .models.model import *
     from .models.files import *
     from .models.knowledge import *
-import os, json, requests, pprint, logging
+    from .transport import HTTPTransport
+    from .codec import JSONCodec, get_codec
+    from .streaming import ChatCompletionStream, JSONArrayStream
+    from .retry import RetryPolicy, RetryStats
+    from .ratelimit import RateLimiter
+    from .balancer import LoadBalancer, Strategy
+    from .circuit_breaker import CircuitBreaker, CircuitOpenError
+    from .hedging import HedgingPolicy
+    from .cache import CacheBackend, cache_key
+    from .catalog import ModelCatalog
+    from .lazy import LazyList
+    from .content import FileContentLoader, RemoteFileData
+    from .multipart import MultipartEncoder, UploadSource
+    from .uploads import UploadIndex, hash_files, server_hashes
+    from .sync import KnowledgeSync, SyncReport
+    from .knowledge_index import KnowledgeIndex
+import os, json, gzip, time, hashlib, threading, requests, pprint, logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, List, Optional, Union
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,50 +56,423 @@ logging.basicConfig(
 )
 logger = logging.getLogger('OpenWebUI')
 
+def _decoder(cls, compact: bool = False, lazy: bool = False):
+    if compact:
+        return cls.Compact.from_dict
+    return (cls.Lazy if lazy else cls).from_dict
+
+def _parse_list(items: list, cls, compact: bool = False, lazy: bool = False) -> list:
+    '''
+    Decode a listing; with lazy=True into a LazyList decoding each item on first access
+    '''
+    decode = _decoder(cls, compact, lazy)
+    return LazyList(items, decode) if lazy else [decode(item) for item in items]
+
+def _parse_models(data: dict, compact: bool = False, lazy: bool = False) -> list[Model]:
+    return _parse_list(data.get('data', []), Model, compact, lazy)
+
+def _parse_chat_completion(data: dict, compact: bool = False) -> ChatCompletion:
+    return _decoder(ChatCompletion, compact)(data)
+
+def _parse_file(data: dict, compact: bool = False) -> OpenWebFile:
+    return _decoder(OpenWebFile, compact)(data)
+
+def _batch_add_outcomes(status_code: int, data, file_ids: list) -> tuple:
+    '''
+    Read a batch add response: ({file_id: error or None}, endpoint_missing). The outcomes are
+    None when the files must be added one by one instead.
+    '''
+    if status_code in (404, 405):
+        detail = data.get('detail') if isinstance(data, dict) else None
+        # FastAPI answers an unknown route with 404 "Not Found"; any other 404 is about the
+        # knowledge item itself (e.g. it was deleted), so only this call falls back
+        return None, status_code == 405 or detail in (None, 'Not Found')
+    if status_code != 200:
+        error = data.get('detail', 'Unknown error occurred') if isinstance(data, dict) else str(data)
+        return dict.fromkeys(file_ids, error), False
+
+    # Files that failed processing are reported as warning messages naming them
+    errors = ((data.get('warnings') or {}).get('errors') or []) if isinstance(data, dict) else []
+    return {file_id: next((error for error in errors if file_id in error), None) for file_id in file_ids}, False
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def _file_hashes(data: dict) -> set:
+    '''
+    SHA-256 hashes of a file's content from its GET /v1/files/{id} response
+    '''
+    hashes = set(server_hashes(data.get('hash')))
+    content = (data.get('data') or {}).get('content')
+    if content is not None:
+        hashes.add(_text_hash(content))
+    return hashes
+
+# Smaller request bodies are not worth gzip-compressing
+_GZIP_MIN_SIZE = 1024
+
+def _error_detail(response) -> str:
+    '''
+    The detail message of an error response, or its status when the body has none
+    '''
+    try:
+        return response.json().get('detail', 'Unknown error occurred')
+    except Exception:  # not JSON, or not an object; the async transport raises httpx.DecodingError
+        return f"HTTP {response.status_code}"
+
 class OpenWebUI:
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: Union[str, List[str]], api_key: str, pool_connections: int = 10, pool_maxsize: int = 10,
+                 pool_block: bool = False, keep_alive: bool = True, timeout=None, transport=None,
+                 retry_policy: Optional[RetryPolicy] = None, rate_limiter: Optional[RateLimiter] = None,
+                 load_balancing: Union[str, Strategy] = 'round_robin', load_balancer: Optional[LoadBalancer] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None, hedging: Optional[HedgingPolicy] = None,
+                 response_cache: Optional[CacheBackend] = None, model_catalog_ttl: float = 300.0,
+                 compact_models: bool = False, upload_index: Optional[UploadIndex] = None,
+                 knowledge_index_ttl: float = 60.0, json_codec: Union[str, JSONCodec, None] = None):
+        '''
+        base_url may be a list of replica URLs; requests are then spread over them by the
+        load_balancing strategy ('round_robin', 'least_outstanding', 'ewma' or a Strategy),
+        or by a preconfigured load_balancer.
+        pool_connections, pool_maxsize, pool_block, keep_alive and timeout configure the pooled
+        HTTPTransport. Pass transport to supply your own (anything with request() and close()).
+        retry_policy enables retries of transient failures; without one every request is tried once.
+        rate_limiter throttles requests per endpoint and model before they are sent.
+        circuit_breaker fails requests fast with CircuitOpenError while their endpoint/model is unhealthy.
+        hedging sends a duplicate of slow (non-streamed) chat completions and keeps the first answer.
+        response_cache answers repeated identical (non-streamed) chat completions from a MemoryCache or SQLiteCache.
+        model_catalog_ttl is how long get_model() and get_models(cached=True) serve the listing before revalidating it.
+        compact_models=True decodes responses into the slotted Compact variants of the models, which take
+        less memory for large listings.
+        upload_index (an UploadIndex) remembers uploaded content across runs, so upload_file and
+        upload_files return the existing server file instead of uploading the same content again.
+        knowledge_index_ttl is how long get_knowledge_ids_for_file() answers from the file -> knowledge
+        index before it is refreshed (incrementally, by updated_at).
+        json_codec serializes request bodies and parses responses: 'json' (standard library), 'orjson',
+        'msgspec', a JSONCodec, or None for the fastest one installed.
+        '''
         if not base_url:
             raise ValueError("base_url cannot be empty")
         if not api_key:
             raise ValueError("api_key cannot be empty")
-            
-        self.base_url = base_url.rstrip('/')  # Remove trailing slash if present
+
+        base_urls = [base_url] if isinstance(base_url, str) else list(base_url)
+        self.load_balancer = load_balancer or LoadBalancer(base_urls, strategy=load_balancing)
+        self.base_urls = [replica.base_url for replica in self.load_balancer.replicas]
+        self.base_url = self.base_urls[0]
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Accept": "application/json"
         }
-        logger.info(f"Initialized OpenWebUI client with base URL: {base_url}")
+        self.transport = transport or HTTPTransport(
+            pool_connections=max(pool_connections, len(self.base_urls)),
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            keep_alive=keep_alive,
+            timeout=timeout,
+            codec=json_codec
+        )
+        # A custom transport decodes responses its own way; the codec still parses streams and cached entries
+        codec = getattr(self.transport, 'codec', None)
+        self.json_codec = codec if isinstance(codec, JSONCodec) else get_codec(json_codec)
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=1)
+        self.retry_stats = RetryStats()
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self.hedging = hedging
+        self.response_cache = response_cache
+        self.compact_models = compact_models
+        self.upload_index = upload_index
+        self._knowledge_batch_add = True  # until the server turns out not to have the endpoint
+        self._gzip_requests = True  # until the server rejects a compressed body
+        self._content_hashes = {}  # file id -> hash of the content last sent
+        self.file_contents = FileContentLoader(self._fetch_file_content)
+        self.model_catalog = ModelCatalog(self._load_models, ttl=model_catalog_ttl)
+        self.knowledge_index = KnowledgeIndex(self._list_knowledge, self._knowledge_file_ids, ttl=knowledge_index_ttl)
+        logger.info(f"Initialized OpenWebUI client with base URL: {', '.join(self.base_urls)}")
+
+    def close(self):
+        '''
+        Release the pooled connections held by this client
+        '''
+        if self.hedging:
+            self.hedging.close()
+        self.transport.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _request(self, method: str, path: str, headers: dict = None, idempotent: Optional[bool] = None,
+                 model_id: Optional[str] = None, **kwargs):
+        '''
+        Send a request to base_url + path through the shared transport. Requests that may be
+        retried fail over to another replica right away and are then retried with backoff as
+        allowed by the retry policy. idempotent overrides the method-based default, model_id
+        selects the per-model rate limit.
+        '''
+        headers = {**self.headers, **headers} if headers else self.headers
+        policy = self.retry_policy
+        retryable = policy.allows(method, idempotent)
+        max_attempts = policy.max_attempts if retryable else 1
+        self.retry_stats.record_request()
+
+        tried = set()
+        attempt = 1
+        # Upload bodies are MultipartEncoders, which restart from the beginning when resent
+        while True:
+            error = response = None
+            try:
+                response = self._send(method, path, headers, model_id, tried, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                reason = type(e).__name__
+            else:
+                if response.status_code not in policy.retry_statuses:
+                    return response
+                reason = str(response.status_code)
+
+            if retryable and self.load_balancer.can_fail_over(tried):
+                logger.warning(f"Failing over {method} {path} to another replica after {reason}")
+                self.load_balancer.record_failover()
+                if response is not None:
+                    response.close()
+                continue
+
+            if attempt >= max_attempts:
+                if max_attempts > 1:
+                    self.retry_stats.record_exhausted()
+                if error is not None:
+                    raise error
+                return response
+            if error is not None:
+                delay = policy.backoff(attempt)
+            else:
+                retry_after = policy.retry_after(response)
+                if retry_after is not None and retry_after > policy.max_retry_after:
+                    return response
+                delay = retry_after if retry_after is not None else policy.backoff(attempt)
+                response.close()
+
+            logger.warning(f"Retrying {method} {path} after {reason} (attempt {attempt} of {max_attempts}) in {delay:.2f}s")
+            self.retry_stats.record_retry(reason)
+            if policy.on_retry:
+                policy.on_retry(method, path, attempt, delay, reason)
+            time.sleep(delay)
+            tried.clear()
+            attempt += 1
+
+    def _send(self, method: str, path: str, headers: dict, model_id: Optional[str], tried: set, **kwargs):
+        '''
+        Send a single attempt to the next replica, adding it to tried. The circuit breaker is
+        checked first, the rate limiter's permits are held while the attempt is in flight and the
+        outcome feeds the replica's and the circuit's health.
+        '''
+        circuit = self.circuit_breaker.before_call(path, model_id) if self.circuit_breaker else None
+        permits = replica = status_code = None
+        start = time.monotonic()
+        try:
+            permits = self.rate_limiter.acquire(path, model_id) if self.rate_limiter else None
+            replica = self.load_balancer.acquire(exclude=tried)
+            tried.add(replica)
+            start = time.monotonic()
+            response = self.transport.request(method, f"{replica.base_url}{path}", headers=headers, **kwargs)
+            status_code = response.status_code
+            return response
+        finally:
+            latency = time.monotonic() - start
+            healthy = status_code is not None and not (isinstance(status_code, int) and status_code >= 500)
+            if replica is not None:
+                self.load_balancer.release(replica, healthy, latency)
+            if permits is not None:
+                self.rate_limiter.release(permits, status_code, latency)
+            if circuit is not None:
+                if replica is None:
+                    # Nothing was sent, so a half-open circuit gets its trial back
+                    self.circuit_breaker.cancel(circuit)
+                else:
+                    self.circuit_breaker.record(circuit, healthy)
+
+    def _create_chat_completion(self, payload: dict, use_cache: bool = True, refresh_cache: bool = False) -> ChatCompletion:
+        '''
+        Get a non-streamed chat completion, answered from the response cache when possible
+        '''
+        key = cache_key(payload) if self.response_cache is not None and use_cache else None
+        if key and not refresh_cache:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                logger.info(f"Chat completion for model {payload['model']} served from cache")
+                return _parse_chat_completion(self.json_codec.loads(cached), self.compact_models)
+
+        response = self._post_chat_completion(payload)
+        response.raise_for_status()
+
+        data = response.json()
+        if key:
+            self.response_cache.set(key, self.json_codec.dumps(data).decode('utf-8'))
+        return _parse_chat_completion(data, self.compact_models)
+
+    def _post_chat_completion(self, payload: dict):
+        '''
+        POST a non-streamed chat completion, hedged when a hedging policy is set
+        '''
+        if not self.hedging:
+            return self._request('POST', "/chat/completions", json=payload, idempotent=True, model_id=payload['model'])
+        # stream=True defers reading the body, so a losing response can be closed without downloading it.
+        # It only arrives when the server has finished generating, so the loser still runs to the end.
+        return self.hedging.execute(
+            payload['model'],
+            lambda: self._request('POST', "/chat/completions", json=payload, idempotent=True,
+                                  model_id=payload['model'], stream=True)
+        )
+
+    def _stream_chat_completion(self, payload: dict, description: str) -> ChatCompletionStream:
+        '''
+        Send a chat completion request with stream enabled and return the chunk iterator
+        '''
+        payload['stream'] = True
+        payload.setdefault('stream_options', {'include_usage': True})
+        try:
+            response = self._request(
+                'POST',
+                "/chat/completions",
+                json=payload,
+                headers={"Accept": "text/event-stream"},
+                idempotent=True,
+                model_id=payload['model'],
+                stream=True
+            )
+            if not response.ok:
+                response.close()
+            response.raise_for_status()
+
+            logger.info(f"Streaming {description}")
+            return ChatCompletionStream(response, self.json_codec.loads)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to get {description}: {str(e)}")
+            raise Exception(f"Failed to get {description}: {str(e)}")
+
+    def _stream_list(self, path: str, cls, description: str, chunk_size: int) -> JSONArrayStream:
+        '''
+        Request a listing with the body streamed and return an iterator decoding it item by item
+        '''
+        logger.info(f"Streaming all {description}")
+        try:
+            response = self._request('GET', path, stream=True)
+            if not response.ok:
+                response.close()
+            response.raise_for_status()
+            return JSONArrayStream(response, _decoder(cls, self.compact_models), chunk_size)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch {description}: {str(e)}")
+            raise Exception(f"Failed to fetch {description}: {str(e)}")
+
+    def _bulk(self, ids: list, action: Callable, max_concurrency: int, cancel: Optional[threading.Event],
+              progress_callback: Optional[Callable[[int, int], None]], description: str) -> dict:
+        '''
+        Run action(id) for every distinct id on up to max_concurrency threads and return {id: result}.
+        A failing id maps to a ValidationErrorItem instead of aborting the others. Once cancel is set,
+        ids not started yet are skipped and map to a "Cancelled" ValidationErrorItem.
+        '''
+        if not isinstance(ids, list):
+            raise ValueError("ids must be a list")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        ids = list(dict.fromkeys(ids))
+        total = len(ids)
+        logger.info(f"Starting {description} of {total} files with concurrency {max_concurrency}")
+        results = {}
+
+        def run(id: str):
+            if cancel is not None and cancel.is_set():
+                return id, ValidationErrorItem(success=False, message="Cancelled")
+            try:
+                return id, action(id)
+            except Exception as e:
+                return id, ValidationErrorItem(success=False, message=str(e))
+
+        executor = ThreadPoolExecutor(max_workers=min(max_concurrency, total or 1))
+        try:
+            futures = [executor.submit(run, id) for id in ids]
+            for completed, future in enumerate(as_completed(futures), 1):
+                id, result = future.result()
+                results[id] = result
+                if progress_callback:
+                    progress_callback(completed, total)
+        finally:
+            # On KeyboardInterrupt and the like, drop the queued ids instead of sending them
+            executor.shutdown(cancel_futures=True)
+
+        failed = sum(isinstance(result, ValidationErrorItem) and not result.success for result in results.values())
+        logger.info(f"Finished {description}: {total - failed} succeeded, {failed} failed")
+        return {id: results[id] for id in ids}
 
     #region MODEL METHODS
-    def get_models(self) -> list[Model]:
+    def get_models(self, cached: bool = False, lazy: bool = False) -> list[Model]:
         '''
-        Gets all of the available models
+        Gets all of the available models.
+        With cached=True they come from the model catalog instead of a new request.
+        With lazy=True returns a LazyList that decodes each model when it is first accessed.
         '''
+        if cached:
+            return self.model_catalog.models()
         logger.info("Fetching available models")
         try:
-            response = requests.get(f"{self.base_url}/models", headers=self.headers)
+            response = self._request('GET', "/models")
             response.raise_for_status()
             
-            data = response.json().get('data', [])
-            models = []
-            for item in data:
-                item['actions'] = [Action(**action) for action in item.get('actions', [])]
-                item['pipe'] = Pipe(**item['pipe']) if item.get('pipe') else None
-                item['openai'] = OpenAI(**item['openai']) if item.get('openai') else None
-                item['info'] = Info(**item['info']) if item.get('info') else None
-                models.append(Model(**item))
+            models = _parse_models(response.json(), self.compact_models, lazy)
             
             logger.info(f"Successfully retrieved {len(models)} models")
             return models
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch models: {str(e)}")
             raise Exception(f"Failed to fetch models: {str(e)}")
+
+    def get_model(self, model_id: str) -> Optional[Model]:
+        '''
+        Gets a model by id from the model catalog, None if there is no such model
+        '''
+        if not model_id:
+            raise ValueError("model_id cannot be empty")
+        return self.model_catalog.get(model_id)
+
+    def _load_models(self, validators: dict):
+        '''
+        Fetch /models for the model catalog, revalidating with the previous ETag / Last-Modified
+        '''
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        try:
+            response = self._request('GET', "/models", headers=headers)
+            if response.status_code == 304:
+                logger.info("Model catalog not modified")
+                return None, validators
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch models: {str(e)}")
+            raise Exception(f"Failed to fetch models: {str(e)}")
+
+        models = _parse_models(response.json(), self.compact_models)
+        logger.info(f"Model catalog loaded {len(models)} models")
+        return models, {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
     #endregion
     
     #region CHAT METHODS
-    def get_chat_completion(self, model_id: str, prompt: str) -> ChatCompletion:
+    def get_chat_completion(self, model_id: str, prompt: str, stream: bool = False,
+                            use_cache: bool = True, refresh_cache: bool = False) -> Union[ChatCompletion, ChatCompletionStream]:
         '''
         Gets a basic chat completion from openwebui provided a model_id and prompt.
+        With stream=True returns a ChatCompletionStream of ChatCompletionChunk deltas instead.
+        use_cache=False bypasses the response cache, refresh_cache=True ignores and replaces the cached answer.
         '''
         if not model_id:
             raise ValueError("model_id cannot be empty")
@@ -73,63 +480,55 @@ class OpenWebUI:
             raise ValueError("prompt cannot be empty")
             
         logger.info(f"Requesting chat completion for model: {model_id}")
+        payload = {
+            "model": model_id,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if stream:
+            return self._stream_chat_completion(payload, "chat completion")
         try:
-            payload = {
-                "model": model_id,
-                "messages": [{"role": "user", "content": prompt}]
-            }
-            response = requests.post(f"{self.base_url}/chat/completions", json=payload, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
-            choices = []
-            for item in data.get('choices', []):
-                item['message'] = Message(**item['message'])
-                choices.append(Choice(**item))
-            data['choices'] = choices
+            completion = self._create_chat_completion(payload, use_cache, refresh_cache)
             
             logger.info("Successfully received chat completion")
-            return ChatCompletion(**data)
+            return completion
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get chat completion: {str(e)}")
             raise Exception(f"Failed to get chat completion: {str(e)}")
         
-    def get_chat_completion_with_messages(self, model_id: str, messages) -> ChatCompletion:
+    def get_chat_completion_with_messages(self, model_id: str, messages, stream: bool = False,
+                                          use_cache: bool = True, refresh_cache: bool = False) -> Union[ChatCompletion, ChatCompletionStream]:
+        '''
+        Gets a chat completion for a full message history.
+        With stream=True returns a ChatCompletionStream of ChatCompletionChunk deltas instead.
+        use_cache=False bypasses the response cache, refresh_cache=True ignores and replaces the cached answer.
+        '''
         if not model_id:
             raise ValueError("model_id cannot be empty")
         if not messages or not isinstance(messages, list):
             raise ValueError("messages must be a non-empty list")
             
         logger.info(f"Requesting chat completion with messages for model: {model_id}")
+        payload = {
+            "model": model_id,
+            "messages": messages
+        }
+        if stream:
+            return self._stream_chat_completion(payload, "chat completion with messages")
         try:
-            payload = {
-                "model": model_id,
-                "messages": messages
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                json=payload,
-                headers=self.headers
-            )
-            response.raise_for_status()
-            
-            data = response.json()
-            choices = []
-            for item in data.get('choices', []):
-                item['message'] = Message(**item['message'])
-                choices.append(Choice(**item))
-            data['choices'] = choices
+            completion = self._create_chat_completion(payload, use_cache, refresh_cache)
             
             logger.info("Successfully received chat completion with messages")
-            return ChatCompletion(**data)
+            return completion
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get chat completion with messages: {str(e)}")
             raise Exception(f"Failed to get chat completion with messages: {str(e)}")
     
-    def chat_with_file(self, model: str, query: str, file_id: str) -> ChatCompletion:
+    def chat_with_file(self, model: str, query: str, file_id: str, stream: bool = False,
+                       use_cache: bool = True, refresh_cache: bool = False) -> Union[ChatCompletion, ChatCompletionStream]:
         '''
-        Chat with or about a specific file. Must upload a file or have a file id first
+        Chat with or about a specific file. Must upload a file or have a file id first.
+        With stream=True returns a ChatCompletionStream of ChatCompletionChunk deltas instead.
+        use_cache=False bypasses the response cache, refresh_cache=True ignores and replaces the cached answer.
         '''
         if not model:
             raise ValueError("model cannot be empty")
@@ -139,52 +538,133 @@ class OpenWebUI:
             raise ValueError("file_id cannot be empty")
             
         logger.info(f"Requesting chat completion with file {file_id}")
+        payload = {
+            'model': model,
+            'messages': [{'role': 'user', 'content': query}],
+            'files': [{'type': 'file', 'id': file_id}]
+        }
+        if stream:
+            return self._stream_chat_completion(payload, "chat completion with file")
         try:
-            payload = {
-                'model': model,
-                'messages': [{'role': 'user', 'content': query}],
-                'files': [{'type': 'file', 'id': file_id}]
-            }
-            response = requests.post(f"{self.base_url}/chat/completions", headers=self.headers, json=payload)
-            response.raise_for_status()
-            
-            data = response.json()
-            choices = []
-            for item in data.get('choices', []):
-                item['message'] = Message(**item['message'])
-                choices.append(Choice(**item))
-            data['choices'] = choices
+            completion = self._create_chat_completion(payload, use_cache, refresh_cache)
             
             logger.info("Successfully received chat completion with file")
-            return ChatCompletion(**data)
+            return completion
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to get chat completion with file: {str(e)}")
             raise Exception(f"Failed to get chat completion with file: {str(e)}")
+
+    def get_chat_completions_batch(self, model_id: str, messages_list: list, max_concurrency: int = 8,
+                                   progress_callback: Optional[Callable[[int, int], None]] = None) -> list[Union[ChatCompletion, ValidationErrorItem]]:
+        '''
+        Run get_chat_completion_with_messages for every message list in parallel over the pooled connection.
+        Results come back in input order; a failed item is returned as a ValidationErrorItem instead of
+        aborting the batch. progress_callback(completed, total) is called as each item finishes.
+        Keep max_concurrency at or below the client's pool_maxsize so every worker reuses a connection.
+        '''
+        if not model_id:
+            raise ValueError("model_id cannot be empty")
+        if not isinstance(messages_list, list):
+            raise ValueError("messages_list must be a list")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        total = len(messages_list)
+        logger.info(f"Requesting {total} chat completions for model {model_id} with concurrency {max_concurrency}")
+        results = [None] * total
+
+        def complete(index: int, messages):
+            try:
+                return index, self.get_chat_completion_with_messages(model_id, messages)
+            except Exception as e:
+                return index, ValidationErrorItem(success=False, message=str(e))
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, total or 1)) as executor:
+            futures = [executor.submit(complete, index, messages) for index, messages in enumerate(messages_list)]
+            for completed, future in enumerate(as_completed(futures), 1):
+                index, result = future.result()
+                results[index] = result
+                if progress_callback:
+                    progress_callback(completed, total)
+
+        failed = sum(isinstance(result, ValidationErrorItem) for result in results)
+        logger.info(f"Finished chat completion batch: {total - failed} succeeded, {failed} failed")
+        return results
     #endregion
 
     #region FILE METHODS
-    def get_files(self) -> list[OpenWebFile]:
+    def get_files(self, lazy: bool = False, content: bool = True) -> list[OpenWebFile]:
         '''
         Get all of the files!
+        With lazy=True returns a LazyList that decodes each file, and its data and meta,
+        only when they are first accessed.
+        With content=False only the metadata is listed; each file's data.content is fetched
+        through get_file_by_id when first read (see fetch_file_contents to load many at once).
         '''
-        logger.info("Fetching all files")
+        logger.info("Fetching all files" if content else "Fetching metadata of all files")
         try:
-            response = requests.get(f"{self.base_url}/v1/files", headers=self.headers)
+            if content:
+                response = self._request('GET', "/v1/files")
+            else:
+                response = self._request('GET', "/v1/files", params={'content': 'false'})
             response.raise_for_status()
             
-            files = []
-            data = response.json()
-            for item in data:
-                item['meta'] = Meta(**item['meta'])
-                item['data'] = FileData(**item['data'])
-                files.append(OpenWebFile(**item))
+            decode = _decoder(OpenWebFile, self.compact_models, lazy)
+            if not content:
+                decode = self._metadata_decoder(decode)
+            items = response.json()
+            files = LazyList(items, decode) if lazy else [decode(item) for item in items]
             
             logger.info(f"Successfully retrieved {len(files)} files")
             return files
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch files: {str(e)}")
             raise Exception(f"Failed to fetch files: {str(e)}")
+
+    def _metadata_decoder(self, decode: Callable[[dict], OpenWebFile]) -> Callable[[dict], OpenWebFile]:
+        '''
+        Wrap a file decoder so the content is left out and loaded on demand instead
+        '''
+        def decode_metadata(item: dict) -> OpenWebFile:
+            # Copies, so the raw items (e.g. those kept by a LazyList) keep their data
+            item = dict(item)
+            data = dict(item.pop('data', None) or {})
+            data.pop('content', None)  # servers ignoring content=false still send it
+            file = decode(item)
+            file.data = RemoteFileData(file.id, self.file_contents, extra_fields=data)
+            return file
+        return decode_metadata
+
+    def _fetch_file_content(self, file_id: str) -> Optional[str]:
+        file = self.get_file_by_id(file_id)
+        return file.data.content if file.data else None
+
+    def fetch_file_contents(self, files: list, max_concurrency: Optional[int] = None) -> dict:
+        '''
+        Load the contents of many files (OpenWebFile objects or ids) concurrently, for
+        instance before reading data.content of files listed with content=False.
+        Returns {file_id: content}; contents already fetched come from the cache. A file that
+        could not be fetched maps to the exception raised instead, without losing the others.
+        '''
+        file_ids = [file if isinstance(file, str) else file.id for file in files]
+        logger.info(f"Fetching content of {len(file_ids)} files")
+        contents = self.file_contents.get_many(file_ids, max_concurrency)
+        for file in files:
+            if (not isinstance(file, str) and isinstance(file.data, RemoteFileData)
+                    and not isinstance(contents[file.id], Exception)):
+                file.data.content = contents[file.id]
+        failed = sum(isinstance(content, Exception) for content in contents.values())
+        if failed:
+            logger.warning(f"Failed to fetch the content of {failed} of {len(contents)} files")
+        return contents
     
+    def iter_files(self, chunk_size: int = 65536) -> JSONArrayStream:
+        '''
+        Iterate over all files, decoding them one at a time while the response is read so
+        memory stays bounded. Close the iterator (or use it in a with block) to stop early.
+        '''
+        return self._stream_list("/v1/files", OpenWebFile, "files", chunk_size)
+
     def get_file_by_id(self, id: str) -> OpenWebFile:
         '''
         Get a single file by id
@@ -194,15 +674,13 @@ class OpenWebUI:
             
         logger.info(f"Fetching file with id: {id}")
         try:
-            response = requests.get(f"{self.base_url}/v1/files/{id}", headers=self.headers)
+            response = self._request('GET', f"/v1/files/{id}")
             response.raise_for_status()
             
-            data = response.json()
-            data['meta'] = Meta(**data['meta'])
-            data['data'] = FileData(**data['data'])
+            file = _parse_file(response.json(), self.compact_models)
             
-            logger.info(f"Successfully retrieved file: {data.get('filename', id)}")
-            return OpenWebFile(**data)
+            logger.info(f"Successfully retrieved file: {file.filename or id}")
+            return file
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch file {id}: {str(e)}")
             raise Exception(f"Failed to fetch file {id}: {str(e)}")
@@ -216,103 +694,339 @@ class OpenWebUI:
             
         logger.info(f"Deleting file with id: {id}")
         try:
-            response = requests.delete(f"{self.base_url}/v1/files/{id}", headers=self.headers)
+            response = self._request('DELETE', f"/v1/files/{id}")
             data = response.json()
             
             if response.status_code == 200:
                 data['success'] = True
+                # Only a file that is really gone is forgotten, a failed delete leaves it on the server
+                self.file_contents.invalidate(id)
+                self.knowledge_index.invalidate_file(id, wait=True)  # deleted files leave their knowledge items
+                self._content_hashes.pop(id, None)
+                if self.upload_index is not None:
+                    self.upload_index.forget(id)
                 logger.info(f"Successfully deleted file: {id}")
             else:
                 data['success'] = False
                 data['message'] = data.get('detail', 'Unknown error occurred')
                 logger.warning(f"Failed to delete file {id}: {data['message']}")
                 
-            return ValidationErrorItem(**data)
+            return ValidationErrorItem.from_dict(data)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to delete file {id}: {str(e)}")
             raise Exception(f"Failed to delete file {id}: {str(e)}")
     
-    def update_file_content_by_id(self, id: str, new_content: str) -> ValidationErrorItem:
+    def get_files_by_ids(self, ids: list, max_concurrency: int = 8, cancel: Optional[threading.Event] = None,
+                         progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        get_file_by_id for many ids in parallel over the pooled connection.
+        Returns {id: OpenWebFile or ValidationErrorItem}; see delete_files for cancel and rate limiting.
+        '''
+        return self._bulk(ids, self.get_file_by_id, max_concurrency, cancel, progress_callback, "bulk fetch")
+
+    def delete_files(self, ids: list, max_concurrency: int = 8, cancel: Optional[threading.Event] = None,
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        delete_file_by_id for many ids in parallel over the pooled connection.
+        Returns {id: ValidationErrorItem}. Requests go through the client's rate limiter, so a
+        RateLimit on "/v1/files" paces the whole job. Setting cancel (a threading.Event) stops it:
+        deletions in flight finish, the rest are reported as "Cancelled".
+        progress_callback(completed, total) is called as each id finishes.
+        '''
+        return self._bulk(ids, self.delete_file_by_id, max_concurrency, cancel, progress_callback, "bulk delete")
+
+    def update_file_content_by_id(self, id: str, new_content: str, skip_unchanged: bool = False,
+                                  compress: bool = False) -> ValidationErrorItem:
         '''
         Update file content by id
+        With skip_unchanged=True nothing is sent (and nothing re-embedded) when the content equals what
+        the server holds: compared by hash with the content this client last sent or cached, or else
+        with the server's hash of the file.
+        compress=True sends contents of 1 KiB or more gzip-compressed. If the server rejects that, the
+        update is resent uncompressed and the client stops compressing.
+        '''
+        return self._update_file_content(id, new_content, skip_unchanged, compress, None)
+
+    def update_file_contents(self, contents: dict, max_concurrency: int = 8, skip_unchanged: bool = True,
+                             compress: bool = False, cancel: Optional[threading.Event] = None,
+                             progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        update_file_content_by_id for many files ({id: new_content}) in parallel, returning
+        {id: ValidationErrorItem}. Skipped files succeed with message "Content unchanged"; the server
+        hashes they are compared with come from a single metadata listing. See delete_files for cancel.
+        '''
+        if not isinstance(contents, dict):
+            raise ValueError("contents must be a dict")
+        listed = None
+        if skip_unchanged and sum(self._content_hashes.get(id) is None for id in contents) > 1:
+            # One listing is cheaper than fetching every file to read its hash
+            files = self.get_files(lazy=True, content=False)
+            listed = dict(zip(files.pluck('id'), map(server_hashes, files.pluck('hash'))))
+
+        def update(id: str) -> ValidationErrorItem:
+            hashes = None if listed is None else listed.get(id, [])
+            return self._update_file_content(id, contents[id], skip_unchanged, compress, hashes)
+
+        return self._bulk(
+            list(contents), update,
+            max_concurrency, cancel, progress_callback, "bulk content update"
+        )
+
+    def _update_file_content(self, id: str, new_content: str, skip_unchanged: bool, compress: bool,
+                             listed_hashes: Optional[list]) -> ValidationErrorItem:
+        '''
+        Update a file's content; listed_hashes are its hashes from a listing, None when not looked up
         '''
         if not id:
             raise ValueError("id cannot be empty")
         if new_content is None:  # Allow empty string but not None
             raise ValueError("new_content cannot be None")
             
-        logger.info(f"Updating content for file with id: {id}")
         try:
-            payload = {
-                'content': new_content
-            }
-            response = requests.post(
-                f"{self.base_url}/v1/files/{id}/data/content/update", 
-                json=payload, 
-                headers=self.headers)
+            digest = _text_hash(new_content)
+            if skip_unchanged and digest in self._known_content_hashes(id, listed_hashes):
+                logger.info(f"Content of file {id} is unchanged, skipping the update")
+                return ValidationErrorItem(success=True, message="Content unchanged")
+
+            logger.info(f"Updating content for file with id: {id}")
+            response = self._post_file_content(id, new_content, compress)
             
             data = response.json()
             
             if response.status_code == 200:
                 data['success'] = True
+                # A failed update leaves the old content on the server, and what is known about it valid
+                self.file_contents.invalidate(id)
+                if self.upload_index is not None:
+                    self.upload_index.forget(id)
+                self._content_hashes[id] = digest
                 logger.info(f"Successfully updated file content: {id}")
             else:
                 data['success'] = False
                 data['message'] = data.get('detail', 'Unknown error occurred')
                 logger.warning(f"Failed to update file {id}: {data['message']}")
                 
-            return ValidationErrorItem(**data)
+            return ValidationErrorItem.from_dict(data)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to update file {id}: {str(e)}")
             raise Exception(f"Failed to update file {id}: {str(e)}")
+
+    def _known_content_hashes(self, id: str, listed: Optional[list]) -> set:
+        '''
+        SHA-256 hashes of what the server holds for a file: the content this client last sent,
+        else its cached content, else the listed hashes, else what GET /v1/files/{id} reports
+        '''
+        known = self._content_hashes.get(id)
+        if known is not None:
+            return {known}
+        cached = self.file_contents.cache.peek(id)
+        if cached is not None:
+            return {_text_hash(cached)}
+        if listed is not None:
+            return set(listed)
+
+        response = self._request('GET', f"/v1/files/{id}")
+        response.raise_for_status()
+        return _file_hashes(response.json())
+
+    def _post_file_content(self, id: str, new_content: str, compress: bool):
+        path = f"/v1/files/{id}/data/content/update"
+        payload = {
+            'content': new_content
+        }
+        if compress and self._gzip_requests:
+            body = self.json_codec.dumps(payload)
+            if len(body) >= _GZIP_MIN_SIZE:
+                response = self._request('POST', path, data=gzip.compress(body, compresslevel=6),
+                                         headers={'Content-Type': 'application/json', 'Content-Encoding': 'gzip'})
+                if response.status_code not in (400, 415, 422):
+                    return response
+                response.close()
+                plain = self._request('POST', path, json=payload)
+                if plain.status_code == 200:
+                    logger.info("Server does not accept gzip-compressed requests, sending them uncompressed")
+                    self._gzip_requests = False
+                return plain
+        return self._request('POST', path, json=payload)
         
-    def upload_file(self, file_path: str):
+    def upload_file(self, file_path: UploadSource, filename: Optional[str] = None,
+                    progress_callback: Optional[Callable[[int, Optional[int]], None]] = None, chunk_size: int = 65536):
         '''
         Upload a file
+        file_path may also be bytes, a memoryview or a binary file-like object (name it with filename).
+        The body is streamed chunk_size bytes at a time; progress_callback(sent, total) follows it.
+        With an upload_index, content uploaded before is not sent again: the existing file is returned.
         '''
-        if not file_path:
-            raise ValueError("file_path cannot be empty")
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"File not found: {file_path}")
+        encoder = self._multipart(file_path, filename, progress_callback, chunk_size, "file_path", "File")
+        description = encoder.path or encoder.filename
             
-        logger.info(f"Uploading file: {file_path}")
         try:
-            with open(file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(f"{self.base_url}/v1/files/", headers=self.headers, files=files)
+            digest = self._upload_digest(encoder) if self.upload_index is not None else None
+            if digest is not None:
+                file = self._indexed_file(digest)
+                if file is not None:
+                    logger.info(f"File {description} already uploaded as {file.id}")
+                    return file
+
+            logger.info(f"Uploading file: {description}")
+            response = self._request('POST', "/v1/files/", data=encoder, headers={'Content-Type': encoder.content_type})
                 
             data = response.json()
             
             if response.status_code == 200:
                 data['success'] = True
-                data['meta'] = Meta(**data['meta'])
-                data['data'] = FileData(**data['data'])
-                logger.info(f"Successfully uploaded file: {os.path.basename(file_path)}")
-                return OpenWebFile(**data)
+                logger.info(f"Successfully uploaded file: {encoder.filename}")
+                file = _parse_file(data, self.compact_models)
+                if digest is not None:
+                    self.upload_index.record(digest, file.id, file.filename, data)
+                return file
             else:
                 data['success'] = False
                 data['message'] = data.get('detail', 'Unknown error occurred')
-                logger.warning(f"Failed to upload file {file_path}: {data['message']}")
-                return ValidationErrorItem(**data)
+                logger.warning(f"Failed to upload file {description}: {data['message']}")
+                return ValidationErrorItem.from_dict(data)
+        except CircuitOpenError:
+            raise
         except Exception as e:
-            logger.error(f"Failed to upload file {file_path}: {str(e)}")
-            raise Exception(f"Failed to upload file {file_path}: {str(e)}")
+            logger.error(f"Failed to upload file {description}: {str(e)}")
+            raise Exception(f"Failed to upload file {description}: {str(e)}")
+
+    def _upload_digest(self, encoder: MultipartEncoder) -> Optional[str]:
+        '''
+        Content hash of an upload for the upload index; None for streams, which cannot be read twice
+        '''
+        if encoder.path is not None:
+            return self.upload_index.hash_of(encoder.path)
+        if encoder.data is not None:
+            return hashlib.sha256(encoder.data).hexdigest()
+        return None
+
+    def _indexed_file(self, digest: str) -> Optional[OpenWebFile]:
+        '''
+        The server file the upload index has for this content. Entries not verified for a while,
+        or indexed without the server's record of the file, are checked on the server first and
+        dropped if the file is gone.
+        '''
+        record = self.upload_index.lookup(digest)
+        if record is None:
+            return None
+        if record.file is not None and not self.upload_index.is_stale(record):
+            return _parse_file(record.file, self.compact_models)
+
+        response = self._request('GET', f"/v1/files/{record.file_id}")
+        if response.status_code == 404:
+            logger.info(f"Indexed file {record.file_id} no longer exists on the server")
+            self.upload_index.forget(record.file_id)
+            return None
+        response.raise_for_status()
+        data = response.json()
+        data['success'] = True
+        self.upload_index.record(digest, record.file_id, data.get('filename'), data)
+        return _parse_file(data, self.compact_models)
+
+    @staticmethod
+    def _multipart(source: UploadSource, filename: Optional[str], progress_callback, chunk_size: int,
+                   argument: str, kind: str) -> MultipartEncoder:
+        '''
+        Validate an upload source and wrap it in a streaming multipart body
+        '''
+        if source is None or (isinstance(source, (str, bytes)) and not source and not filename):
+            raise ValueError(f"{argument} cannot be empty")
+        if isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+            raise FileNotFoundError(f"{kind} not found: {source}")
+        return MultipartEncoder(source, filename=filename, chunk_size=chunk_size, progress_callback=progress_callback)
+
+    def upload_files(self, paths: list, max_concurrency: int = 8, hash_workers: Optional[int] = None,
+                     skip_existing: bool = True,
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> dict:
+        '''
+        Upload many files in parallel, skipping content the server already has.
+        Files are first hashed (SHA-256) on hash_workers threads. A file whose hash matches an existing
+        server file, or another file of the batch, is not uploaded again. The server hashes extracted
+        text, so existing binary documents (pdf, docx...) are not recognized and are uploaded again.
+        With an upload_index, unchanged files are not hashed again and content uploaded by earlier
+        runs is resolved from the index, without listing the server's files.
+        Returns {path: OpenWebFile or ValidationErrorItem}; files sharing content map to the same file.
+        progress_callback(completed, total) is called as each upload finishes.
+        '''
+        if not isinstance(paths, list):
+            raise ValueError("paths must be a list")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        paths = list(dict.fromkeys(map(os.fspath, paths)))
+        index = self.upload_index
+        logger.info(f"Hashing {len(paths)} files for upload")
+        results = {}
+        by_hash = {}
+        digests = index.hash_many(paths, hash_workers) if index is not None else hash_files(paths, hash_workers)
+        for path, digest in digests.items():
+            if isinstance(digest, Exception):
+                results[path] = ValidationErrorItem(success=False, message=str(digest))
+            else:
+                by_hash.setdefault(digest, []).append(path)
+
+        # Content in the upload index is resolved by upload_file without listing the server
+        unknown = [digest for digest in by_hash if index is None or index.lookup(digest) is None]
+        existing = self._files_by_hash(unknown) if skip_existing and unknown else {}
+        skipped = 0
+        for digest, file in existing.items():
+            file.success = True
+            if index is not None:
+                index.record(digest, file.id, file.filename)
+            for path in by_hash.pop(digest):
+                results[path] = file
+                skipped += 1
+
+        total = len(by_hash)
+        logger.info(f"Uploading {total} files with concurrency {max_concurrency}, {skipped} already on the server")
+
+        def upload(group: list):
+            try:
+                return group, self.upload_file(group[0])
+            except Exception as e:
+                return group, ValidationErrorItem(success=False, message=str(e))
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, total or 1)) as executor:
+            futures = [executor.submit(upload, group) for group in by_hash.values()]
+            for completed, future in enumerate(as_completed(futures), 1):
+                group, result = future.result()
+                for path in group:
+                    results[path] = result
+                if progress_callback:
+                    progress_callback(completed, total)
+
+        failed = sum(isinstance(result, ValidationErrorItem) for result in results.values())
+        logger.info(f"Finished bulk upload: {len(paths) - failed} files available, {failed} failed")
+        return {path: results[path] for path in paths}
+
+    def _files_by_hash(self, digests) -> dict:
+        '''
+        Server files whose content hash is one of digests, listed without content and
+        decoding only the matches
+        '''
+        digests = set(digests)
+        files = self.get_files(lazy=True, content=False)
+        matches = {}
+        for index, value in enumerate(files.pluck('hash')):
+            for digest in server_hashes(value):
+                if digest in digests and digest not in matches:
+                    matches[digest] = files[index]
+        return matches
     #endregion
 
     #region KNOWLEDGE METHODS
-    def get_knowledge(self) -> list[Knowledge]:
+    def get_knowledge(self, lazy: bool = False) -> list[Knowledge]:
         '''
         Get all knowledge items
+        With lazy=True returns a LazyList that decodes each item, and its files, only when first accessed.
         '''
         logger.info("Fetching all knowledge items")
         try:
-            response = requests.get(f"{self.base_url}/v1/knowledge", headers=self.headers)
+            response = self._request('GET', "/v1/knowledge")
             response.raise_for_status()
             
-            data = response.json()
-            knowledges = []
-            for item in data:
-                knowledges.append(Knowledge(**item))
+            knowledges = _parse_list(response.json(), Knowledge, self.compact_models, lazy)
             
             logger.info(f"Successfully retrieved {len(knowledges)} knowledge items")
             return knowledges
@@ -320,6 +1034,12 @@ class OpenWebUI:
             logger.error(f"Failed to fetch knowledge items: {str(e)}")
             raise Exception(f"Failed to fetch knowledge items: {str(e)}")
 
+    def iter_knowledge(self, chunk_size: int = 65536) -> JSONArrayStream:
+        '''
+        Iterate over all knowledge items, decoded one at a time while the response is read
+        '''
+        return self._stream_list("/v1/knowledge", Knowledge, "knowledge items", chunk_size)
+
     def get_knowledge_by_id(self, id: str):
         '''
         Get a single knowledge item by id
@@ -329,20 +1049,41 @@ class OpenWebUI:
             
         logger.info(f"Fetching knowledge item with id: {id}")
         try:
-            response = requests.get(f"{self.base_url}/v1/knowledge/{id}", headers=self.headers)
+            response = self._request('GET', f"/v1/knowledge/{id}")
             data = response.json()
             
             if response.status_code == 200:
                 logger.info(f"Successfully retrieved knowledge item: {id}")
-                return Knowledge(**data)
+                return _decoder(Knowledge, self.compact_models)(data)
             else:
                 data['success'] = False
                 logger.warning(f"Failed to fetch knowledge item {id}: {data.get('detail', 'Unknown error')}")
-                return ValidationErrorItem(**data)
+                return ValidationErrorItem.from_dict(data)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to fetch knowledge item {id}: {str(e)}")
             raise Exception(f"Failed to fetch knowledge item {id}: {str(e)}")
 
+    def get_knowledge_ids_for_file(self, file_id: str) -> frozenset:
+        '''
+        Ids of the knowledge items containing a file, answered from the knowledge index
+        '''
+        if not file_id:
+            raise ValueError("file_id cannot be empty")
+        return self.knowledge_index.knowledge_of(file_id)
+
+    def _list_knowledge(self) -> list:
+        '''
+        The raw knowledge listing for the knowledge index, without decoding it
+        '''
+        response = self._request('GET', "/v1/knowledge")
+        response.raise_for_status()
+        return response.json()
+
+    def _knowledge_file_ids(self, knowledge_id: str) -> list:
+        response = self._request('GET', f"/v1/knowledge/{knowledge_id}")
+        response.raise_for_status()
+        return [file['id'] for file in response.json().get('files') or []]
+
     def add_remove_file_to_knowledge(self, knowledge_id: str, file_id: str, addRemove: bool):
         '''
         Add or remove a file to a knowledge item
@@ -357,39 +1098,136 @@ class OpenWebUI:
         
         try:
             payload = {'file_id': file_id}
-            url = f"{self.base_url}/v1/knowledge/{knowledge_id}/file/{'add' if addRemove else 'remove'}"
+            path = f"/v1/knowledge/{knowledge_id}/file/{'add' if addRemove else 'remove'}"
 
-            response = requests.post(url, json=payload, headers=self.headers)
+            response = self._request('POST', path, json=payload)
+            self.knowledge_index.invalidate(knowledge_id, wait=True)
             data = response.json()
             
             if response.status_code == 200:
                 logger.info(f"Successfully {action.lower()}ed file {file_id} {'to' if addRemove else 'from'} knowledge item {knowledge_id}")
-                return Knowledge(**data)
+                return _decoder(Knowledge, self.compact_models)(data)
             else:
                 data['success'] = False
                 data['message'] = data.get('detail', 'Unknown error occurred')
                 logger.warning(f"Failed to {action.lower()} file: {data['message']}")
-                return ValidationErrorItem(**data)
+                return ValidationErrorItem.from_dict(data)
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to {action.lower()} file: {str(e)}")
             raise Exception(f"Failed to {action.lower()} file: {str(e)}")
 
+    def add_files_to_knowledge(self, knowledge_id: str, file_ids: list, max_concurrency: int = 8,
+                               batch_size: int = 100) -> KnowledgeFilesResult:
+        '''
+        Add many files to a knowledge item and return one summary. Uses the server's batch
+        endpoint, batch_size files per request; servers without it get concurrent per-file
+        calls. Unlike add_remove_file_to_knowledge, no Knowledge response is decoded.
+        '''
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        return self._change_knowledge_files(knowledge_id, file_ids, True, max_concurrency, batch_size)
+
+    def remove_files_from_knowledge(self, knowledge_id: str, file_ids: list,
+                                    max_concurrency: int = 8) -> KnowledgeFilesResult:
+        '''
+        Remove many files from a knowledge item with concurrent per-file calls and return one summary
+        '''
+        return self._change_knowledge_files(knowledge_id, file_ids, False, max_concurrency, None)
+
+    def _change_knowledge_files(self, knowledge_id: str, file_ids: list, add: bool, max_concurrency: int,
+                                batch_size: Optional[int]) -> KnowledgeFilesResult:
+        if not knowledge_id:
+            raise ValueError("knowledge_id cannot be empty")
+        if not isinstance(file_ids, list):
+            raise ValueError("file_ids must be a list")
+
+        file_ids = list(dict.fromkeys(file_ids))
+        result = KnowledgeFilesResult(knowledge_id=knowledge_id)
+        pending = file_ids
+        if add and self._knowledge_batch_add:
+            pending = []
+            for start in range(0, len(file_ids), batch_size):
+                outcomes = self._batch_add_to_knowledge(knowledge_id, file_ids[start:start + batch_size])
+                if outcomes is None:
+                    pending = file_ids[start:]
+                    break
+                for file_id, error in outcomes.items():
+                    if error is None:
+                        result.succeeded.append(file_id)
+                    else:
+                        result.failed[file_id] = error
+
+        if pending:
+            description = "adding files to knowledge" if add else "removing files from knowledge"
+            outcomes = self._bulk(pending, lambda file_id: self._change_knowledge_file(knowledge_id, file_id, add),
+                                  max_concurrency, None, None, description)
+            for file_id, outcome in outcomes.items():
+                if outcome.success:
+                    result.succeeded.append(file_id)
+                else:
+                    result.failed[file_id] = outcome.message
+
+        self.knowledge_index.invalidate(knowledge_id, wait=True)
+        logger.info(f"{'Added' if add else 'Removed'} {len(result.succeeded)} files "
+                    f"{'to' if add else 'from'} knowledge item {knowledge_id}, {len(result.failed)} failed")
+        return result
+
+    def _batch_add_to_knowledge(self, knowledge_id: str, file_ids: list) -> Optional[dict]:
+        '''
+        Add a batch of files in one request: {file_id: error or None}, or None when the
+        server has no batch endpoint
+        '''
+        response = self._request('POST', f"/v1/knowledge/{knowledge_id}/files/batch/add",
+                                 json=[{'file_id': file_id} for file_id in file_ids])
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        outcomes, endpoint_missing = _batch_add_outcomes(response.status_code, data, file_ids)
+        if endpoint_missing:
+            logger.info("Server has no batch endpoint for knowledge files, adding them one by one")
+            self._knowledge_batch_add = False
+        return outcomes
+
+    def _change_knowledge_file(self, knowledge_id: str, file_id: str, add: bool) -> ValidationErrorItem:
+        '''
+        add_remove_file_to_knowledge without decoding the returned Knowledge
+        '''
+        if not file_id:
+            raise ValueError("file_id cannot be empty")
+        response = self._request('POST', f"/v1/knowledge/{knowledge_id}/file/{'add' if add else 'remove'}",
+                                 json={'file_id': file_id})
+        if response.status_code == 200:
+            return ValidationErrorItem(success=True)
+        return ValidationErrorItem(success=False, message=_error_detail(response))
+
+    def sync_directory_to_knowledge(self, knowledge_id: str, directory: str, checkpoint_path: Optional[str] = None,
+                                    include: Optional[List[str]] = None, max_concurrency: int = 8,
+                                    remove_missing: bool = True, delete_removed: bool = False,
+                                    progress_callback: Optional[Callable[[int, int], None]] = None) -> SyncReport:
+        '''
+        Mirror a directory into a knowledge item, sending only added, changed and removed files
+        (see KnowledgeSync). The synced state is kept in checkpoint_path, by default a hidden file
+        in the directory; include takes glob patterns of relative paths, e.g. ["*.md", "docs/*"].
+        '''
+        return KnowledgeSync(self, knowledge_id, directory, checkpoint_path=checkpoint_path, include=include,
+                             max_concurrency=max_concurrency, remove_missing=remove_missing,
+                             delete_removed=delete_removed, progress_callback=progress_callback).run()
+
     #endregion
 
     #region USER METHODS
-    def get_users(self) -> list[User]:
+    def get_users(self, lazy: bool = False) -> list[User]:
         '''
         Get all users
+        With lazy=True returns a LazyList that decodes each user when it is first accessed.
         '''
         logger.info("Fetching all users")
         try:
-            response = requests.get(f"{self.base_url}/v1/users/", headers=self.headers)
+            response = self._request('GET', "/v1/users/")
             response.raise_for_status()
             
-            data = response.json()
-            users = []
-            for item in data:
-                users.append(User(**item))
+            users = _parse_list(response.json(), User, self.compact_models, lazy)
             
             logger.info(f"Successfully retrieved {len(users)} users")
             return users
@@ -397,23 +1235,27 @@ class OpenWebUI:
             logger.error(f"Failed to fetch users: {str(e)}")
             raise Exception(f"Failed to fetch users: {str(e)}")
 
+    def iter_users(self, chunk_size: int = 65536) -> JSONArrayStream:
+        '''
+        Iterate over all users, decoded one at a time while the response is read
+        '''
+        return self._stream_list("/v1/users/", User, "users", chunk_size)
+
     #endregion
 
     #region AUDIO METHODS
-    def transcribe_audio(self, audio_file_path: str):
+    def transcribe_audio(self, audio_file_path: UploadSource, filename: Optional[str] = None,
+                         progress_callback: Optional[Callable[[int, Optional[int]], None]] = None, chunk_size: int = 65536):
         '''
         Transcribe audio file
+        audio_file_path may also be bytes, a memoryview or a binary file-like object, streamed as in upload_file.
         '''
-        if not audio_file_path:
-            raise ValueError("audio_file_path cannot be empty")
-        if not os.path.exists(audio_file_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_file_path}")
+        encoder = self._multipart(audio_file_path, filename, progress_callback, chunk_size, "audio_file_path", "Audio file")
             
-        logger.info(f"Transcribing audio file: {audio_file_path}")
+        logger.info(f"Transcribing audio file: {encoder.path or encoder.filename}")
         try:
-            with open(audio_file_path, 'rb') as f:
-                files = {'file': f}
-                response = requests.post(f"{self.base_url}/audio/api/v1/transcriptions", headers=self.headers, files=files)
+            response = self._request('POST', "/audio/api/v1/transcriptions", data=encoder,
+                                     headers={'Content-Type': encoder.content_type})
                 
             if response.status_code == 200:
                 logger.info("Successfully transcribed audio file")
@@ -422,6 +1264,8 @@ class OpenWebUI:
                 error_msg = f"Failed to transcribe audio: {response.text}"
                 logger.error(error_msg)
                 return {"error": error_msg}
+        except CircuitOpenError:
+            raise
         except Exception as e:
             logger.error(f"Failed to transcribe audio file: {str(e)}")
             raise Exception(f"Failed to transcribe audio file: {str(e)}")
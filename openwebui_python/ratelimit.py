@@ -0,0 +1,204 @@
+# ratelimit.py
+
+import threading
+import time
+from typing import Dict, Optional
+
+class RateLimit:
+    '''
+    Limits for one scope (all requests, an endpoint or a model).
+
+    requests_per_second is the starting token bucket rate and max_concurrency the
+    starting number of requests in flight; None leaves that dimension unlimited.
+    With adaptive limiting the rate moves between min_requests_per_second and
+    peak_requests_per_second and the concurrency between 1 and peak_concurrency;
+    the peaks default to the starting values.
+    '''
+    def __init__(self, requests_per_second: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 burst: Optional[float] = None, min_requests_per_second: float = 0.1,
+                 peak_requests_per_second: Optional[float] = None, peak_concurrency: Optional[int] = None):
+        if requests_per_second is not None and requests_per_second <= 0:
+            raise ValueError("requests_per_second must be positive")
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.burst = burst
+        self.min_requests_per_second = min_requests_per_second
+        self.peak_requests_per_second = peak_requests_per_second or requests_per_second
+        self.peak_concurrency = peak_concurrency or max_concurrency
+
+class _AdaptiveLimit:
+    '''
+    Token bucket plus concurrency gate whose limits follow AIMD: they grow additively
+    on success and shrink multiplicatively on 429s or when latency rises well above
+    its baseline.
+    '''
+    def __init__(self, limit: RateLimit, adaptive: bool, additive_increase: float, decrease_factor: float,
+                 latency_tolerance: float, cooldown: float):
+        self.limit = limit
+        self.adaptive = adaptive
+        self.additive_increase = additive_increase
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+
+        self.rate = limit.requests_per_second
+        self.concurrency = float(limit.max_concurrency) if limit.max_concurrency else None
+        self.burst = limit.burst or max(1.0, self.rate or 1.0)
+        self.in_flight = 0
+        self.throttled = 0
+        self.decreases = 0
+        self.latency_ewma = None
+        self.latency_baseline = None
+
+        self._tokens = self.burst
+        self._refilled_at = time.monotonic()
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.concurrency is not None and self.in_flight >= int(self.concurrency):
+                self._cond.wait()
+            self.in_flight += 1
+        if self.rate is None:
+            return
+        try:
+            while True:
+                with self._cond:
+                    now = time.monotonic()
+                    self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+                    self._refilled_at = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                time.sleep(wait)
+        except BaseException:
+            # Interrupted while waiting for a token: give the concurrency slot back
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+            raise
+
+    def release(self, status_code: Optional[int], latency: float):
+        with self._cond:
+            self.in_flight -= 1
+            if status_code == 429:
+                self.throttled += 1
+            if self.adaptive and status_code is not None:
+                self._adapt(status_code, latency)
+            self._cond.notify_all()
+
+    def _adapt(self, status_code: int, latency: float):
+        congested = status_code == 429
+        if status_code < 400:
+            self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+            # The baseline follows the best latency seen and slowly forgets it
+            if self.latency_baseline is None or self.latency_ewma < self.latency_baseline:
+                self.latency_baseline = self.latency_ewma
+            else:
+                self.latency_baseline += 0.01 * (self.latency_ewma - self.latency_baseline)
+            congested = self.latency_ewma > self.latency_tolerance * self.latency_baseline
+
+        now = time.monotonic()
+        if congested:
+            if now - self._decreased_at < self.cooldown:
+                return  # one decrease per cooldown, however many requests were in flight
+            self._decreased_at = now
+            self.decreases += 1
+            if self.rate is not None:
+                self.rate = max(self.limit.min_requests_per_second, self.rate * self.decrease_factor)
+                self._tokens = min(self._tokens, 1.0)
+            if self.concurrency is not None:
+                self.concurrency = max(1.0, self.concurrency * self.decrease_factor)
+        elif status_code < 400:
+            if self.rate is not None:
+                self.rate = min(self.limit.peak_requests_per_second, self.rate + self.additive_increase)
+            if self.concurrency is not None:
+                self.concurrency = min(float(self.limit.peak_concurrency), self.concurrency + self.additive_increase)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'requests_per_second': self.rate,
+                'max_concurrency': int(self.concurrency) if self.concurrency is not None else None,
+                'in_flight': self.in_flight,
+                'throttled': self.throttled,
+                'decreases': self.decreases,
+                'latency_ewma': self.latency_ewma
+            }
+
+class RateLimiter:
+    '''
+    Client-side rate limiter for OpenWebUI.
+
+    default applies to every request, endpoints maps a path prefix (e.g. "/chat/completions")
+    to its own RateLimit and models maps a model_id to one. A request waits for its model,
+    endpoint and global limits in that order. With adaptive=True each limit adjusts itself
+    AIMD-style: additive_increase per successful request, times decrease_factor on a 429
+    or when latency exceeds latency_tolerance times its baseline, at most once per cooldown.
+    '''
+    def __init__(self, default: Optional[RateLimit] = None, endpoints: Optional[Dict[str, RateLimit]] = None,
+                 models: Optional[Dict[str, RateLimit]] = None, adaptive: bool = True, additive_increase: float = 0.1,
+                 decrease_factor: float = 0.5, latency_tolerance: float = 3.0, cooldown: float = 1.0):
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+
+        def build(limit: RateLimit) -> _AdaptiveLimit:
+            return _AdaptiveLimit(limit, adaptive, additive_increase, decrease_factor, latency_tolerance, cooldown)
+
+        self.default = build(default) if default else None
+        # Longest prefix first so the most specific endpoint wins
+        self.endpoints = {path: build(limit) for path, limit in sorted((endpoints or {}).items(), key=lambda item: -len(item[0]))}
+        self.models = {model_id: build(limit) for model_id, limit in (models or {}).items()}
+
+    def _limits_for(self, path: str, model_id: Optional[str]) -> list:
+        limits = []
+        if model_id is not None and model_id in self.models:
+            limits.append(self.models[model_id])
+        for prefix, limit in self.endpoints.items():
+            if path.startswith(prefix):
+                limits.append(limit)
+                break
+        if self.default:
+            limits.append(self.default)
+        return limits
+
+    def acquire(self, path: str, model_id: Optional[str] = None) -> list:
+        '''
+        Block until the request may be sent; pass the returned permits to release()
+        '''
+        limits = self._limits_for(path, model_id)
+        acquired = []
+        try:
+            for limit in limits:
+                limit.acquire()
+                acquired.append(limit)
+        except BaseException:
+            for limit in acquired:
+                limit.release(None, 0.0)
+            raise
+        return acquired
+
+    def release(self, permits: list, status_code: Optional[int], latency: float):
+        '''
+        Return the permits of a finished request along with its outcome
+        '''
+        for limit in permits:
+            limit.release(status_code, latency)
+
+    def stats(self) -> dict:
+        '''
+        Current limits and counters per scope
+        '''
+        stats = {}
+        if self.default:
+            stats['default'] = self.default.stats()
+        for path, limit in self.endpoints.items():
+            stats[f"endpoint:{path}"] = limit.stats()
+        for model_id, limit in self.models.items():
+            stats[f"model:{model_id}"] = limit.stats()
+        return stats
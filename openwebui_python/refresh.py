@@ -0,0 +1,99 @@
+# refresh.py
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger('OpenWebUI')
+
+class StaleWhileRevalidate:
+    '''
+    Base of the client's cached views of server state (ModelCatalog, KnowledgeIndex).
+
+    Subclasses implement _fetch(), which loads and returns new state, _install(state), which
+    swaps it in, and _snapshot(), which returns the current state; the last two are called
+    with self._lock held, so readers never see a partial update. The first lookup loads
+    synchronously; afterwards, once the state is older than ttl seconds, lookups keep
+    answering from it while a background thread refreshes it. A failed background refresh
+    keeps the old state and is retried after retry_interval seconds.
+    '''
+    _description = 'cache'
+    _thread_name = 'openwebui-refresh'
+
+    def __init__(self, ttl: float, retry_interval: float):
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.errors = 0
+        self._expires_at = None
+        self._refreshing = False
+        self._must_refresh = False
+        self._invalidations = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def _fetch(self):
+        raise NotImplementedError
+
+    def _install(self, state):
+        raise NotImplementedError
+
+    def _snapshot(self):
+        raise NotImplementedError
+
+    def refresh(self):
+        '''
+        Refresh now, blocking until it is done
+        '''
+        with self._load_lock:
+            self._reload()
+
+    def _reload(self):
+        # Called with self._load_lock held
+        with self._lock:
+            invalidations = self._invalidations
+        state = self._fetch()
+        with self._lock:
+            self._install(state)
+            self._expires_at = time.monotonic() + self.ttl
+            # An invalidation that arrived while loading may not be reflected yet
+            if self._invalidations == invalidations:
+                self._must_refresh = False
+
+    def _refresh_in_background(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            logger.warning(f"Failed to refresh {self._description}: {str(e)}")
+            with self._lock:
+                self.errors += 1
+                self._expires_at = time.monotonic() + self.retry_interval
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _current(self):
+        with self._lock:
+            if self._expires_at is not None and not self._must_refresh:
+                if not self._refreshing and time.monotonic() >= self._expires_at:
+                    self._refreshing = True
+                    threading.Thread(target=self._refresh_in_background, name=self._thread_name, daemon=True).start()
+                return self._snapshot()
+        # First lookup, or the first one after invalidate(wait=True): concurrent callers wait for a single fetch
+        with self._load_lock:
+            with self._lock:
+                stale = self._expires_at is None or self._must_refresh
+            if stale:
+                self._reload()
+        with self._lock:
+            return self._snapshot()
+
+    def invalidate(self, wait: bool = False):
+        '''
+        Mark the state stale. The next lookup refreshes it in the background, or first,
+        before answering, with wait=True.
+        '''
+        with self._lock:
+            if self._expires_at is not None:
+                self._expires_at = 0.0
+                self._invalidations += 1
+                self._must_refresh = self._must_refresh or wait
@@ -0,0 +1,105 @@
+# retry.py
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Optional
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+class RetryPolicy:
+    '''
+    When and how long to wait before retrying a failed request.
+
+    Requests are retried on connection errors, timeouts and on the statuses in
+    retry_statuses. The wait before attempt n is drawn uniformly from
+    [0, min(backoff_max, backoff_base * 2 ** (n - 1))] ("full jitter"), unless
+    the server sent a Retry-After header, which is honored up to max_retry_after.
+
+    Idempotent requests (GET, DELETE, chat completions) are retried freely.
+    Uploads, content updates and knowledge changes are only retried when
+    retry_non_idempotent is set.
+    '''
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.5, backoff_max: float = 30.0,
+                 retry_statuses=(429, 502, 503, 504), respect_retry_after: bool = True,
+                 max_retry_after: float = 60.0, retry_non_idempotent: bool = False,
+                 on_retry: Optional[Callable[[str, str, int, float, str], None]] = None):
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if backoff_base < 0 or backoff_max < 0:
+            raise ValueError("backoff_base and backoff_max cannot be negative")
+
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+        self.retry_non_idempotent = retry_non_idempotent
+        self.on_retry = on_retry
+
+    def allows(self, method: str, idempotent: Optional[bool] = None) -> bool:
+        '''
+        Whether a request may be retried at all
+        '''
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        return idempotent or self.retry_non_idempotent
+
+    def backoff(self, attempt: int) -> float:
+        '''
+        Full-jitter exponential backoff before retrying after the given attempt (1-based)
+        '''
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def retry_after(self, response) -> Optional[float]:
+        '''
+        Seconds requested by the response's Retry-After header, or None
+        '''
+        if not self.respect_retry_after:
+            return None
+        value = response.headers.get('Retry-After') if response.headers else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+class RetryStats:
+    '''
+    Thread-safe retry counters of a client
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.exhausted = 0
+        self.retries_by_reason = {}
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_retry(self, reason: str):
+        with self._lock:
+            self.retries += 1
+            self.retries_by_reason[reason] = self.retries_by_reason.get(reason, 0) + 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'exhausted': self.exhausted,
+                'retries_by_reason': dict(self.retries_by_reason)
+            }
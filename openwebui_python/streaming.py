@@ -0,0 +1,368 @@
+# streaming.py
+
+import codecs
+import json
+from typing import Any, Callable, Optional
+try:
+    from .models.chat_completion import ChatCompletion, ChatCompletionChunk, Choice, Message
+except ImportError:  # running openwebui_python.py as a script
+    from models.chat_completion import ChatCompletion, ChatCompletionChunk, Choice, Message
+
+def _parse_chat_completion_chunk(data: dict) -> ChatCompletionChunk:
+    if data.get('error'):
+        error = data['error']
+        raise Exception(f"Chat completion stream failed: {error.get('message', error) if isinstance(error, dict) else error}")
+    for item in data.get('choices', []):
+        if not item.get('delta'):
+            item['delta'] = {}
+    return ChatCompletionChunk.from_dict(data)
+
+class _SSEDecoder:
+    '''
+    Collects the data lines of a server-sent event stream into complete events
+    '''
+    def __init__(self):
+        self._data = []
+
+    def feed(self, line) -> Optional[str]:
+        '''
+        Feed one line; returns the event data once a blank line closes an event
+        '''
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.rstrip('\r')
+        if not line:
+            return self.flush()
+        if line.startswith(':'):  # comment / keep-alive
+            return None
+        name, _, value = line.partition(':')
+        if name == 'data':
+            self._data.append(value[1:] if value.startswith(' ') else value)
+        return None
+
+    def flush(self) -> Optional[str]:
+        if not self._data:
+            return None
+        data = '\n'.join(self._data)
+        self._data = []
+        return data
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+class _JSONArrayDecoder:
+    '''
+    Splits a JSON array fed in byte chunks into its decoded elements, holding only the
+    element being read in memory. An incomplete element is re-parsed once the buffered
+    text has doubled, which keeps the work linear even for elements spanning many chunks.
+    '''
+    def __init__(self):
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._chunks = []
+        self._buffered = 0
+        self._retry_length = 0
+        self._state = 'start'  # start, first, value, separator, done
+
+    def feed(self, chunk: bytes) -> list:
+        '''
+        Feed the next chunk of the body; returns the elements it completed
+        '''
+        text = self._utf8.decode(chunk)
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered < self._retry_length:
+            return []
+        return self._drain(final=False)
+
+    def flush(self) -> list:
+        '''
+        Signal the end of the body; returns the remaining elements
+        '''
+        self._chunks.append(self._utf8.decode(b'', final=True))
+        items = self._drain(final=True)
+        if self._state != 'done':
+            raise ValueError("Truncated JSON array")
+        return items
+
+    def _drain(self, final: bool) -> list:
+        buffer = ''.join(self._chunks)
+        end = len(buffer)
+        pos = 0
+        items = []
+        while True:
+            while pos < end and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos == end:
+                break
+            char = buffer[pos]
+            if self._state == 'start':
+                if char != '[':
+                    raise ValueError("Expected a JSON array")
+                self._state = 'first'
+                pos += 1
+            elif self._state == 'separator':
+                if char not in ',]':
+                    raise ValueError(f"Expected ',' or ']' at {char!r}")
+                self._state = 'value' if char == ',' else 'done'
+                pos += 1
+            elif self._state == 'done':
+                raise ValueError("Unexpected data after the JSON array")
+            elif char == ']' and self._state == 'first':
+                self._state = 'done'
+                pos += 1
+            else:
+                try:
+                    item, item_end = self._json.raw_decode(buffer, pos)
+                except ValueError:
+                    if final:
+                        raise
+                    break
+                if not final and char not in '{["':
+                    # A bare number or literal reaching the end of the buffer may continue in the
+                    # next chunk, even past what parsed: "1." or "1e" only parse as far as "1"
+                    token_end = item_end
+                    while token_end < end and buffer[token_end] in _NUMBER_CHARS:
+                        token_end += 1
+                    if token_end == end:
+                        break
+                items.append(item)
+                self._state = 'separator'
+                pos = item_end
+
+        rest = buffer[pos:]
+        self._chunks = [rest] if rest else []
+        self._buffered = len(rest)
+        self._retry_length = 2 * len(rest) if rest and not items else 0
+        return items
+
+class JSONArrayStream:
+    '''
+    Iterator over the items of a JSON array response, decoded one at a time while the
+    body is read. Closing it (or leaving a with block) before the end drops the connection.
+    '''
+    def __init__(self, response, decode: Callable[[Any], Any], chunk_size: int = 65536):
+        self.response = response
+        self.decode = decode
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._items = self._iter_items()
+
+    def _iter_items(self):
+        decoder = _JSONArrayDecoder()
+        try:
+            for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+                for item in decoder.feed(chunk):
+                    self.count += 1
+                    yield self.decode(item)
+            for item in decoder.flush():
+                self.count += 1
+                yield self.decode(item)
+        finally:
+            self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class AsyncJSONArrayStream:
+    '''
+    Async iterator over the items of a JSON array response, decoded while the body is read
+    '''
+    def __init__(self, response, decode: Callable[[Any], Any], chunk_size: int = 65536):
+        self.response = response
+        self.decode = decode
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._items = self._iter_items()
+
+    async def _iter_items(self):
+        decoder = _JSONArrayDecoder()
+        try:
+            async for chunk in self.response.aiter_bytes(chunk_size=self.chunk_size):
+                for item in decoder.feed(chunk):
+                    self.count += 1
+                    yield self.decode(item)
+            for item in decoder.flush():
+                self.count += 1
+                yield self.decode(item)
+        finally:
+            await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._items.__anext__()
+
+    async def close(self):
+        await self.response.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+class ChatCompletionAccumulator:
+    '''
+    Builds the final ChatCompletion out of the chunks of a streamed completion
+    '''
+    def __init__(self):
+        self.id = None
+        self.model = None
+        self.created = None
+        self.system_fingerprint = None
+        self.usage = None
+        self._choices = {}
+
+    def add(self, chunk: ChatCompletionChunk):
+        self.id = self.id or chunk.id
+        self.model = self.model or chunk.model
+        self.created = self.created or chunk.created
+        self.system_fingerprint = self.system_fingerprint or chunk.system_fingerprint
+        if chunk.usage:
+            self.usage = chunk.usage
+        for choice in chunk.choices:
+            state = self._choices.setdefault(choice.index, {'role': None, 'content': [], 'finish_reason': None})
+            if choice.delta.role:
+                state['role'] = choice.delta.role
+            if choice.delta.content:
+                state['content'].append(choice.delta.content)
+            if choice.finish_reason:
+                state['finish_reason'] = choice.finish_reason
+
+    def to_completion(self) -> ChatCompletion:
+        choices = []
+        for index in sorted(self._choices):
+            state = self._choices[index]
+            message = Message(content=''.join(state['content']), role=state['role'] or 'assistant')
+            choices.append(Choice(index=index, message=message, finish_reason=state['finish_reason']))
+        return ChatCompletion(
+            choices=choices,
+            id=self.id,
+            model=self.model,
+            object='chat.completion',
+            created=self.created,
+            usage=self.usage,
+            system_fingerprint=self.system_fingerprint
+        )
+
+class ChatCompletionStream:
+    '''
+    Iterator over the ChatCompletionChunk objects of a streamed chat completion.
+    Chunks are yielded as soon as their server-sent event arrives.
+    '''
+    def __init__(self, response, loads: Callable[[Any], Any] = json.loads):
+        self.response = response
+        self.loads = loads
+        self.accumulator = ChatCompletionAccumulator()
+        self._chunks = self._iter_chunks()
+
+    def _iter_chunks(self):
+        decoder = _SSEDecoder()
+        try:
+            # chunk_size=None hands lines over as soon as the server flushes them
+            for line in self.response.iter_lines(chunk_size=None):
+                data = decoder.feed(line)
+                if data is None:
+                    continue
+                if data == '[DONE]':
+                    return
+                chunk = _parse_chat_completion_chunk(self.loads(data))
+                self.accumulator.add(chunk)
+                yield chunk
+            data = decoder.flush()
+            if data is not None and data != '[DONE]':
+                chunk = _parse_chat_completion_chunk(self.loads(data))
+                self.accumulator.add(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ChatCompletionChunk:
+        return next(self._chunks)
+
+    def get_final_completion(self) -> ChatCompletion:
+        '''
+        Consume the rest of the stream and return the assembled ChatCompletion
+        '''
+        for _ in self:
+            pass
+        return self.accumulator.to_completion()
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class AsyncChatCompletionStream:
+    '''
+    Async iterator over the ChatCompletionChunk objects of a streamed chat completion
+    '''
+    def __init__(self, response, loads: Callable[[Any], Any] = json.loads):
+        self.response = response
+        self.loads = loads
+        self.accumulator = ChatCompletionAccumulator()
+        self._chunks = self._iter_chunks()
+
+    async def _iter_chunks(self):
+        decoder = _SSEDecoder()
+        try:
+            async for line in self.response.aiter_lines():
+                data = decoder.feed(line)
+                if data is None:
+                    continue
+                if data == '[DONE]':
+                    return
+                chunk = _parse_chat_completion_chunk(self.loads(data))
+                self.accumulator.add(chunk)
+                yield chunk
+            data = decoder.flush()
+            if data is not None and data != '[DONE]':
+                chunk = _parse_chat_completion_chunk(self.loads(data))
+                self.accumulator.add(chunk)
+                yield chunk
+        finally:
+            await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> ChatCompletionChunk:
+        return await self._chunks.__anext__()
+
+    async def get_final_completion(self) -> ChatCompletion:
+        '''
+        Consume the rest of the stream and return the assembled ChatCompletion
+        '''
+        async for _ in self:
+            pass
+        return self.accumulator.to_completion()
+
+    async def close(self):
+        await self.response.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,319 @@
+# sync.py
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Callable, Dict, List, NamedTuple, Optional
+try:
+    from .models.files import ValidationErrorItem
+    from .uploads import hash_files, server_hashes
+except ImportError:  # running openwebui_python.py as a script
+    from models.files import ValidationErrorItem
+    from uploads import hash_files, server_hashes
+
+logger = logging.getLogger('OpenWebUI')
+
+class ManifestEntry(NamedTuple):
+    size: int
+    mtime_ns: int
+    hash: str
+    file_id: Optional[str] = None
+
+@dataclass
+class SyncReport:
+    '''
+    Outcome of a KnowledgeSync run. Paths are relative to the synced directory; removed
+    lists the ids of the files taken out of the knowledge base.
+    '''
+    added: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+class KnowledgeSync:
+    '''
+    Mirrors a directory into a knowledge base. A manifest (size, mtime, SHA-256) of the
+    directory is diffed against the knowledge base's files and the synced state saved in
+    the checkpoint file, so only added, changed and removed files cause requests, and files
+    whose size and mtime did not change are not even read.
+
+    Added files are uploaded and attached, changed text files are updated in place (binary
+    ones are uploaded again and swapped), and files of the knowledge base without a local
+    counterpart are detached (and deleted with delete_removed=True) unless remove_missing
+    is False. The checkpoint is saved every checkpoint_interval seconds while the operations
+    run, so an interrupted sync resumes where it stopped.
+    '''
+    def __init__(self, client, knowledge_id: str, directory: str, checkpoint_path: Optional[str] = None,
+                 include: Optional[List[str]] = None, max_concurrency: int = 8, remove_missing: bool = True,
+                 delete_removed: bool = False, checkpoint_interval: float = 5.0,
+                 progress_callback: Optional[Callable[[int, int], None]] = None):
+        if not knowledge_id:
+            raise ValueError("knowledge_id cannot be empty")
+        if not os.path.isdir(directory):
+            raise FileNotFoundError(f"Directory not found: {directory}")
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.client = client
+        self.knowledge_id = knowledge_id
+        self.directory = os.path.abspath(directory)
+        self.checkpoint_path = checkpoint_path or os.path.join(self.directory, f".openwebui-sync-{knowledge_id}.json")
+        self.include = include
+        self.max_concurrency = max_concurrency
+        self.remove_missing = remove_missing
+        self.delete_removed = delete_removed
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_callback = progress_callback
+        self._state: Dict[str, ManifestEntry] = {}
+        self._lock = threading.Lock()
+
+    def _full_path(self, relative: str) -> str:
+        return os.path.join(self.directory, *relative.split('/'))
+
+    def load_checkpoint(self) -> Dict[str, ManifestEntry]:
+        '''
+        The synced state saved by the last run, empty if there is none for this knowledge base
+        '''
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get('knowledge_id') != self.knowledge_id:
+            return {}
+        return {path: ManifestEntry(*entry) for path, entry in data.get('files', {}).items()}
+
+    def save_checkpoint(self):
+        with self._lock:
+            data = {'knowledge_id': self.knowledge_id, 'files': {path: list(entry) for path, entry in self._state.items()}}
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(temporary, self.checkpoint_path)
+
+    def scan(self, previous: Optional[Dict[str, ManifestEntry]] = None) -> Dict[str, ManifestEntry]:
+        '''
+        Manifest of the directory. Hidden files and directories are skipped, as are paths not
+        matching the include patterns; hashes in previous are reused while size and mtime match.
+        '''
+        previous = previous or {}
+        stats = {}
+        for root, directories, names in os.walk(self.directory):
+            directories[:] = sorted(name for name in directories if not name.startswith('.'))
+            for name in sorted(names):
+                if name.startswith('.'):
+                    continue
+                full_path = os.path.join(root, name)
+                relative = os.path.relpath(full_path, self.directory).replace(os.sep, '/')
+                if self.include and not any(fnmatch(relative, pattern) for pattern in self.include):
+                    continue
+                try:
+                    stats[relative] = os.stat(full_path)
+                except OSError:
+                    continue
+
+        manifest = {}
+        to_hash = []
+        for relative, stat in stats.items():
+            known = previous.get(relative)
+            if known and known.size == stat.st_size and known.mtime_ns == stat.st_mtime_ns:
+                manifest[relative] = known
+            else:
+                to_hash.append(relative)
+
+        digests = hash_files([self._full_path(relative) for relative in to_hash], self.max_concurrency)
+        for relative in to_hash:
+            digest = digests[self._full_path(relative)]
+            if isinstance(digest, Exception):
+                logger.warning(f"Skipping {relative}: {digest}")
+                continue
+            stat = stats[relative]
+            manifest[relative] = ManifestEntry(stat.st_size, stat.st_mtime_ns, digest)
+        return manifest
+
+    def run(self) -> SyncReport:
+        '''
+        Sync the directory into the knowledge base and return what was done
+        '''
+        previous = self.load_checkpoint()
+        self._state = dict(previous)
+        manifest = self.scan(previous)
+
+        knowledge = self.client.get_knowledge_by_id(self.knowledge_id)
+        if isinstance(knowledge, ValidationErrorItem):
+            raise Exception(f"Failed to sync knowledge item {self.knowledge_id}: {knowledge.detail or knowledge.message}")
+        files = knowledge.files or []
+        server_ids = {file.id for file in files}
+        by_hash = {}
+        for file in files:
+            for digest in server_hashes(file.hash):
+                by_hash.setdefault(digest, file.id)
+
+        report = SyncReport()
+        claimed = set()
+        operations = []
+        resumed = {}
+        for relative, entry in manifest.items():
+            synced = previous.get(relative)
+            if synced and synced.file_id in server_ids:
+                claimed.add(synced.file_id)
+                if synced.hash == entry.hash:
+                    self._state[relative] = entry._replace(file_id=synced.file_id)
+                    report.unchanged += 1
+                else:
+                    operations.append((self._update, relative, entry, synced.file_id))
+            elif entry.hash in by_hash and by_hash[entry.hash] not in claimed:
+                # Already in the knowledge base, e.g. from a sync without checkpoint
+                file_id = by_hash[entry.hash]
+                claimed.add(file_id)
+                self._state[relative] = entry._replace(file_id=file_id)
+                report.unchanged += 1
+            elif synced and synced.file_id and synced.hash == entry.hash:
+                # Uploaded by an interrupted run but not attached yet
+                resumed[synced.file_id] = (relative, entry, None)
+            else:
+                operations.append((self._upload, relative, entry, None))
+
+        for relative in previous.keys() - manifest.keys():
+            if previous[relative].file_id not in server_ids:
+                self._state.pop(relative, None)
+        missing = {}
+        if self.remove_missing:
+            owners = {entry.file_id: relative for relative, entry in previous.items() if relative not in manifest}
+            missing = {file_id: owners.get(file_id) for file_id in server_ids - claimed}
+
+        self._total = len(operations) + len(resumed) + len(missing)
+        self._completed = 0
+        logger.info(f"Syncing {self.directory} into knowledge item {self.knowledge_id}: "
+                    f"{self._total} changes, {report.unchanged} files unchanged")
+        try:
+            attach = self._execute(operations, report)
+            replaced = self._attach(attach, resumed, report)
+            self._remove(missing, replaced, report)
+        finally:
+            self.save_checkpoint()
+        logger.info(f"Finished syncing knowledge item {self.knowledge_id}: {len(report.added)} added, "
+                    f"{len(report.updated)} updated, {len(report.removed)} removed, {len(report.failed)} failed")
+        return report
+
+    def _progress(self, count: int = 1):
+        self._completed += count
+        if self.progress_callback and count:
+            self.progress_callback(self._completed, self._total)
+
+    def _execute(self, operations: list, report: SyncReport) -> dict:
+        '''
+        Run the uploads and in-place updates concurrently. Returns the uploaded files still to
+        attach: {file_id: (relative path, entry, id of the file it replaces or None)}.
+        '''
+        attach = {}
+        saved_at = time.monotonic()
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(operations) or 1)) as executor:
+            futures = {executor.submit(operation, relative, entry, file_id): (operation, relative, entry, file_id)
+                       for operation, relative, entry, file_id in operations}
+            for future in as_completed(futures):
+                operation, relative, entry, file_id = futures[future]
+                try:
+                    new_id = future.result()
+                except Exception as e:
+                    report.failed[relative] = str(e)
+                else:
+                    if new_id is None:
+                        report.updated.append(relative)
+                    else:
+                        attach[new_id] = (relative, entry, file_id)
+                self._progress()
+                if time.monotonic() - saved_at >= self.checkpoint_interval:
+                    self.save_checkpoint()
+                    saved_at = time.monotonic()
+        return attach
+
+    def _attach(self, attach: dict, resumed: dict, report: SyncReport) -> dict:
+        '''
+        Add the uploaded files to the knowledge base in batches. Returns {old file id: relative
+        path} of the files replaced by a new upload, to be removed.
+        '''
+        replaced = {}
+        if not attach and not resumed:
+            return replaced
+        result = self.client.add_files_to_knowledge(self.knowledge_id, [*attach, *resumed],
+                                                    max_concurrency=self.max_concurrency)
+        for file_id in result.succeeded:
+            relative, entry, old_id = attach.get(file_id) or resumed[file_id]
+            self._synced(relative, entry, file_id)
+            if old_id is None:
+                report.added.append(relative)
+            else:
+                replaced[old_id] = relative
+                report.updated.append(relative)
+        for file_id, error in result.failed.items():
+            relative, entry, old_id = attach.get(file_id) or resumed[file_id]
+            report.failed[relative] = f"Failed to add {relative}: {error}"
+            if file_id in resumed:
+                # Attaching failed twice, the upload is probably gone: upload again next time
+                self._synced(relative, entry, None)
+        self._progress(len(resumed))
+        return replaced
+
+    def _remove(self, missing: dict, replaced: dict, report: SyncReport):
+        '''
+        Take the files without a local counterpart, and the replaced ones, out of the knowledge base
+        '''
+        if not missing and not replaced:
+            return
+        result = self.client.remove_files_from_knowledge(self.knowledge_id, [*missing, *replaced],
+                                                         max_concurrency=self.max_concurrency)
+        for file_id in result.succeeded:
+            if file_id in missing:
+                report.removed.append(file_id)
+                if missing[file_id] is not None:
+                    with self._lock:
+                        self._state.pop(missing[file_id], None)
+        for file_id, error in result.failed.items():
+            report.failed[missing.get(file_id) or file_id] = f"Failed to remove {file_id}: {error}"
+        self._progress(len(missing))
+
+        if self.delete_removed and result.succeeded:
+            for file_id, outcome in self.client.delete_files(result.succeeded, max_concurrency=self.max_concurrency).items():
+                if not outcome.success:
+                    report.failed[file_id] = f"Failed to delete {file_id}: {outcome.message}"
+
+    def _synced(self, relative: str, entry: ManifestEntry, file_id: Optional[str]):
+        with self._lock:
+            self._state[relative] = entry._replace(file_id=file_id)
+
+    @staticmethod
+    def _check(result, action: str):
+        if isinstance(result, ValidationErrorItem) and not result.success:
+            raise Exception(f"Failed to {action}: {result.message or result.detail}")
+        return result
+
+    def _upload(self, relative: str, entry: ManifestEntry, file_id: None = None) -> str:
+        file = self._check(self.client.upload_file(self._full_path(relative)), f"upload {relative}")
+        # Remember the upload right away, so an interruption before attaching does not repeat it
+        self._synced(relative, entry, file.id)
+        return file.id
+
+    def _update(self, relative: str, entry: ManifestEntry, file_id: str) -> Optional[str]:
+        '''
+        Update a changed text file in place (returns None), or upload a changed binary document
+        again (returns the new file id), since the server must extract its text anew
+        '''
+        try:
+            with open(self._full_path(relative), encoding='utf-8') as f:
+                text = f.read()
+        except UnicodeDecodeError:
+            return self._upload(relative, entry)
+        self._check(self.client.update_file_content_by_id(file_id, text), f"update {relative}")
+        self._synced(relative, entry, file_id)
+        return None
@@ -0,0 +1,140 @@
+# transport.py
+
+import logging
+import requests
+from typing import Union
+from requests.adapters import HTTPAdapter
+try:
+    from .codec import JSONCodec, encode_json_body, get_codec
+except ImportError:  # running openwebui_python.py as a script
+    from codec import JSONCodec, encode_json_body, get_codec
+
+try:
+    import httpx
+except ImportError:  # httpx is only needed by the async client
+    httpx = None
+
+logger = logging.getLogger('OpenWebUI')
+
+def _decode_error(error: ValueError, body: bytes):
+    # The position details of json.JSONDecodeError (which orjson's error subclasses), when available
+    doc = getattr(error, 'doc', None)
+    if doc is None:
+        doc = body.decode('utf-8', errors='replace')
+    return getattr(error, 'msg', str(error)), doc, getattr(error, 'pos', 0)
+
+class _CodecResponse(requests.Response):
+    '''
+    requests.Response whose json() parses the body with the transport's codec. A body that
+    is not JSON raises requests.exceptions.JSONDecodeError, as requests itself does.
+    '''
+    def json(self, **kwargs):
+        try:
+            return self._codec.loads(self.content)
+        except ValueError as e:
+            raise requests.exceptions.JSONDecodeError(*_decode_error(e, self.content)) from e
+
+if httpx is not None:
+    class _AsyncCodecResponse(httpx.Response):
+        '''
+        httpx.Response whose json() parses the body with the transport's codec. A body that
+        is not JSON raises httpx.DecodingError, an httpx.HTTPError.
+        '''
+        def json(self, **kwargs):
+            try:
+                return self._codec.loads(self.content)
+            except ValueError as e:
+                msg, doc, pos = _decode_error(e, self.content)
+                raise httpx.DecodingError(f"Response body is not valid JSON: {msg} (char {pos})", request=self.request) from e
+
+class HTTPTransport:
+    '''
+    Pooled, keep-alive HTTP transport shared by every OpenWebUI method.
+
+    pool_connections is the number of per-host pools to keep, pool_maxsize the
+    maximum number of connections kept open to a single host. json= bodies are
+    serialized and response.json() parsed with codec (see get_codec).
+    '''
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10, pool_block: bool = False,
+                 keep_alive: bool = True, timeout=None, codec: Union[str, JSONCodec, None] = None):
+        if pool_connections < 1:
+            raise ValueError("pool_connections must be at least 1")
+        if pool_maxsize < 1:
+            raise ValueError("pool_maxsize must be at least 1")
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.codec = get_codec(codec)
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if not keep_alive:
+            self.session.headers['Connection'] = 'close'
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        '''
+        Send a request through the pooled session
+        '''
+        kwargs.setdefault('timeout', self.timeout)
+        response = self.session.request(method, url, **encode_json_body(self.codec, kwargs))
+        response.__class__ = _CodecResponse
+        response._codec = self.codec
+        return response
+
+    def close(self):
+        '''
+        Close every pooled connection
+        '''
+        logger.info("Closing HTTP transport")
+        self.session.close()
+
+class AsyncHTTPTransport:
+    '''
+    Pooled, keep-alive asyncio HTTP transport used by AsyncOpenWebUI.
+
+    max_connections caps concurrent connections across all hosts,
+    max_keepalive_connections caps idle connections kept open for reuse.
+    json= bodies are serialized and response.json() parsed with codec (see get_codec).
+    '''
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 5.0, timeout=None, codec: Union[str, JSONCodec, None] = None):
+        if httpx is None:
+            raise ImportError("AsyncHTTPTransport requires httpx: pip install openwebui_python[async]")
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+
+        self.max_connections = max_connections
+        self.codec = get_codec(codec)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.client = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    async def request(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        '''
+        Send a request through the pooled async client
+        '''
+        response = await self.client.request(method, url, **encode_json_body(self.codec, kwargs, 'content'))
+        response.__class__ = _AsyncCodecResponse
+        response._codec = self.codec
+        return response
+
+    async def stream(self, method: str, url: str, **kwargs) -> "httpx.Response":
+        '''
+        Send a request and return as soon as the headers arrive; the caller reads
+        the body incrementally and must aclose() the response
+        '''
+        request = self.client.build_request(method, url, **encode_json_body(self.codec, kwargs, 'content'))
+        return await self.client.send(request, stream=True)
+
+    async def close(self):
+        '''
+        Close every pooled connection
+        '''
+        logger.info("Closing async HTTP transport")
+        await self.client.aclose()
@@ -1,15 +1,41 @@
 import pytest
 import os
-from unittest.mock import patch, MagicMock
-from openwebui_python import OpenWebUI
-from openwebui_python.models.chat_completion import ChatCompletion, Choice, Message
-from openwebui_python.models.model import Model, Action, Pipe, OpenAI, Info
+import copy
+import gzip
+import threading
+import hashlib
+import io
+import json
+import time
+import asyncio
+import random
+import sqlite3
+import requests
+from unittest.mock import patch, MagicMock, AsyncMock
+from openwebui_python import OpenWebUI, AsyncOpenWebUI
+from openwebui_python.transport import HTTPTransport, AsyncHTTPTransport
+from openwebui_python.retry import RetryPolicy
+from openwebui_python.ratelimit import RateLimiter, RateLimit
+from openwebui_python.balancer import LoadBalancer
+from openwebui_python.circuit_breaker import CircuitBreaker, CircuitOpenError
+from openwebui_python.hedging import HedgingPolicy
+from openwebui_python.cache import MemoryCache, SQLiteCache, cache_key
+from openwebui_python.codec import JSONCodec, get_codec
+from openwebui_python.catalog import ModelCatalog
+from openwebui_python.knowledge_index import KnowledgeIndex
+from openwebui_python.lazy import LazyList
+from openwebui_python.content import RemoteFileData
+from openwebui_python.multipart import MultipartEncoder
+from openwebui_python.uploads import UploadIndex, sha256_file
+from openwebui_python.streaming import _JSONArrayDecoder
+from openwebui_python.models.chat_completion import ChatCompletion, ChatCompletionChunk, Choice, Message
+from openwebui_python.models.model import Model, Action, Pipe, OpenAI, Info, Architecture, Details
 from openwebui_python.models.files import OpenWebFile, Meta, FileData, ValidationErrorItem
-from openwebui_python.models.knowledge import Knowledge
+from openwebui_python.models.knowledge import Knowledge, User
 
 @pytest.fixture
 def api():
-    return OpenWebUI(base_url="http://test.com", api_key="test-key")
+    return OpenWebUI(base_url="http://test.com", api_key="test-key", transport=MagicMock(spec=HTTPTransport))
 
 def test_init():
     # Test successful initialization
@@ -28,8 +54,7 @@ def test_init():
         OpenWebUI("http://test.com", "")
 
 class TestModelMethods:
-    @patch('requests.get')
-    def test_get_models_success(self, mock_get, api):
+    def test_get_models_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = {
             "data": [{
@@ -41,7 +66,7 @@ class TestModelMethods:
                 "info": {"description": "test"}
             }]
         }
-        mock_get.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         models = api.get_models()
@@ -53,15 +78,13 @@ class TestModelMethods:
         assert isinstance(models[0].openai, OpenAI)
         assert isinstance(models[0].info, Info)
 
-    @patch('requests.get')
-    def test_get_models_error(self, mock_get, api):
-        mock_get.side_effect = Exception("API Error")
+    def test_get_models_error(self, api):
+        api.transport.request.side_effect = requests.exceptions.ConnectionError("API Error")
         with pytest.raises(Exception, match="Failed to fetch models"):
             api.get_models()
 
 class TestChatMethods:
-    @patch('requests.post')
-    def test_get_chat_completion_success(self, mock_post, api):
+    def test_get_chat_completion_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = {
             "choices": [{
@@ -70,7 +93,7 @@ class TestChatMethods:
                 "finish_reason": "stop"
             }]
         }
-        mock_post.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         completion = api.get_chat_completion("model1", "test prompt")
@@ -85,8 +108,7 @@ class TestChatMethods:
         with pytest.raises(ValueError, match="prompt cannot be empty"):
             api.get_chat_completion("model1", "")
 
-    @patch('requests.post')
-    def test_get_chat_completion_with_messages_success(self, mock_post, api):
+    def test_get_chat_completion_with_messages_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = {
             "choices": [{
@@ -95,7 +117,7 @@ class TestChatMethods:
                 "finish_reason": "stop"
             }]
         }
-        mock_post.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         messages = [{"role": "user", "content": "test"}]
@@ -112,8 +134,7 @@ class TestChatMethods:
             api.get_chat_completion_with_messages("model1", "not a list")
 
 class TestFileMethods:
-    @patch('requests.get')
-    def test_get_files_success(self, mock_get, api):
+    def test_get_files_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = [{
             "id": "file1",
@@ -121,7 +142,7 @@ class TestFileMethods:
             "meta": {"type": "text"},
             "data": {"content": "test content"}
         }]
-        mock_get.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         files = api.get_files()
@@ -131,8 +152,7 @@ class TestFileMethods:
         assert isinstance(files[0].data, FileData)
         assert files[0].id == "file1"
 
-    @patch('requests.get')
-    def test_get_file_by_id_success(self, mock_get, api):
+    def test_get_file_by_id_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = {
             "id": "file1",
@@ -140,7 +160,7 @@ class TestFileMethods:
             "meta": {"type": "text"},
             "data": {"content": "test content"}
         }
-        mock_get.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         file = api.get_file_by_id("file1")
@@ -151,23 +171,21 @@ class TestFileMethods:
         with pytest.raises(ValueError, match="id cannot be empty"):
             api.get_file_by_id("")
 
-    @patch('requests.delete')
-    def test_delete_file_by_id_success(self, mock_delete, api):
+    def test_delete_file_by_id_success(self, api):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"success": True}
-        mock_delete.return_value = mock_response
+        api.transport.request.return_value = mock_response
 
         result = api.delete_file_by_id("file1")
         assert isinstance(result, ValidationErrorItem)
         assert result.success is True
 
-    @patch('requests.post')
-    def test_update_file_content_success(self, mock_post, api):
+    def test_update_file_content_success(self, api):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"success": True}
-        mock_post.return_value = mock_response
+        api.transport.request.return_value = mock_response
 
         result = api.update_file_content_by_id("file1", "new content")
         assert isinstance(result, ValidationErrorItem)
@@ -180,8 +198,7 @@ class TestFileMethods:
             api.update_file_content_by_id("file1", None)
 
 class TestKnowledgeMethods:
-    @patch('requests.get')
-    def test_get_knowledge_success(self, mock_get, api):
+    def test_get_knowledge_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = [{
             "id": "knowledge1",
@@ -189,7 +206,7 @@ class TestKnowledgeMethods:
             "description": "Test description",
             "files": []
         }]
-        mock_get.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         knowledge_items = api.get_knowledge()
@@ -197,8 +214,7 @@ class TestKnowledgeMethods:
         assert isinstance(knowledge_items[0], Knowledge)
         assert knowledge_items[0].id == "knowledge1"
 
-    @patch('requests.get')
-    def test_get_knowledge_by_id_success(self, mock_get, api):
+    def test_get_knowledge_by_id_success(self, api):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -207,7 +223,7 @@ class TestKnowledgeMethods:
             "description": "Test description",
             "files": []
         }
-        mock_get.return_value = mock_response
+        api.transport.request.return_value = mock_response
 
         knowledge = api.get_knowledge_by_id("knowledge1")
         assert isinstance(knowledge, Knowledge)
@@ -217,8 +233,7 @@ class TestKnowledgeMethods:
         with pytest.raises(ValueError, match="id cannot be empty"):
             api.get_knowledge_by_id("")
 
-    @patch('requests.post')
-    def test_add_remove_file_to_knowledge_success(self, mock_post, api):
+    def test_add_remove_file_to_knowledge_success(self, api):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -226,7 +241,7 @@ class TestKnowledgeMethods:
             "name": "Test Knowledge",
             "files": ["file1"]
         }
-        mock_post.return_value = mock_response
+        api.transport.request.return_value = mock_response
 
         # Test adding file
         result = api.add_remove_file_to_knowledge("knowledge1", "file1", True)
@@ -244,8 +259,7 @@ class TestKnowledgeMethods:
             api.add_remove_file_to_knowledge("knowledge1", "", True)
 
 class TestUserMethods:
-    @patch('requests.get')
-    def test_get_users_success(self, mock_get, api):
+    def test_get_users_success(self, api):
         mock_response = MagicMock()
         mock_response.json.return_value = [{
             "id": "user1",
@@ -253,7 +267,7 @@ class TestUserMethods:
             "role": "admin",
             "created_at": "2024-01-01"
         }]
-        mock_get.return_value = mock_response
+        api.transport.request.return_value = mock_response
         mock_response.raise_for_status = MagicMock()
 
         users = api.get_users()
@@ -262,12 +276,11 @@ class TestUserMethods:
         assert users[0].name == "Test User"
 
 class TestAudioMethods:
-    @patch('requests.post')
-    def test_transcribe_audio_success(self, mock_post, api):
+    def test_transcribe_audio_success(self, api):
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"text": "transcribed text"}
-        mock_post.return_value = mock_response
+        api.transport.request.return_value = mock_response
 
         with patch('os.path.exists', return_value=True):
             with patch('builtins.open', MagicMock()):
@@ -279,3 +292,1671 @@ class TestAudioMethods:
             api.transcribe_audio("")
         with pytest.raises(FileNotFoundError):
             api.transcribe_audio("nonexistent.mp3")
+
+class TestTransport:
+    def test_pool_configuration(self):
+        transport = HTTPTransport(pool_connections=4, pool_maxsize=32, keep_alive=False)
+        adapter = transport.session.get_adapter("https://test.com")
+        assert adapter._pool_connections == 4
+        assert adapter._pool_maxsize == 32
+        assert transport.session.headers["Connection"] == "close"
+
+        with pytest.raises(ValueError, match="pool_maxsize must be at least 1"):
+            HTTPTransport(pool_maxsize=0)
+
+    def test_requests_share_transport(self, api):
+        mock_response = MagicMock()
+        mock_response.json.return_value = []
+        api.transport.request.return_value = mock_response
+
+        api.get_files()
+        api.get_users()
+        calls = api.transport.request.call_args_list
+        assert calls[0].args == ("GET", "http://test.com/v1/files")
+        assert calls[1].args == ("GET", "http://test.com/v1/users/")
+        assert calls[0].kwargs["headers"]["Authorization"] == "Bearer test-key"
+
+    def test_context_manager_closes_transport(self):
+        transport = MagicMock(spec=HTTPTransport)
+        with OpenWebUI("http://test.com", "test-key", transport=transport) as api:
+            assert api.transport is transport
+        transport.close.assert_called_once()
+
+class TestAsyncClient:
+    @pytest.fixture
+    def async_api(self):
+        return AsyncOpenWebUI(base_url="http://test.com", api_key="test-key", transport=AsyncMock(spec=AsyncHTTPTransport))
+
+    def test_get_chat_completion_success(self, async_api):
+        mock_response = MagicMock()
+        mock_response.json.return_value = {
+            "choices": [{
+                "message": {"role": "assistant", "content": "Test response"},
+                "index": 0,
+                "finish_reason": "stop"
+            }]
+        }
+        async_api.transport.request.return_value = mock_response
+
+        completion = asyncio.run(async_api.get_chat_completion("model1", "test prompt"))
+        assert isinstance(completion, ChatCompletion)
+        assert isinstance(completion.choices[0].message, Message)
+        assert completion.choices[0].message.content == "Test response"
+        assert async_api.transport.request.call_args.args == ("POST", "http://test.com/chat/completions")
+
+    def test_get_files_success(self, async_api):
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{
+            "id": "file1",
+            "filename": "test.txt",
+            "meta": {"type": "text"},
+            "data": {"content": "test content"}
+        }]
+        async_api.transport.request.return_value = mock_response
+
+        files = asyncio.run(async_api.get_files())
+        assert isinstance(files[0], OpenWebFile)
+        assert isinstance(files[0].data, FileData)
+
+    def test_get_models_error(self, async_api):
+        httpx = pytest.importorskip("httpx")
+        async_api.transport.request.side_effect = httpx.ConnectError("API Error")
+        with pytest.raises(Exception, match="Failed to fetch models"):
+            asyncio.run(async_api.get_models())
+
+    def test_validation(self, async_api):
+        with pytest.raises(ValueError, match="model_id cannot be empty"):
+            asyncio.run(async_api.get_chat_completion("", "test"))
+        with pytest.raises(ValueError, match="id cannot be empty"):
+            asyncio.run(async_api.delete_file_by_id(""))
+
+    def test_mirrors_sync_client(self):
+        for name in ['get_models', 'get_chat_completion', 'get_chat_completion_with_messages', 'chat_with_file',
+                     'get_files', 'get_file_by_id', 'delete_file_by_id', 'update_file_content_by_id', 'upload_file',
+                     'get_knowledge', 'get_knowledge_by_id', 'add_remove_file_to_knowledge', 'get_users',
+                     'iter_files', 'iter_knowledge', 'iter_users', 'transcribe_audio', 'get_files_by_ids', 'delete_files',
+                     'add_files_to_knowledge', 'remove_files_from_knowledge', 'update_file_contents', 'close']:
+            assert asyncio.iscoroutinefunction(getattr(AsyncOpenWebUI, name)), name
+
+    def test_context_manager_closes_transport(self):
+        async def run():
+            transport = AsyncMock(spec=AsyncHTTPTransport)
+            async with AsyncOpenWebUI("http://test.com", "test-key", transport=transport):
+                pass
+            transport.close.assert_awaited_once()
+        asyncio.run(run())
+
+SSE_LINES = [
+    b': keep-alive',
+    b'data: {"id": "c1", "model": "model1", "choices": [{"index": 0, "delta": {"role": "assistant", "content": "Hel"}}]}',
+    b'',
+    b'data: {"id": "c1", "choices": [{"index": 0, "delta": {"content": "lo"}, "finish_reason": "stop"}]}',
+    b'',
+    b'data: {"id": "c1", "choices": [], "usage": {"prompt_tokens": 3, "completion_tokens": 2}}',
+    b'',
+    b'data: [DONE]',
+    b'',
+]
+
+class TestStreaming:
+    def test_stream_chat_completion(self, api):
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = iter(SSE_LINES)
+        api.transport.request.return_value = mock_response
+
+        stream = api.get_chat_completion("model1", "test prompt", stream=True)
+        chunks = list(stream)
+        assert [c.choices[0].delta.content for c in chunks[:2]] == ["Hel", "lo"]
+        assert isinstance(chunks[0], ChatCompletionChunk)
+        mock_response.close.assert_called()
+
+        payload = api.transport.request.call_args.kwargs["json"]
+        assert payload["stream"] is True
+        assert api.transport.request.call_args.kwargs["stream"] is True
+
+        completion = stream.get_final_completion()
+        assert isinstance(completion, ChatCompletion)
+        assert completion.choices[0].message.content == "Hello"
+        assert completion.choices[0].message.role == "assistant"
+        assert completion.choices[0].finish_reason == "stop"
+        assert completion.usage == {"prompt_tokens": 3, "completion_tokens": 2}
+
+    def test_stream_error_event(self, api):
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = iter([b'data: {"error": {"message": "model overloaded"}}', b''])
+        api.transport.request.return_value = mock_response
+
+        stream = api.get_chat_completion_with_messages("model1", [{"role": "user", "content": "test"}], stream=True)
+        with pytest.raises(Exception, match="model overloaded"):
+            next(stream)
+
+    def test_async_stream_chat_completion(self):
+        class FakeResponse:
+            is_error = False
+            closed = False
+            def raise_for_status(self):
+                pass
+            async def aiter_lines(self):
+                for line in SSE_LINES:
+                    yield line.decode()
+            async def aclose(self):
+                self.closed = True
+
+        async def run():
+            response = FakeResponse()
+            transport = AsyncMock(spec=AsyncHTTPTransport)
+            transport.stream.return_value = response
+            client = AsyncOpenWebUI("http://test.com", "test-key", transport=transport)
+            stream = await client.chat_with_file("model1", "what is this?", "file1", stream=True)
+            contents = [chunk.choices[0].delta.content async for chunk in stream if chunk.choices]
+            completion = await stream.get_final_completion()
+            return contents, completion, response
+
+        contents, completion, response = asyncio.run(run())
+        assert contents == ["Hel", "lo"]
+        assert completion.choices[0].message.content == "Hello"
+        assert completion.usage["completion_tokens"] == 2
+        assert response.closed
+
+def completion_response(content):
+    mock_response = MagicMock()
+    mock_response.json.return_value = {
+        "choices": [{
+            "message": {"role": "assistant", "content": content},
+            "index": 0,
+            "finish_reason": "stop"
+        }]
+    }
+    return mock_response
+
+class TestBatchMethods:
+    def test_batch_preserves_order_and_isolates_failures(self, api):
+        def respond(method, url, **kwargs):
+            prompt = kwargs["json"]["messages"][0]["content"]
+            if prompt == "fail":
+                raise requests.exceptions.ConnectionError("boom")
+            return completion_response(prompt.upper())
+        api.transport.request.side_effect = respond
+
+        progress = []
+        messages_list = [[{"role": "user", "content": p}] for p in ["a", "b", "fail", "d"]]
+        results = api.get_chat_completions_batch("model1", messages_list, max_concurrency=3,
+                                                 progress_callback=lambda done, total: progress.append((done, total)))
+
+        assert [r.choices[0].message.content for r in results if isinstance(r, ChatCompletion)] == ["A", "B", "D"]
+        assert isinstance(results[2], ValidationErrorItem)
+        assert results[2].success is False
+        assert "boom" in results[2].message
+        assert sorted(progress) == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+    def test_batch_validation(self, api):
+        with pytest.raises(ValueError, match="max_concurrency must be at least 1"):
+            api.get_chat_completions_batch("model1", [], max_concurrency=0)
+        assert api.get_chat_completions_batch("model1", []) == []
+
+    def test_async_batch(self):
+        async def respond(method, url, **kwargs):
+            await asyncio.sleep(0.01 if kwargs["json"]["messages"][0]["content"] == "a" else 0)
+            return completion_response(kwargs["json"]["messages"][0]["content"])
+
+        transport = AsyncMock(spec=AsyncHTTPTransport)
+        transport.request.side_effect = respond
+        client = AsyncOpenWebUI("http://test.com", "test-key", transport=transport)
+        messages_list = [[{"role": "user", "content": p}] for p in ["a", "b", "c"]] + [[]]
+        results = asyncio.run(client.get_chat_completions_batch("model1", messages_list, max_concurrency=2))
+        assert [r.choices[0].message.content for r in results[:3]] == ["a", "b", "c"]
+        assert isinstance(results[3], ValidationErrorItem)
+
+def status_response(status_code, headers=None, json_data=None):
+    mock_response = MagicMock()
+    mock_response.status_code = status_code
+    mock_response.headers = headers or {}
+    mock_response.json.return_value = json_data if json_data is not None else {}
+    return mock_response
+
+class TestRetries:
+    @pytest.fixture
+    def retry_api(self):
+        policy = RetryPolicy(max_attempts=3, backoff_base=0)
+        return OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), retry_policy=policy)
+
+    def test_retries_transient_status(self, retry_api):
+        ok = completion_response("done")
+        ok.status_code = 200
+        retry_api.transport.request.side_effect = [status_response(503), status_response(429), ok]
+
+        with patch('time.sleep') as sleep:
+            completion = retry_api.get_chat_completion("model1", "test")
+        assert completion.choices[0].message.content == "done"
+        assert retry_api.transport.request.call_count == 3
+        assert sleep.call_count == 2
+        stats = retry_api.retry_stats.snapshot()
+        assert stats["retries"] == 2
+        assert stats["retries_by_reason"] == {"503": 1, "429": 1}
+
+    def test_honors_retry_after(self, retry_api):
+        retry_api.transport.request.side_effect = [status_response(429, {"Retry-After": "7"}), status_response(200, json_data=[])]
+        with patch('time.sleep') as sleep:
+            retry_api.get_users()
+        sleep.assert_called_once_with(7.0)
+
+    def test_connection_errors_exhaust(self, retry_api):
+        retry_api.transport.request.side_effect = requests.exceptions.ConnectionError("down")
+        with patch('time.sleep'):
+            with pytest.raises(Exception, match="Failed to fetch files"):
+                retry_api.get_files()
+        assert retry_api.transport.request.call_count == 3
+        assert retry_api.retry_stats.snapshot()["exhausted"] == 1
+
+    def test_non_idempotent_requests_are_opt_in(self, retry_api):
+        retry_api.transport.request.side_effect = [status_response(503, json_data={"detail": "busy"}), status_response(200)]
+        result = retry_api.update_file_content_by_id("file1", "new content")
+        assert result.success is False
+        assert retry_api.transport.request.call_count == 1
+
+        retry_api.retry_policy.retry_non_idempotent = True
+        retry_api.transport.request.side_effect = [status_response(503, json_data={"detail": "busy"}), status_response(200)]
+        with patch('time.sleep'):
+            result = retry_api.update_file_content_by_id("file1", "new content")
+        assert result.success is True
+
+    def test_backoff_is_bounded(self):
+        policy = RetryPolicy(backoff_base=1, backoff_max=5)
+        assert all(0 <= policy.backoff(attempt) <= 5 for attempt in range(1, 10))
+        assert policy.allows("GET") and not policy.allows("POST")
+        assert policy.allows("POST", idempotent=True)
+
+class TestRateLimiter:
+    def test_token_bucket_paces_requests(self):
+        limiter = RateLimiter(default=RateLimit(requests_per_second=50, burst=1), adaptive=False)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.release(limiter.acquire("/v1/files"), 200, 0.01)
+        assert time.monotonic() - start >= 0.09
+
+    def test_scopes_by_endpoint_and_model(self):
+        limiter = RateLimiter(
+            default=RateLimit(max_concurrency=10),
+            endpoints={"/chat": RateLimit(max_concurrency=5), "/chat/completions": RateLimit(max_concurrency=4)},
+            models={"model1": RateLimit(max_concurrency=2)}
+        )
+        permits = limiter.acquire("/chat/completions", "model1")
+        stats = limiter.stats()
+        assert stats["model:model1"]["in_flight"] == 1
+        assert stats["endpoint:/chat/completions"]["in_flight"] == 1
+        assert stats["endpoint:/chat"]["in_flight"] == 0
+        assert stats["default"]["in_flight"] == 1
+        limiter.release(permits, 200, 0.1)
+        assert limiter.stats()["default"]["in_flight"] == 0
+
+    def test_interrupted_acquire_releases_slots(self):
+        limiter = RateLimiter(default=RateLimit(requests_per_second=1, max_concurrency=2, burst=1),
+                              models={"model1": RateLimit(max_concurrency=1)}, adaptive=False)
+        limiter.acquire("/models")  # spends the only token
+        with patch("openwebui_python.ratelimit.time.sleep", side_effect=KeyboardInterrupt):
+            with pytest.raises(KeyboardInterrupt):
+                limiter.acquire("/models", "model1")
+        stats = limiter.stats()
+        assert stats["model:model1"]["in_flight"] == 0
+        assert stats["default"]["in_flight"] == 1
+
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), rate_limiter=limiter)
+        api.load_balancer = MagicMock()
+        api.load_balancer.acquire.side_effect = RuntimeError("no replica")
+        with pytest.raises(RuntimeError):
+            api._send("GET", "/api/models", {}, "model1", set())
+        assert limiter.stats()["model:model1"]["in_flight"] == 0
+
+    def test_aimd_on_429(self):
+        limiter = RateLimiter(default=RateLimit(requests_per_second=80, max_concurrency=8, peak_requests_per_second=100),
+                              additive_increase=30, cooldown=60)
+        limiter.release(limiter.acquire("/models"), 429, 0.1)
+        limiter.release(limiter.acquire("/models"), 429, 0.1)  # within cooldown: no second cut
+        stats = limiter.stats()["default"]
+        assert stats["requests_per_second"] == 40
+        assert stats["max_concurrency"] == 4
+        assert stats["throttled"] == 2
+
+        for _ in range(2):
+            limiter.release(limiter.acquire("/models"), 200, 0.1)
+        stats = limiter.stats()["default"]
+        assert stats["requests_per_second"] == 100
+        assert stats["max_concurrency"] == 8
+
+    def test_backs_off_on_rising_latency(self):
+        limiter = RateLimiter(default=RateLimit(max_concurrency=8), latency_tolerance=2, cooldown=0)
+        for latency in [0.1, 0.1, 0.1, 2.0, 2.0]:
+            limiter.release(limiter.acquire("/models"), 200, latency)
+        assert limiter.stats()["default"]["max_concurrency"] < 8
+
+    def test_client_limits_by_model(self):
+        limiter = RateLimiter(models={"model1": RateLimit(max_concurrency=1)})
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), rate_limiter=limiter)
+        in_flight = []
+        def respond(method, url, **kwargs):
+            in_flight.append(limiter.stats()["model:model1"]["in_flight"])
+            response = completion_response("ok")
+            response.status_code = 200
+            return response
+        api.transport.request.side_effect = respond
+
+        api.get_chat_completions_batch("model1", [[{"role": "user", "content": "x"}]] * 4, max_concurrency=4)
+        assert in_flight == [1, 1, 1, 1]
+        assert limiter.stats()["model:model1"]["in_flight"] == 0
+
+class TestLoadBalancing:
+    @pytest.fixture
+    def cluster_api(self):
+        return OpenWebUI(["http://a.test/", "http://b.test", "http://c.test"], "test-key",
+                         transport=MagicMock(spec=HTTPTransport))
+
+    def test_round_robin(self, cluster_api):
+        cluster_api.transport.request.return_value = status_response(200, json_data=[])
+        for _ in range(6):
+            cluster_api.get_users()
+        hosts = [call.args[1].split("/v1")[0] for call in cluster_api.transport.request.call_args_list]
+        assert hosts == ["http://a.test", "http://b.test", "http://c.test"] * 2
+        assert cluster_api.base_url == "http://a.test"
+
+    def test_idempotent_requests_fail_over(self, cluster_api):
+        def respond(method, url, **kwargs):
+            if url.startswith("http://a.test"):
+                raise requests.exceptions.ConnectionError("down")
+            return status_response(200, json_data=[])
+        cluster_api.transport.request.side_effect = respond
+
+        assert cluster_api.get_users() == []
+        assert cluster_api.load_balancer.stats()["failovers"] == 1
+
+    def test_failing_replica_is_ejected(self, cluster_api):
+        def respond(method, url, **kwargs):
+            return status_response(502 if url.startswith("http://b.test") else 200, json_data=[])
+        cluster_api.transport.request.side_effect = respond
+
+        for _ in range(12):
+            cluster_api.get_users()
+        stats = cluster_api.load_balancer.stats()["replicas"]
+        assert stats["http://b.test"]["ejected"] is True
+        assert stats["http://b.test"]["requests"] == 3
+
+    def test_non_idempotent_requests_do_not_fail_over(self, cluster_api):
+        cluster_api.transport.request.return_value = status_response(503, json_data={"detail": "busy"})
+        result = cluster_api.update_file_content_by_id("file1", "content")
+        assert result.success is False
+        assert cluster_api.transport.request.call_count == 1
+
+    def test_strategies(self):
+        balancer = LoadBalancer(["http://a.test", "http://b.test"], strategy="ewma")
+        balancer.release(balancer.acquire(), True, 1.0)
+        balancer.release(balancer.acquire(), True, 0.1)
+        assert balancer.acquire().base_url == "http://b.test"
+
+        balancer = LoadBalancer(["http://a.test", "http://b.test"], strategy="least_outstanding")
+        first = balancer.acquire()
+        assert balancer.acquire() is not first
+
+        with pytest.raises(ValueError, match="Unknown load balancing strategy"):
+            LoadBalancer(["http://a.test"], strategy="random")
+
+class TestCircuitBreaker:
+    def test_opens_half_opens_and_closes(self):
+        transitions = []
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, minimum_calls=4, window_size=4, open_duration=0.05,
+                                 on_state_change=lambda endpoint, model, old, new: transitions.append((model, old, new)))
+        for success in [True, False, False, True]:
+            breaker.record(breaker.before_call("/chat/completions", "model1"), success)
+        assert breaker.state("/chat/completions", "model1") == "open"
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call("/chat/completions", "model1")
+        # other models are unaffected
+        breaker.record(breaker.before_call("/chat/completions", "model2"), True)
+
+        time.sleep(0.06)
+        key = breaker.before_call("/chat/completions", "model1")
+        with pytest.raises(CircuitOpenError):  # only one trial call while half-open
+            breaker.before_call("/chat/completions", "model1")
+        breaker.record(key, True)
+        assert transitions == [("model1", "closed", "open"), ("model1", "open", "half_open"), ("model1", "half_open", "closed")]
+        assert breaker.stats()["/chat/completions|model1"]["rejected"] == 2
+
+    def test_ids_share_a_circuit(self):
+        assert CircuitBreaker.key("/v1/files/05094421-5b5a-43da-9c56-ddc054945fac") == ("/v1/files/{id}", None)
+
+    def test_client_fails_fast(self):
+        breaker = CircuitBreaker(minimum_calls=2, window_size=2, open_duration=60)
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), circuit_breaker=breaker)
+        api.transport.request.return_value = status_response(503)
+        api.transport.request.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("503")
+
+        for _ in range(2):
+            with pytest.raises(Exception, match="Failed to get chat completion"):
+                api.get_chat_completion("model1", "test")
+        with pytest.raises(CircuitOpenError):
+            api.get_chat_completion("model1", "test")
+        assert api.transport.request.call_count == 2
+        assert breaker.stats()["/chat/completions|model1"]["state"] == "open"
+
+    def test_trial_is_returned_when_nothing_is_sent(self):
+        breaker = CircuitBreaker(minimum_calls=1, window_size=1, open_duration=0.01)
+        breaker.record(breaker.before_call("/chat/completions", "model1"), False)
+        time.sleep(0.02)
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), circuit_breaker=breaker)
+        api.rate_limiter = MagicMock()
+        api.rate_limiter.acquire.side_effect = KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            api._send("POST", "/chat/completions", {}, "model1", set())
+        api.rate_limiter.release.assert_not_called()
+        assert breaker.state("/chat/completions", "model1") == "half_open"
+        # the trial slot is free again
+        breaker.record(breaker.before_call("/chat/completions", "model1"), True)
+        assert breaker.state("/chat/completions", "model1") == "closed"
+
+class TestHedging:
+    def test_hedge_wins_and_loser_is_closed(self):
+        hedging = HedgingPolicy(delay=0.05, budget=1.0)
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), hedging=hedging)
+        slow = completion_response("slow")
+        slow.status_code = 200
+        fast = completion_response("fast")
+        fast.status_code = 200
+        calls = []
+        def respond(method, url, **kwargs):
+            calls.append(kwargs["stream"])
+            if len(calls) == 1:
+                time.sleep(0.3)
+                return slow
+            return fast
+        api.transport.request.side_effect = respond
+
+        completion = api.get_chat_completion("model1", "test")
+        assert completion.choices[0].message.content == "fast"
+        assert calls == [True, True]
+        assert hedging.stats() == {"requests": 1, "hedges": 1, "hedge_wins": 1}
+        time.sleep(0.35)
+        slow.close.assert_called_once()
+        api.close()
+
+    def test_budget_caps_hedges(self):
+        hedging = HedgingPolicy(delay=0.01, budget=0.0)
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), hedging=hedging)
+        def respond(method, url, **kwargs):
+            time.sleep(0.05)
+            return completion_response("only")
+        api.transport.request.side_effect = respond
+
+        assert api.get_chat_completion("model1", "test").choices[0].message.content == "only"
+        assert api.transport.request.call_count == 1
+        assert hedging.stats()["hedges"] == 0
+        api.close()
+
+    def test_delay_tracks_percentile(self):
+        hedging = HedgingPolicy(percentile=90, min_samples=10, initial_delay=5)
+        assert hedging.hedge_delay("model1") == 5
+        for latency in range(1, 11):
+            hedging._record_latency("model1", latency / 10)
+        assert hedging.hedge_delay("model1") == 1.0
+        assert hedging.hedge_delay("model2") == 5
+
+class TestResponseCache:
+    def test_cache_key_is_canonical(self):
+        assert cache_key({"model": "m", "messages": [1]}) == cache_key({"messages": [1], "model": "m"})
+        assert cache_key({"model": "m"}) != cache_key({"model": "n"})
+
+    def test_memory_cache_lru_and_ttl(self):
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1"
+
+        cache = MemoryCache(ttl=0.01)
+        cache.set("a", "1")
+        time.sleep(0.02)
+        assert cache.get("a") is None
+        assert cache.stats() == {"hits": 0, "misses": 1, "entries": 0}
+
+    def test_peek_skips_stats_and_recency(self, tmp_path):
+        for cache in [MemoryCache(max_entries=2), SQLiteCache(str(tmp_path / "cache.db"), max_entries=2)]:
+            cache.set("a", "1")
+            time.sleep(0.01)
+            cache.set("b", "2")
+            assert cache.peek("a") == "1" and cache.peek("missing") is None
+            assert cache.stats() == {"hits": 0, "misses": 0, "entries": 2}
+            time.sleep(0.01)
+            cache.set("c", "3")
+            assert cache.peek("a") is None  # peeking did not make it recently used
+            cache.close()
+
+    def test_sqlite_cache_persists(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        cache = SQLiteCache(path, max_entries=2)
+        for key in ["a", "b", "c"]:
+            cache.set(key, key.upper())
+        cache.close()
+
+        cache = SQLiteCache(path)
+        assert len(cache) == 2
+        assert cache.get("c") == "C"
+        assert cache.get("a") is None
+        cache.close()
+
+    def test_client_serves_repeats_from_cache(self, tmp_path):
+        cache = SQLiteCache(str(tmp_path / "cache.db"))
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), response_cache=cache)
+        api.transport.request.side_effect = lambda *args, **kwargs: completion_response("fresh")
+        messages = [{"role": "user", "content": "test"}]
+
+        first = api.get_chat_completion_with_messages("model1", messages)
+        second = api.get_chat_completion_with_messages("model1", messages)
+        assert isinstance(second, ChatCompletion)
+        assert isinstance(second.choices[0].message, Message)
+        assert second.choices[0].message.content == first.choices[0].message.content == "fresh"
+        assert api.transport.request.call_count == 1
+        assert cache.stats()["hits"] == 1
+
+        api.get_chat_completion_with_messages("model1", messages, use_cache=False)
+        api.get_chat_completion_with_messages("model1", messages, refresh_cache=True)
+        assert api.transport.request.call_count == 3
+        assert cache.stats()["hits"] == 1
+
+MODELS_DATA = {
+    "data": [
+        {"id": "llama3:8b", "owned_by": "ollama", "ollama": {"details": {"family": "llama"}}},
+        {"id": "gpt-4o", "owned_by": "openai",
+         "openai": {"context_length": 128000, "pricing": {"prompt": "0.000005", "completion": "0.000015"}}},
+        {"id": "mistral:latest", "owned_by": "ollama", "ollama": {"details": {"family": "mistral"}}}
+    ]
+}
+
+def models_response(etag='"v1"'):
+    return status_response(200, headers={"ETag": etag}, json_data=copy.deepcopy(MODELS_DATA))
+
+class TestModelCatalog:
+    def test_get_model_loads_once(self, api):
+        api.transport.request.return_value = models_response()
+        assert api.get_model("gpt-4o").id == "gpt-4o"
+        assert api.get_model("missing") is None
+        assert len(api.get_models(cached=True)) == 3
+        assert api.transport.request.call_count == 1
+
+    def test_filters(self, api):
+        api.transport.request.return_value = models_response()
+        catalog = api.model_catalog
+        assert [m.id for m in catalog.filter(owned_by="ollama")] == ["llama3:8b", "mistral:latest"]
+        assert [m.id for m in catalog.filter(family="mistral")] == ["mistral:latest"]
+        assert [m.id for m in catalog.filter(min_context_length=100000, max_prompt_price=0.00001)] == ["gpt-4o"]
+        assert catalog.filter(max_prompt_price=0.000001) == []
+
+    def test_revalidates_in_background(self, api):
+        api.transport.request.return_value = models_response()
+        api.model_catalog.get("gpt-4o")
+        api.model_catalog.invalidate()
+
+        api.transport.request.return_value = status_response(304)
+        assert api.get_model("gpt-4o").id == "gpt-4o"  # served stale while revalidating
+        for _ in range(100):
+            if api.model_catalog.stats()["not_modified"]:
+                break
+            time.sleep(0.01)
+        assert api.model_catalog.stats()["not_modified"] == 1
+        assert api.transport.request.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+        assert api.get_model("llama3:8b") is not None
+
+    def test_failed_refresh_keeps_listing(self):
+        calls = []
+        def load(validators):
+            calls.append(validators)
+            if len(calls) > 1:
+                raise Exception("down")
+            return [Model(id="m1")], {}
+
+        catalog = ModelCatalog(load, ttl=0, retry_interval=60)
+        assert catalog.get("m1").id == "m1"
+        for _ in range(100):
+            if catalog.stats()["errors"]:
+                break
+            catalog.get("m1")
+            time.sleep(0.01)
+        assert catalog.stats()["errors"] == 1
+        assert catalog.get("m1").id == "m1"
+
+class TestDecoders:
+    def test_unknown_fields_go_to_extra_fields(self):
+        assert Pipe(name="p", kind="x").extra_fields == {"kind": "x"}
+        assert OpenWebFile.from_dict({"id": "f1", "status": "ok"}).extra_fields == {"status": "ok"}
+        assert Message("hi", "user").content == "hi"
+        assert Pipe().extra_fields is not Pipe().extra_fields
+
+    def test_nested_decoding(self):
+        model = Model.from_dict({
+            "id": "m1",
+            "openai": {"architecture": {"modality": "text", "new_key": 1}},
+            "ollama": {"details": {"family": "llama"}},
+            "actions": [{"name": "a"}]
+        })
+        assert isinstance(model.openai.architecture, Architecture)
+        assert model.openai.architecture.extra_fields == {"new_key": 1}
+        assert isinstance(model.ollama.details, Details)
+        assert isinstance(model.actions[0], Action)
+        assert model.info is None and model.urlIdx == 0
+
+        knowledge = Knowledge.from_dict({"id": "k1", "files": [{"id": "f1", "meta": {"name": "a.txt"}}, "f2"]})
+        assert isinstance(knowledge.files[0], OpenWebFile)
+        assert knowledge.files[0].meta.name == "a.txt"
+        assert knowledge.files[1] == "f2"
+
+    def test_from_dict_matches_constructor(self):
+        assert Model.from_dict({"id": "m1", "x": 1}) == Model(id="m1", x=1)
+
+class TestCompactModels:
+    def test_compact_objects(self):
+        data = {"id": "f1", "user_id": "u1", "meta": {"content_type": "text/plain"}}
+        compact = OpenWebFile.Compact.from_dict(dict(data))
+        assert not hasattr(compact, "__dict__")
+        assert isinstance(compact.meta, Meta.Compact)
+        assert compact._extra_fields is None
+        assert compact == OpenWebFile.Compact(id="f1", user_id="u1", meta=Meta.Compact(content_type="text/plain"))
+        assert OpenWebFile.Compact.from_dict({"id": "f1", "status": "ok"}).extra_fields == {"status": "ok"}
+
+    def test_strings_are_interned(self):
+        first = User.Compact.from_dict(json.loads('{"role": "admin-role"}'))
+        second = User.Compact.from_dict(json.loads('{"role": "admin-role"}'))
+        assert first.role is second.role
+
+    def test_client_option(self, api):
+        api.compact_models = True
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"id": "u1", "name": "User", "role": "user"}]
+        api.transport.request.return_value = mock_response
+        users = api.get_users()
+        assert isinstance(users[0], User.Compact)
+        assert users[0].role == "user"
+
+class TestLazyListings:
+    def test_get_files_lazy(self, api):
+        mock_response = MagicMock()
+        mock_response.json.return_value = [
+            {"id": f"file{i}", "filename": f"f{i}.txt", "meta": {"name": f"f{i}.txt"}, "data": {"content": "x" * 100}}
+            for i in range(3)
+        ]
+        api.transport.request.return_value = mock_response
+
+        files = api.get_files(lazy=True)
+        assert isinstance(files, LazyList)
+        assert len(files) == 3
+        assert files.pluck("filename") == ["f0.txt", "f1.txt", "f2.txt"]
+        assert repr(files) == "LazyList(3 items, 0 decoded)"
+
+        first = files[0]
+        assert isinstance(first, OpenWebFile)
+        assert first is files[0]
+        assert repr(files) == "LazyList(3 items, 1 decoded)"
+        assert "data" in first.__dict__ and not isinstance(first.__dict__["data"], FileData)
+        assert isinstance(first.data, FileData)
+        assert first.data.content == "x" * 100
+        assert [f.id for f in files[1:]] == ["file1", "file2"]
+        assert files[-1].id == "file2"
+
+    def test_lazy_models_and_knowledge(self, api):
+        api.transport.request.return_value = models_response()
+        models = api.get_models(lazy=True)
+        assert models[2].ollama.details.family == "mistral"
+
+        mock_response = MagicMock()
+        mock_response.json.return_value = [{"id": "k1", "files": [{"id": "f1"}]}]
+        api.transport.request.return_value = mock_response
+        knowledge = api.get_knowledge(lazy=True)
+        assert isinstance(knowledge[0].files[0], OpenWebFile)
+        assert knowledge == api.get_knowledge()
+
+def chunked(data, size):
+    body = json.dumps(data).encode()
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+class TestStreamingListings:
+    FILES = [{"id": f"file{i}", "filename": f"f{i}.txt", "data": {"content": "é" * i}} for i in range(20)]
+
+    def test_iter_files(self, api):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_content.return_value = iter(chunked(self.FILES, 7))
+        api.transport.request.return_value = mock_response
+
+        files = list(api.iter_files(chunk_size=7))
+        assert [f.id for f in files] == [f"file{i}" for i in range(20)]
+        assert isinstance(files[3].data, FileData)
+        assert files[3].data.content == "ééé"
+        assert api.transport.request.call_args.kwargs["stream"] is True
+        mock_response.close.assert_called()
+
+    def test_early_termination_closes_response(self, api):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_content.return_value = iter(chunked(self.FILES, 16))
+        api.transport.request.return_value = mock_response
+
+        with api.iter_users() as users:
+            first = next(users)
+        assert isinstance(first, User)
+        mock_response.close.assert_called()
+
+    def test_truncated_body_raises(self, api):
+        mock_response = MagicMock()
+        mock_response.ok = True
+        mock_response.iter_content.return_value = iter([b'[{"id": "k1"}, {"id": "k'])
+        api.transport.request.return_value = mock_response
+
+        stream = api.iter_knowledge()
+        assert next(stream).id == "k1"
+        with pytest.raises(ValueError):
+            next(stream)
+
+    @pytest.mark.parametrize("body", [
+        b'[1.5, -2e10, 0, 3.25E-3, 7, -0.0, 1e+2]',
+        b'[{"a": [1.5, {"b": -2.5e-3}]}, "x\\"\\u00e9", true, null, false, 12345678901234567890, "\xc3\xa9"]',
+    ])
+    def test_decoder_survives_any_chunking(self, body):
+        expected = json.loads(body)
+        # Every single split point, then random chunkings
+        splits = [[position] for position in range(1, len(body))]
+        rng = random.Random(42)
+        splits += [sorted(rng.sample(range(1, len(body)), rng.randint(2, 8))) for _ in range(300)]
+        for points in splits:
+            decoder = _JSONArrayDecoder()
+            items = []
+            for start, stop in zip([0] + points, points + [len(body)]):
+                items += decoder.feed(body[start:stop])
+            items += decoder.flush()
+            assert items == expected, points
+
+    def test_decoder_rejects_malformed_numbers(self):
+        decoder = _JSONArrayDecoder()
+        with pytest.raises(ValueError):
+            decoder.feed(b'[1.')
+            decoder.feed(b',2]')
+            decoder.flush()
+
+    def test_error_status(self, api):
+        mock_response = status_response(500)
+        mock_response.ok = False
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("500 Server Error")
+        api.transport.request.return_value = mock_response
+        with pytest.raises(Exception, match="Failed to fetch files"):
+            api.iter_files()
+        mock_response.close.assert_called()
+
+    def test_async_iter_files(self):
+        async def run():
+            async def aiter_bytes(chunk_size):
+                for chunk in chunked(self.FILES, 5):
+                    yield chunk
+
+            mock_response = MagicMock()
+            mock_response.is_error = False
+            mock_response.aiter_bytes = aiter_bytes
+            mock_response.aclose = AsyncMock()
+            transport = AsyncMock(spec=AsyncHTTPTransport)
+            transport.stream.return_value = mock_response
+            client = AsyncOpenWebUI("http://test.com", "test-key", transport=transport)
+
+            stream = await client.iter_files()
+            ids = [file.id async for file in stream]
+            assert ids == [f"file{i}" for i in range(20)]
+            mock_response.aclose.assert_awaited()
+        asyncio.run(run())
+
+class TestMetadataOnlyFiles:
+    @staticmethod
+    def respond(method, url, **kwargs):
+        if url.endswith("/v1/files"):
+            return status_response(200, json_data=[
+                {"id": f"file{i}", "filename": f"f{i}.txt", "meta": {"name": f"f{i}.txt"},
+                 "data": {"content": "should be dropped", "status": "completed"}}
+                for i in range(4)
+            ])
+        file_id = url.rsplit("/", 1)[-1]
+        return status_response(200, json_data={"id": file_id, "data": {"content": f"content of {file_id}"}})
+
+    def test_content_fetched_on_first_access(self, api):
+        api.transport.request.side_effect = self.respond
+        files = api.get_files(content=False)
+        assert api.transport.request.call_args.kwargs["params"] == {"content": "false"}
+        assert files[0].filename == "f0.txt"
+        assert isinstance(files[0].data, RemoteFileData)
+        assert files[0].data.extra_fields == {"status": "completed"}
+        assert not files[0].data.loaded
+        assert "should be dropped" not in repr(files[0])
+
+        assert files[0].data.content == "content of file0"
+        assert files[0].data.content == "content of file0"
+        assert api.transport.request.call_count == 2
+
+        # Cached across listings
+        again = api.get_files(content=False)
+        assert again[0].data.content == "content of file0"
+        assert api.transport.request.call_count == 3
+
+    def test_raw_items_are_not_modified(self, api):
+        items = [{"id": "file0", "filename": "f0.txt", "data": {"content": "text", "status": "completed"}}]
+        api.transport.request.return_value = status_response(200, json_data=items)
+        files = api.get_files(content=False, lazy=True)
+        assert files[0].data.extra_fields == {"status": "completed"}
+        assert items == [{"id": "file0", "filename": "f0.txt", "data": {"content": "text", "status": "completed"}}]
+
+    def test_fetch_file_contents_in_batch(self, api):
+        api.transport.request.side_effect = self.respond
+        files = api.get_files(content=False, lazy=True)
+        contents = api.fetch_file_contents(list(files), max_concurrency=4)
+        assert contents == {f"file{i}": f"content of file{i}" for i in range(4)}
+        assert all(file.data.loaded for file in files)
+        assert api.transport.request.call_count == 5
+
+    def test_fetch_file_contents_keeps_partial_results(self, api):
+        def respond(method, url, **kwargs):
+            if url.endswith("/file2"):
+                response = status_response(500, json_data={"detail": "Internal Server Error"})
+                response.raise_for_status.side_effect = requests.exceptions.HTTPError("500 Server Error")
+                return response
+            return self.respond(method, url, **kwargs)
+
+        api.transport.request.side_effect = respond
+        files = api.get_files(content=False)
+        contents = api.fetch_file_contents(files)
+        assert isinstance(contents["file2"], Exception) and "500 Server Error" in str(contents["file2"])
+        assert {id: content for id, content in contents.items() if id != "file2"} == \
+            {f"file{i}": f"content of file{i}" for i in (0, 1, 3)}
+        assert files[0].data.loaded and not files[2].data.loaded
+        assert api.file_contents.cache.get("file3") == "content of file3"
+        with pytest.raises(Exception, match="500 Server Error"):
+            files[2].data.content
+
+        # The failure is not cached
+        api.transport.request.side_effect = self.respond
+        assert files[2].data.content == "content of file2"
+
+    def test_update_invalidates_cached_content(self, api):
+        api.transport.request.side_effect = self.respond
+        api.fetch_file_contents(["file1"])
+        assert api.file_contents.cache.get("file1") == "content of file1"
+        api.update_file_content_by_id("file1", "new")
+        assert api.file_contents.cache.get("file1") is None
+
+class TestStreamingUploads:
+    PAYLOAD = bytes(range(256)) * 1000
+
+    @staticmethod
+    def parse(encoder):
+        body = b"".join(bytes(chunk) for chunk in encoder)
+        head, rest = body.split(b"\r\n\r\n", 1)
+        return head.decode(), rest[:-len(f"\r\n--{encoder.boundary}--\r\n")], body
+
+    def test_body_from_bytes_and_path(self, tmp_path):
+        path = tmp_path / "report.pdf"
+        path.write_bytes(self.PAYLOAD)
+        for source, name in [(self.PAYLOAD, "data.bin"), (str(path), None)]:
+            encoder = MultipartEncoder(source, filename=name, chunk_size=4096)
+            head, content, body = self.parse(encoder)
+            assert content == self.PAYLOAD
+            assert len(body) == len(encoder) == encoder.length
+        assert 'filename="report.pdf"' in head
+        assert "Content-Type: application/pdf" in head
+
+    def test_progress_and_resend_from_stream(self):
+        progress = []
+        stream = io.BytesIO(b"skip" + self.PAYLOAD)
+        stream.read(4)
+        encoder = MultipartEncoder(stream, filename="a.txt", chunk_size=65536,
+                                   progress_callback=lambda sent, total: progress.append((sent, total)))
+        assert self.parse(encoder)[1] == self.PAYLOAD
+        assert progress[-1] == (encoder.length, encoder.length)
+        assert [sent for sent, _ in progress] == sorted(sent for sent, _ in progress)
+        # Retries replay the body from where the stream started
+        assert self.parse(encoder)[1] == self.PAYLOAD
+
+    def test_non_seekable_stream_has_unknown_length(self):
+        class Pipe(io.RawIOBase):
+            def __init__(self, data):
+                self.buffer = io.BytesIO(data)
+            def readable(self):
+                return True
+            def readinto(self, b):
+                data = self.buffer.read(len(b))
+                b[:len(data)] = data
+                return len(data)
+
+        progress = []
+        encoder = MultipartEncoder(Pipe(self.PAYLOAD), filename="a.mp3",
+                                   progress_callback=lambda sent, total: progress.append(total))
+        assert encoder.length is None and encoder
+        assert self.parse(encoder)[1] == self.PAYLOAD
+        assert set(progress) == {None}
+        with pytest.raises(ValueError, match="non-seekable"):
+            list(encoder)
+
+    def test_async_iteration_reads_off_the_event_loop(self):
+        readers = set()
+        class Stream(io.BytesIO):
+            def read(self, size=-1):
+                readers.add(threading.current_thread())
+                return super().read(size)
+
+        progress = []
+        encoder = MultipartEncoder(Stream(self.PAYLOAD), filename="a.bin", chunk_size=65536,
+                                   progress_callback=lambda sent, total: progress.append(sent))
+
+        async def collect():
+            return [chunk async for chunk in encoder]
+        body = b"".join(asyncio.run(collect()))
+        assert readers and threading.main_thread() not in readers
+        assert progress[-1] == encoder.length == len(body)
+        assert body == b"".join(bytes(chunk) for chunk in encoder)
+
+    def test_upload_file_streams_bytes(self, api):
+        api.transport.request.return_value = status_response(200, json_data={"id": "file1", "filename": "notes.txt"})
+        file = api.upload_file(self.PAYLOAD, filename="notes.txt")
+        assert file.id == "file1"
+        kwargs = api.transport.request.call_args.kwargs
+        encoder = kwargs["data"]
+        assert isinstance(encoder, MultipartEncoder)
+        assert kwargs["headers"]["Content-Type"] == encoder.content_type
+        assert "files" not in kwargs
+        assert self.parse(encoder)[1] == self.PAYLOAD
+
+    def test_async_upload_file_sets_length(self):
+        async_api = AsyncOpenWebUI(base_url="http://test.com", api_key="test-key",
+                                   transport=AsyncMock(spec=AsyncHTTPTransport))
+        async_api.transport.request.return_value = status_response(200, json_data={"id": "file1"})
+        asyncio.run(async_api.upload_file(memoryview(self.PAYLOAD), filename="notes.txt"))
+        kwargs = async_api.transport.request.call_args.kwargs
+        assert kwargs["headers"]["Content-Type"].startswith("multipart/form-data; boundary=")
+        assert int(kwargs["headers"]["Content-Length"]) > len(self.PAYLOAD)
+        assert kwargs["headers"]["Authorization"] == "Bearer test-key"
+
+class TestBulkUpload:
+    @staticmethod
+    def write(tmp_path, name, content):
+        path = tmp_path / name
+        path.write_bytes(content)
+        return str(path)
+
+    def test_skips_existing_and_duplicate_content(self, api, tmp_path):
+        known = self.write(tmp_path, "known.txt", b"already there")
+        new = self.write(tmp_path, "new.txt", b"fresh content")
+        copy_of_new = self.write(tmp_path, "copy.txt", b"fresh content")
+        other = self.write(tmp_path, "other.txt", b"other content")
+        uploaded = []
+
+        def respond(method, url, **kwargs):
+            if method == "GET":
+                return status_response(200, json_data=[
+                    {"id": "old", "filename": "known.txt", "hash": sha256_file(known)},
+                    {"id": "unrelated", "filename": "x.txt", "hash": "0" * 64},
+                ])
+            encoder = kwargs["data"]
+            uploaded.append(encoder.filename)
+            return status_response(200, json_data={"id": f"id-{encoder.filename}", "filename": encoder.filename})
+
+        api.transport.request.side_effect = respond
+        progress = []
+        results = api.upload_files([known, new, copy_of_new, other, str(tmp_path / "missing.txt")],
+                                   max_concurrency=4, progress_callback=lambda done, total: progress.append((done, total)))
+
+        assert sorted(uploaded) in (["new.txt", "other.txt"], ["copy.txt", "other.txt"])
+        assert results[known].id == "old" and results[known].success
+        assert results[new] is results[copy_of_new]
+        assert results[other].id == "id-other.txt"
+        assert isinstance(results[str(tmp_path / "missing.txt")], ValidationErrorItem)
+        assert list(results) == [known, new, copy_of_new, other, str(tmp_path / "missing.txt")]
+        assert progress[-1] == (2, 2)
+
+    def test_upload_failures_do_not_abort(self, api, tmp_path):
+        paths = [self.write(tmp_path, f"f{i}.txt", f"content {i}".encode()) for i in range(3)]
+
+        def respond(method, url, **kwargs):
+            if kwargs["data"].filename == "f1.txt":
+                raise requests.exceptions.ConnectionError("boom")
+            return status_response(200, json_data={"id": kwargs["data"].filename})
+
+        api.transport.request.side_effect = respond
+        results = api.upload_files(paths, skip_existing=False)
+        assert isinstance(results[paths[1]], ValidationErrorItem)
+        assert "boom" in results[paths[1]].message
+        assert results[paths[0]].id == "f0.txt" and results[paths[2]].id == "f2.txt"
+        assert api.transport.request.call_count == 3
+
+class TestUploadIndex:
+    @pytest.fixture
+    def index_api(self, tmp_path):
+        return OpenWebUI(base_url="http://test.com", api_key="test-key", transport=MagicMock(spec=HTTPTransport),
+                         upload_index=UploadIndex(str(tmp_path / "uploads.db")))
+
+    @staticmethod
+    def respond(method, url, **kwargs):
+        if method == "POST":
+            return status_response(200, json_data={"id": "file1", "filename": kwargs["data"].filename})
+        if method == "GET" and url.endswith("/v1/files"):
+            return status_response(200, json_data=[])
+        return status_response(200, json_data={"id": "file1", "filename": "a.txt", "hash": "x"})
+
+    def test_repeat_upload_is_served_from_index(self, index_api, tmp_path):
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"hello")
+        index_api.transport.request.side_effect = self.respond
+        assert index_api.upload_file(str(path)).id == "file1"
+        assert index_api.transport.request.call_count == 1
+
+        # Same content again, even under another name or as bytes: no request
+        again = index_api.upload_file(b"hello", filename="b.txt")
+        assert again.id == "file1" and again.success
+        assert index_api.transport.request.call_count == 1
+
+        # A restarted client reuses the index on disk
+        restarted = OpenWebUI(base_url="http://test.com", api_key="test-key", transport=MagicMock(spec=HTTPTransport),
+                              upload_index=UploadIndex(str(tmp_path / "uploads.db")))
+        results = restarted.upload_files([str(path)])
+        assert results[str(path)].id == "file1"
+        restarted.transport.request.assert_not_called()
+
+    def test_index_hit_returns_the_server_file(self, index_api, tmp_path):
+        server_file = {"id": "file1", "filename": "a.txt", "hash": hashlib.sha256(b"hello").hexdigest(),
+                       "meta": {"name": "a.txt", "size": 5}, "data": {"status": "completed"}, "created_at": 1700000000}
+        index_api.transport.request.return_value = status_response(200, json_data=server_file)
+        first = index_api.upload_file(b"hello", filename="a.txt")
+        again = index_api.upload_file(b"hello", filename="b.txt")
+        assert index_api.transport.request.call_count == 1
+        assert again == first and again.meta.size == 5 and again.created_at == 1700000000
+
+        # Indexes written before the record was stored are migrated, and verified on first use
+        path = str(tmp_path / "old.db")
+        connection = sqlite3.connect(path)
+        connection.execute("CREATE TABLE uploads (hash TEXT PRIMARY KEY, file_id TEXT NOT NULL, filename TEXT, "
+                           "verified_at REAL NOT NULL)")
+        connection.execute("INSERT INTO uploads VALUES (?, 'file1', 'a.txt', ?)", (server_file["hash"], time.time()))
+        connection.commit()
+        connection.close()
+        index_api.upload_index = UploadIndex(path)
+        assert index_api.upload_file(b"hello", filename="a.txt") == first
+        assert index_api.transport.request.call_args.args == ("GET", "http://test.com/v1/files/file1")
+        assert index_api.upload_index.lookup(server_file["hash"]).file["meta"] == {"name": "a.txt", "size": 5}
+
+    def test_unchanged_files_are_not_rehashed(self, tmp_path):
+        index = UploadIndex(str(tmp_path / "uploads.db"))
+        path = tmp_path / "a.txt"
+        path.write_bytes(b"one")
+        first = index.hash_of(path)
+        with patch('openwebui_python.uploads.sha256_file') as rehash:
+            assert index.hash_of(path) == first
+            rehash.assert_not_called()
+        path.write_bytes(b"two, longer")
+        assert index.hash_of(path) != first
+
+    def test_stale_entries_are_verified(self, index_api, tmp_path):
+        index_api.upload_index.verify_after = 0
+        index_api.transport.request.side_effect = self.respond
+        index_api.upload_file(b"hello", filename="a.txt")
+        time.sleep(0.01)
+
+        index_api.upload_file(b"hello", filename="a.txt")
+        assert index_api.transport.request.call_args.args == ("GET", "http://test.com/v1/files/file1")
+        assert index_api.transport.request.call_count == 2
+
+        # Deleted on the server: dropped from the index and uploaded again
+        index_api.transport.request.side_effect = [status_response(404, json_data={}),
+                                                   status_response(200, json_data={"id": "file2"})]
+        assert index_api.upload_file(b"hello", filename="a.txt").id == "file2"
+        assert index_api.upload_index.lookup(hashlib.sha256(b"hello").hexdigest()).file_id == "file2"
+
+    def test_delete_forgets_file(self, index_api):
+        index_api.transport.request.side_effect = self.respond
+        index_api.upload_file(b"hello", filename="a.txt")
+        assert len(index_api.upload_index) == 1
+        index_api.transport.request.side_effect = None
+        index_api.transport.request.return_value = status_response(500, json_data={"detail": "Database is locked"})
+        assert not index_api.delete_file_by_id("file1").success
+        assert len(index_api.upload_index) == 1  # still on the server
+        index_api.transport.request.return_value = status_response(200, json_data={})
+        index_api.delete_file_by_id("file1")
+        assert len(index_api.upload_index) == 0
+
+class TestBulkFileOperations:
+    def test_delete_files(self, api):
+        def respond(method, url, **kwargs):
+            if url.endswith("/bad"):
+                return status_response(404, json_data={"detail": "Not found"})
+            return status_response(200, json_data={})
+
+        api.transport.request.side_effect = respond
+        progress = []
+        results = api.delete_files(["a", "bad", "b", "a"], max_concurrency=4,
+                                   progress_callback=lambda done, total: progress.append((done, total)))
+        assert list(results) == ["a", "bad", "b"]
+        assert results["a"].success and results["b"].success
+        assert not results["bad"].success and results["bad"].message == "Not found"
+        assert api.transport.request.call_count == 3
+        assert progress[-1] == (3, 3)
+
+    def test_get_files_by_ids(self, api):
+        def respond(method, url, **kwargs):
+            file_id = url.rsplit("/", 1)[-1]
+            if file_id == "missing":
+                response = status_response(404)
+                response.raise_for_status.side_effect = requests.exceptions.HTTPError("404 Not Found")
+                return response
+            return status_response(200, json_data={"id": file_id, "filename": f"{file_id}.txt"})
+
+        api.transport.request.side_effect = respond
+        results = api.get_files_by_ids(["f1", "missing", "f2"])
+        assert results["f1"].filename == "f1.txt" and results["f2"].id == "f2"
+        assert isinstance(results["missing"], ValidationErrorItem)
+        assert "404" in results["missing"].message
+
+    def test_cancel_skips_remaining(self, api):
+        cancel = threading.Event()
+
+        def respond(method, url, **kwargs):
+            cancel.set()
+            return status_response(200, json_data={})
+
+        api.transport.request.side_effect = respond
+        results = api.delete_files([f"file{i}" for i in range(5)], max_concurrency=1, cancel=cancel)
+        assert api.transport.request.call_count == 1
+        assert results["file0"].success
+        assert all(results[f"file{i}"].message == "Cancelled" for i in range(1, 5))
+
+    def test_rate_limited(self, api):
+        api.rate_limiter = RateLimiter(endpoints={"/v1/files": RateLimit(max_concurrency=2)}, adaptive=False)
+        in_flight = []
+        peak = []
+        lock = threading.Lock()
+
+        def respond(method, url, **kwargs):
+            with lock:
+                in_flight.append(url)
+                peak.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.remove(url)
+            return status_response(200, json_data={})
+
+        api.transport.request.side_effect = respond
+        api.delete_files([f"file{i}" for i in range(8)], max_concurrency=8)
+        assert max(peak) <= 2
+
+    def test_async_delete_files(self):
+        async_api = AsyncOpenWebUI(base_url="http://test.com", api_key="test-key",
+                                   transport=AsyncMock(spec=AsyncHTTPTransport))
+        async_api.transport.request.return_value = status_response(200, json_data={})
+        results = asyncio.run(async_api.delete_files(["a", "b", ""]))
+        assert results["a"].success and results["b"].success
+        assert results[""].message == "id cannot be empty"
+
+class FakeKnowledgeServer:
+    '''
+    Just enough of the files and knowledge endpoints to exercise KnowledgeSync
+    '''
+    def __init__(self, batch=True):
+        self.files = {}
+        self.knowledge = []
+        self.calls = []
+        self.fail_add = set()
+        self.batch = batch
+
+    def __call__(self, method, url, **kwargs):
+        path = url.split("http://test.com", 1)[1]
+        self.calls.append((method, path))
+        if method == "GET" and path == "/v1/knowledge/kb1":
+            files = [{"id": file_id, "filename": self.files[file_id]} for file_id in self.knowledge]
+            return status_response(200, json_data={"id": "kb1", "files": files})
+        if method == "POST" and path == "/v1/files/":
+            file_id = f"file{len(self.files) + 1}"
+            self.files[file_id] = kwargs["data"].filename
+            return status_response(200, json_data={"id": file_id, "filename": kwargs["data"].filename})
+        if method == "POST" and path == "/v1/knowledge/kb1/files/batch/add":
+            if not self.batch:
+                return status_response(404, json_data={"detail": "Not Found"})
+            errors = []
+            for item in kwargs["json"]:
+                if self.files[item["file_id"]] in self.fail_add:
+                    errors.append(f"File {item['file_id']}: Processing failed")
+                else:
+                    self.knowledge.append(item["file_id"])
+            warnings = {"message": "Some files failed", "errors": errors} if errors else None
+            return status_response(200, json_data={"id": "kb1", "warnings": warnings})
+        if method == "POST" and path.startswith("/v1/knowledge/kb1/file/"):
+            file_id = kwargs["json"]["file_id"]
+            if path.endswith("/add"):
+                if self.files[file_id] in self.fail_add:
+                    return status_response(400, json_data={"detail": "Processing failed"})
+                self.knowledge.append(file_id)
+            else:
+                self.knowledge.remove(file_id)
+            return status_response(200, json_data={"id": "kb1"})
+        if method == "POST" and path.endswith("/data/content/update"):
+            return status_response(200, json_data={})
+        raise AssertionError(f"Unexpected request {method} {path}")
+
+class TestKnowledgeMembership:
+    def test_batches_adds(self, api):
+        server = FakeKnowledgeServer()
+        server.files = {f"f{i}": f"{i}.md" for i in range(250)}
+        server.fail_add = {"7.md"}
+        api.transport.request.side_effect = server
+        result = api.add_files_to_knowledge("kb1", list(server.files), batch_size=100)
+        assert len(server.calls) == 3
+        assert len(result.succeeded) == 249 and not result.success
+        assert "Processing failed" in result.failed["f7"]
+
+    def test_falls_back_to_per_file_calls(self, api):
+        server = FakeKnowledgeServer(batch=False)
+        server.files = {f"f{i}": f"{i}.md" for i in range(5)}
+        api.transport.request.side_effect = server
+        result = api.add_files_to_knowledge("kb1", list(server.files))
+        assert result.success and sorted(result.succeeded) == sorted(server.files)
+        assert len(server.calls) == 6
+
+        # The missing endpoint is remembered
+        server.calls.clear()
+        api.add_files_to_knowledge("kb1", ["f0"])
+        assert server.calls == [("POST", "/v1/knowledge/kb1/file/add")]
+
+    def test_missing_knowledge_keeps_batch_endpoint(self, api):
+        calls = []
+
+        def respond(method, url, **kwargs):
+            calls.append(url.split("http://test.com", 1)[1])
+            return status_response(404, json_data={"detail": "We could not find what you're looking for :/"})
+
+        api.transport.request.side_effect = respond
+        result = api.add_files_to_knowledge("deleted", ["a", "b"])
+        assert result.failed == dict.fromkeys(["a", "b"], "We could not find what you're looking for :/")
+        assert api._knowledge_batch_add
+
+        server = FakeKnowledgeServer()
+        server.files = {"f0": "0.md"}
+        api.transport.request.side_effect = server
+        assert api.add_files_to_knowledge("kb1", ["f0"]).success
+        assert server.calls == [("POST", "/v1/knowledge/kb1/files/batch/add")]
+
+    @pytest.mark.parametrize("batch", [True, False], ids=["batch", "per-file"])
+    def test_async_client(self, batch):
+        server = FakeKnowledgeServer(batch=batch)
+        server.files = {f"f{i}": f"{i}.md" for i in range(5)}
+        server.fail_add = {"3.md"}
+        async_api = AsyncOpenWebUI("http://test.com", "test-key", transport=AsyncMock(spec=AsyncHTTPTransport))
+        async_api.transport.request.side_effect = server
+
+        result = asyncio.run(async_api.add_files_to_knowledge("kb1", list(server.files), batch_size=2))
+        assert sorted(result.succeeded) == ["f0", "f1", "f2", "f4"] and "Processing failed" in result.failed["f3"]
+        assert async_api._knowledge_batch_add is batch
+        result = asyncio.run(async_api.remove_files_from_knowledge("kb1", ["f0", "f1"]))
+        assert result.success and sorted(server.knowledge) == ["f2", "f4"]
+
+    def test_remove_skips_decoding(self, api):
+        responses = [status_response(200), status_response(400, json_data={"detail": "Not in knowledge"})]
+        api.transport.request.side_effect = lambda method, url, **kwargs: responses[kwargs["json"]["file_id"] == "b"]
+        result = api.remove_files_from_knowledge("kb1", ["a", "b"])
+        assert result.succeeded == ["a"] and result.failed == {"b": "Not in knowledge"}
+        responses[0].json.assert_not_called()
+
+class TestKnowledgeSync:
+    @pytest.fixture(params=[True, False], ids=["batch", "per-file"])
+    def server(self, api, request):
+        server = FakeKnowledgeServer(batch=request.param)
+        api.transport.request.side_effect = server
+        return server
+
+    @staticmethod
+    def write(directory, name, content):
+        path = directory / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        return path
+
+    def test_only_changes_are_sent(self, api, server, tmp_path):
+        self.write(tmp_path, "a.md", "alpha")
+        self.write(tmp_path, "docs/b.md", "beta")
+        gone = self.write(tmp_path, "c.md", "gamma")
+        self.write(tmp_path, ".git/config", "hidden")
+
+        report = api.sync_directory_to_knowledge("kb1", str(tmp_path))
+        assert sorted(report.added) == ["a.md", "c.md", "docs/b.md"]
+        assert len(server.knowledge) == 3
+
+        server.calls.clear()
+        with patch('openwebui_python.uploads.sha256_file') as rehash:
+            report = api.sync_directory_to_knowledge("kb1", str(tmp_path))
+            rehash.assert_not_called()
+        assert not report.changed and report.unchanged == 3
+        assert server.calls == [("GET", "/v1/knowledge/kb1")]
+
+        self.write(tmp_path, "a.md", "alpha, revised")
+        gone.unlink()
+        self.write(tmp_path, "d.md", "delta")
+        report = api.sync_directory_to_knowledge("kb1", str(tmp_path))
+        assert report.updated == ["a.md"] and report.added == ["d.md"]
+        assert len(report.removed) == 1 and report.unchanged == 1
+        assert sorted(server.files[file_id] for file_id in server.knowledge) == ["a.md", "b.md", "d.md"]
+        revised = next(file_id for file_id in server.knowledge if server.files[file_id] == "a.md")
+        assert ("POST", f"/v1/files/{revised}/data/content/update") in server.calls
+
+    def test_interrupted_sync_resumes_without_reuploading(self, api, server, tmp_path):
+        self.write(tmp_path, "a.md", "alpha")
+        self.write(tmp_path, "b.md", "beta")
+        server.fail_add = {"b.md"}
+        report = api.sync_directory_to_knowledge("kb1", str(tmp_path))
+        assert report.added == ["a.md"] and "b.md" in report.failed
+        assert len(server.files) == 2
+
+        server.fail_add = set()
+        report = api.sync_directory_to_knowledge("kb1", str(tmp_path))
+        assert report.added == ["b.md"]
+        assert len(server.files) == 2
+        assert len(server.knowledge) == 2
+
+    def test_keeps_foreign_files_unless_mirroring(self, api, server, tmp_path):
+        server.files["other"] = "other.pdf"
+        server.knowledge.append("other")
+        self.write(tmp_path, "a.md", "alpha")
+        report = api.sync_directory_to_knowledge("kb1", str(tmp_path), remove_missing=False)
+        assert report.added == ["a.md"] and "other" in server.knowledge
+        report = api.sync_directory_to_knowledge("kb1", str(tmp_path))
+        assert report.removed == ["other"] and server.knowledge == ["file2"]
+
+class TestKnowledgeIndex:
+    @staticmethod
+    def listing(**knowledge):
+        return [{"id": kid, "updated_at": stamp, "files": [{"id": f} for f in files]}
+                for kid, (stamp, files) in knowledge.items()]
+
+    def test_reverse_lookups(self):
+        index = KnowledgeIndex(lambda: self.listing(kb1=(1, ["a", "b"]), kb2=(1, ["b"])), lambda kid: [])
+        assert index.knowledge_of("b") == {"kb1", "kb2"}
+        assert index.knowledge_of("a") == {"kb1"}
+        assert index.knowledge_of("zzz") == set()
+        assert index.files_of("kb2") == {"b"}
+        assert index.contains("kb1", "a") and not index.contains("kb2", "a")
+        assert "a" in index and len(index) == 2
+
+    def test_incremental_refresh(self):
+        listings = [self.listing(kb1=(1, ["a"]), kb2=(1, ["b"]), kb3=(1, ["c"]))]
+        fetched = []
+
+        def fetch_files(kid):
+            fetched.append(kid)
+            return ["b", "d"]
+
+        index = KnowledgeIndex(lambda: listings[-1], fetch_files, ttl=3600)
+        index.refresh()
+        # kb2 changed and its listing entry has no files; kb3 was deleted
+        listings.append([{"id": "kb1", "updated_at": 1, "files": [{"id": "a"}]},
+                         {"id": "kb2", "updated_at": 2}])
+        index.refresh()
+        assert fetched == ["kb2"]
+        assert index.stats()["rebuilt"] == 4
+        assert index.knowledge_of("d") == {"kb2"}
+        assert "c" not in index and index.files_of("kb3") == set()
+
+    def test_client_lookup_and_invalidation(self, api):
+        api.transport.request.return_value = status_response(200, json_data=self.listing(kb1=(1, ["f1"])))
+        assert api.get_knowledge_ids_for_file("f1") == {"kb1"}
+        assert api.get_knowledge_ids_for_file("f2") == set()
+        assert api.transport.request.call_count == 1
+
+        api.transport.request.return_value = status_response(200, json_data={"id": "kb1"})
+        api.add_remove_file_to_knowledge("kb1", "f2", True)
+        # The server's updated_at only has a resolution of seconds, kb1 is refetched anyway
+        api.transport.request.return_value = None
+        api.transport.request.side_effect = [
+            status_response(200, json_data=[{"id": "kb1", "updated_at": 1}]),
+            status_response(200, json_data={"id": "kb1", "files": [{"id": "f1"}, {"id": "f2"}]}),
+        ]
+        assert api.get_knowledge_ids_for_file("f2") == {"kb1"}
+        assert api.get_knowledge_ids_for_file("f1") == {"kb1"}
+        assert api.transport.request.call_count == 4
+
+    def test_concurrent_lookups(self):
+        index = KnowledgeIndex(lambda: self.listing(**{f"kb{i}": (1, [f"f{i}", "shared"]) for i in range(50)}),
+                               lambda kid: [], ttl=0)
+        errors = []
+
+        def lookup():
+            try:
+                for _ in range(200):
+                    assert len(index.knowledge_of("shared")) == 50
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+
+class TestContentUpdates:
+    @staticmethod
+    def sha(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def test_skips_content_sent_before(self, api):
+        api.transport.request.return_value = status_response(200, json_data={})
+        assert api.update_file_content_by_id("file1", "same", skip_unchanged=True).success
+        result = api.update_file_content_by_id("file1", "same", skip_unchanged=True)
+        assert result.success and result.message == "Content unchanged"
+        assert [call.args[0] for call in api.transport.request.call_args_list] == ["GET", "POST"]
+
+    def test_failed_update_keeps_known_content(self, api):
+        api.transport.request.return_value = status_response(200, json_data={})
+        api.update_file_content_by_id("file1", "same")
+        api.file_contents.cache.set("file1", "same")
+        api.transport.request.return_value = status_response(500, json_data={"detail": "Embedding failed"})
+        assert not api.update_file_content_by_id("file1", "other").success
+        assert api.file_contents.cache.get("file1") == "same"
+        api.file_contents.cache.hits = 0
+        api._content_hashes.clear()
+        assert api.update_file_content_by_id("file1", "same", skip_unchanged=True).message == "Content unchanged"
+        assert api.file_contents.cache.stats()["hits"] == 0  # comparing does not count as a cache hit
+
+    def test_compares_with_server_hash(self, api):
+        def respond(method, url, **kwargs):
+            if method == "GET":
+                return status_response(200, json_data={"id": "file1", "hash": self.sha("on server")})
+            return status_response(200, json_data={})
+
+        api.transport.request.side_effect = respond
+        assert api.update_file_content_by_id("file1", "on server", skip_unchanged=True).message == "Content unchanged"
+        api.update_file_content_by_id("file2", "new", skip_unchanged=True)
+        assert api.transport.request.call_args.args == ("POST", "http://test.com/v1/files/file2/data/content/update")
+
+    def test_gzip_and_fallback(self, api):
+        content = "lorem ipsum " * 1000
+        api.transport.request.return_value = status_response(200, json_data={})
+        api.update_file_content_by_id("file1", content, compress=True)
+        kwargs = api.transport.request.call_args.kwargs
+        assert kwargs["headers"]["Content-Encoding"] == "gzip"
+        assert len(kwargs["data"]) < len(content) / 10
+        assert json.loads(gzip.decompress(kwargs["data"])) == {"content": content}
+
+        # Small bodies are not worth compressing
+        api.update_file_content_by_id("file1", "short", compress=True)
+        assert "data" not in api.transport.request.call_args.kwargs
+
+        api.transport.request.return_value = None
+        api.transport.request.side_effect = [status_response(415, json_data={}), status_response(200, json_data={}),
+                                             status_response(200, json_data={})]
+        assert api.update_file_content_by_id("file1", content, compress=True).success
+        api.update_file_content_by_id("file1", content + "!", compress=True)
+        assert api.transport.request.call_args.kwargs["json"] == {"content": content + "!"}
+        assert api.transport.request.call_count == 5
+
+    def test_bulk_update_uses_one_listing(self, api):
+        calls = []
+
+        def respond(method, url, **kwargs):
+            calls.append((method, url))
+            if method == "GET":
+                return status_response(200, json_data=[
+                    {"id": "a", "hash": self.sha("alpha")}, {"id": "b", "hash": self.sha("old beta")}
+                ])
+            return status_response(200, json_data={})
+
+        api.transport.request.side_effect = respond
+        results = api.update_file_contents({"a": "alpha", "b": "beta", "c": "gamma"})
+        assert results["a"].message == "Content unchanged"
+        assert results["b"].success and results["c"].success
+        assert sorted(url.rsplit("/v1/files/", 1)[1] for method, url in calls if method == "POST") == \
+            ["b/data/content/update", "c/data/content/update"]
+        assert sum(method == "GET" for method, url in calls) == 1
+
+    def test_async_client(self):
+        calls = []
+
+        def respond(method, url, **kwargs):
+            calls.append((method, url.rsplit("http://test.com", 1)[1], kwargs))
+            if method == "GET":
+                return status_response(200, json_data=[{"id": "a", "hash": self.sha("alpha")}, {"id": "b"}])
+            if "content" in kwargs:
+                response = status_response(415, json_data={"detail": "Unsupported"})
+                response.aclose = AsyncMock()
+                return response
+            return status_response(200, json_data={})
+
+        async_api = AsyncOpenWebUI("http://test.com", "test-key", transport=AsyncMock(spec=AsyncHTTPTransport))
+        async_api.transport.request.side_effect = respond
+        results = asyncio.run(async_api.update_file_contents({"a": "alpha", "b": "beta" * 500}, compress=True))
+        assert results["a"].message == "Content unchanged" and results["b"].success
+        assert [(method, path) for method, path, kwargs in calls] == [
+            ("GET", "/v1/files"), ("POST", "/v1/files/b/data/content/update"), ("POST", "/v1/files/b/data/content/update")
+        ]
+        assert gzip.decompress(calls[1][2]["content"]) == b'{"content":"' + b"beta" * 500 + b'"}'
+        assert not async_api._gzip_requests
+
+        calls.clear()
+        result = asyncio.run(async_api.update_file_content_by_id("b", "beta" * 500, skip_unchanged=True))
+        assert result.message == "Content unchanged" and not calls
+
+class CountingCodec(JSONCodec):
+    def __init__(self):
+        self.dumped = 0
+        self.loaded = 0
+
+    def dumps(self, obj):
+        self.dumped += 1
+        return super().dumps(obj)
+
+    def loads(self, data):
+        self.loaded += 1
+        return super().loads(data)
+
+class TestJSONCodec:
+    def test_get_codec(self):
+        assert get_codec().name == "orjson"  # installed in the test environment
+        assert get_codec("json").name == "json"
+        codec = CountingCodec()
+        assert get_codec(codec) is codec
+        with pytest.raises(ValueError, match="Unknown JSON codec"):
+            get_codec("yaml")
+
+    @pytest.mark.parametrize("name", ["json", "orjson"])
+    def test_roundtrip(self, name):
+        codec = get_codec(name)
+        data = {"content": "héllo ✓", "n": [1, 2.5, None, True], "nested": {"a": []}}
+        body = codec.dumps(data)
+        assert isinstance(body, bytes)
+        assert codec.loads(body) == data
+        assert codec.loads(body.decode("utf-8")) == data
+        with pytest.raises(ValueError):
+            codec.loads(b"{not json")
+
+    def test_default_codec_accepts_what_json_accepts(self):
+        codec = get_codec()
+        for payload in [{"model": "m", "logit_bias": {50256: -100, 13: 5}}, {"seed": 2 ** 70}, {1.5: [None, True]}]:
+            assert codec.dumps(payload) == get_codec("json").dumps(payload)
+
+        api = OpenWebUI("http://test.com", "test-key")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({"choices": [{"index": 0, "message": {"role": "assistant", "content": "hi"}}]}).encode()
+        with patch.object(api.transport.session, "request", return_value=response) as request:
+            api.get_chat_completion_with_messages("m", [{"role": "user", "content": "hi", "metadata": {7: "x"}}])
+        assert json.loads(request.call_args.kwargs["data"])["messages"][0]["metadata"] == {"7": "x"}
+
+    def test_transport_encodes_and_decodes(self):
+        codec = CountingCodec()
+        transport = HTTPTransport(codec=codec)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'[{"id": "file1"}]'
+        with patch.object(transport.session, "request", return_value=response) as request:
+            result = transport.request("POST", "http://test.com/v1/files", json={"a": "é"}, headers={"Accept": "application/json"})
+        kwargs = request.call_args.kwargs
+        assert "json" not in kwargs
+        assert kwargs["data"] == '{"a":"é"}'.encode("utf-8")
+        assert kwargs["headers"] == {"Accept": "application/json", "Content-Type": "application/json"}
+        assert result.json() == [{"id": "file1"}]
+        assert (codec.dumped, codec.loaded) == (1, 1)
+
+    @pytest.mark.parametrize("name", ["json", "orjson"])
+    def test_non_json_body_fails_like_requests(self, name):
+        transport = HTTPTransport(codec=name)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"<html><body>502 Bad Gateway</body></html>"
+        with patch.object(transport.session, "request", return_value=response):
+            api = OpenWebUI("http://test.com", "test-key", transport=transport)
+            with pytest.raises(requests.exceptions.JSONDecodeError):
+                transport.request("GET", "http://test.com/models").json()
+            with pytest.raises(Exception, match="Failed to fetch models") as error:
+                api.get_models()
+        assert not isinstance(error.value, ValueError)
+
+    def test_async_non_json_body(self):
+        httpx = pytest.importorskip("httpx")
+        async def run():
+            transport = AsyncHTTPTransport()
+            transport.client = httpx.AsyncClient(transport=httpx.MockTransport(
+                lambda request: httpx.Response(200, content=b"<html>502 Bad Gateway</html>")))
+            api = AsyncOpenWebUI("http://test.com", "test-key", transport=transport)
+            with pytest.raises(httpx.DecodingError):
+                (await transport.request("GET", "http://test.com/api/models")).json()
+            with pytest.raises(Exception, match="Failed to fetch models"):
+                await api.get_models()
+            await transport.close()
+
+        asyncio.run(run())
+
+    def test_async_transport_encodes_and_decodes(self):
+        httpx = pytest.importorskip("httpx")
+        codec = CountingCodec()
+        seen = {}
+
+        def handler(request):
+            seen["body"] = request.read()
+            seen["content_type"] = request.headers["Content-Type"]
+            return httpx.Response(200, content=b'{"ok": true}')
+
+        async def run():
+            transport = AsyncHTTPTransport(codec=codec)
+            transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            response = await transport.request("POST", "http://test.com/api/chat/completions", json={"model": "m"})
+            await transport.close()
+            return response.json()
+
+        assert asyncio.run(run()) == {"ok": True}
+        assert seen == {"body": b'{"model":"m"}', "content_type": "application/json"}
+        assert (codec.dumped, codec.loaded) == (1, 1)
+
+    def test_client_uses_codec_for_streams(self):
+        codec = CountingCodec()
+        api = OpenWebUI("http://test.com", "test-key", transport=MagicMock(spec=HTTPTransport), json_codec=codec)
+        assert api.json_codec is codec
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = iter(SSE_LINES)
+        api.transport.request.return_value = mock_response
+
+        completion = api.get_chat_completion("model1", "test prompt", stream=True).get_final_completion()
+        assert completion.choices[0].message.content == "Hello"
+        assert codec.loaded == 3
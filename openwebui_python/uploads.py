@@ -0,0 +1,173 @@
+# uploads.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, NamedTuple, Optional, Union
+
+def sha256_file(path: Union[str, os.PathLike], chunk_size: int = 1024 * 1024) -> str:
+    '''
+    Hex SHA-256 of a file's content. The server stores the SHA-256 of the extracted text as
+    OpenWebFile.hash, which is the same digest for UTF-8 text files (txt, md, csv, code...)
+    '''
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return digest.hexdigest()
+            digest.update(chunk)
+
+def hash_files(paths: Iterable, max_workers: Optional[int] = None) -> Dict[str, Union[str, Exception]]:
+    '''
+    SHA-256 of many files, computed on a thread pool (hashlib releases the GIL while hashing,
+    so threads use every core). A file that cannot be read maps to the exception raised.
+    '''
+    paths = list(paths)
+
+    def digest(path):
+        try:
+            return sha256_file(path)
+        except OSError as e:
+            return e
+
+    if len(paths) <= 1:
+        return {path: digest(path) for path in paths}
+    workers = min(max_workers or os.cpu_count() or 4, len(paths))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='openwebui-hash') as executor:
+        return dict(zip(paths, executor.map(digest, paths)))
+
+def server_hashes(value) -> list:
+    '''
+    The hashes of a listed file: servers send a single string, older models typed it as a list
+    '''
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+class UploadRecord(NamedTuple):
+    file_id: str
+    filename: Optional[str]
+    verified_at: float
+    file: Optional[dict] = None
+
+class UploadIndex:
+    '''
+    Persistent SQLite index of what has been uploaded: content hash -> server file id, plus
+    path/size/mtime -> content hash so unchanged files are not hashed again. Each entry keeps the
+    server's file record, as last returned, to answer without a request. Entries last
+    confirmed on the server more than verify_after seconds ago are re-checked before reuse.
+    '''
+    def __init__(self, path: str, verify_after: Optional[float] = 24 * 3600):
+        self.path = path
+        self.verify_after = verify_after
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS paths ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, hash TEXT NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS uploads ("
+            "hash TEXT PRIMARY KEY, file_id TEXT NOT NULL, filename TEXT, verified_at REAL NOT NULL, file TEXT)"
+        )
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(uploads)")]
+        if 'file' not in columns:  # index written by an older version
+            self._connection.execute("ALTER TABLE uploads ADD COLUMN file TEXT")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS uploads_file_id ON uploads (file_id)")
+
+    def _cached_hash(self, path: str, stat: os.stat_result) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash FROM paths WHERE path = ? AND size = ? AND mtime_ns = ?",
+                (path, stat.st_size, stat.st_mtime_ns)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _store_hash(self, path: str, stat: os.stat_result, digest: str):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO paths (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)",
+                (path, stat.st_size, stat.st_mtime_ns, digest)
+            )
+
+    def hash_of(self, path: Union[str, os.PathLike]) -> str:
+        '''
+        SHA-256 of a file, read from the index while its size and mtime are unchanged
+        '''
+        digest = self.hash_many([path])[os.fspath(path)]
+        if isinstance(digest, Exception):
+            raise digest
+        return digest
+
+    def hash_many(self, paths: Iterable, max_workers: Optional[int] = None) -> Dict[str, Union[str, Exception]]:
+        '''
+        Like hash_files, but only files that are new or changed since they were last hashed are read
+        '''
+        results = {}
+        stats = {}
+        for path in map(os.fspath, paths):
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                results[path] = e
+                continue
+            digest = self._cached_hash(os.path.abspath(path), stat)
+            if digest is None:
+                stats[path] = stat
+            else:
+                results[path] = digest
+        for path, digest in hash_files(list(stats), max_workers).items():
+            if not isinstance(digest, Exception):
+                self._store_hash(os.path.abspath(path), stats[path], digest)
+            results[path] = digest
+        return results
+
+    def lookup(self, digest: str) -> Optional[UploadRecord]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT file_id, filename, verified_at, file FROM uploads WHERE hash = ?", (digest,)
+            ).fetchone()
+        if row is None:
+            return None
+        file_id, filename, verified_at, file = row
+        return UploadRecord(file_id, filename, verified_at, json.loads(file) if file is not None else None)
+
+    def is_stale(self, record: UploadRecord) -> bool:
+        return self.verify_after is not None and time.time() - record.verified_at > self.verify_after
+
+    def record(self, digest: str, file_id: str, filename: Optional[str] = None, file: Optional[dict] = None):
+        '''
+        Remember that content with this hash is on the server as file_id, verified now. file is
+        the server's JSON record of it, if known.
+        '''
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO uploads (hash, file_id, filename, verified_at, file) VALUES (?, ?, ?, ?, ?)",
+                (digest, file_id, filename, time.time(), json.dumps(file) if file is not None else None)
+            )
+
+    def forget(self, file_id: str):
+        '''
+        Drop a file that was deleted or whose content changed on the server
+        '''
+        with self._lock:
+            self._connection.execute("DELETE FROM uploads WHERE file_id = ?", (file_id,))
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM paths")
+            self._connection.execute("DELETE FROM uploads")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM uploads").fetchone()[0]
@@ -8,6 +8,10 @@ setup(
     version='0.0.5',
     packages=find_packages(),
     install_requires=install_requires,
+    extras_require={
+        'async': ['httpx>=0.27'],
+        'fast': ['orjson>=3.8'],
+    },
     description='A Python client for interacting with OpenWebUI\'s API, providing easy access to language models and chat completions.',
     author='John Provost',
     author_email='john@johnprovost.com',